@@ -2,16 +2,34 @@ __version__ = '0.2.0'
 __author__ = ['Carson', ]
 __description__ = "Rename the picture by looking through the human eye and typing. (you don't need to open the file by yourself)"
 
-from .core import (
-    ImageRenameApp, APP_ICON_PATH,
-    imread, Event
-)
+# The modules are imported when the name is used at the first time (PEP 562),
+# so that ``img_rename --version`` and reading ``__version__`` do not import tkinter, cv2, numpy, ...
+_DICT_LAZY = {  # name: module
+    **dict.fromkeys(['ImageRenameApp', 'APP_ICON_PATH',
+                     'imread', 'Event',
+                     'JobState', 'JobRegistry'], '.core'),
+    'work_dir': '.api.utils',
+    'ImageScanner': '.api.scanner',
+    'MetadataIndex': '.api.metaindex',
+    'order_by_similarity': '.api.similarity',
+    **dict.fromkeys(['PLUGIN_MS_PAINT', 'PLUGIN_IFD_TAG', 'PLUGIN_IFD_TAG_V2', 'PLUGIN_DUPLICATES'], '.template.plugins'),
+    'Engine': '.template.engine',
+    **dict.fromkeys(['PanelBase', 'PanelNode',
+                     'HotkeyNode',
+                     'ToolbarBase'], '.template.node'),
+}
 
-from .api.utils import work_dir
-from .template.plugins import *
-from .template.engine import Engine
-from image_rename.template.node import (
-    PanelBase, PanelNode,
-    HotkeyNode,
-    ToolbarBase,
-)
\ No newline at end of file
+__all__ = list(_DICT_LAZY)
+
+
+def __getattr__(name: str):
+    if name not in _DICT_LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')  # `from image_rename import template` imports the subpackage.
+    import importlib
+    value = getattr(importlib.import_module(_DICT_LAZY[name], __name__), name)
+    globals()[name] = value  # The next time does not come here.
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,248 @@
+"""
+Rename the files by the plan (old path, new path) without the UI.
+
+The plan is the same as the output of the hotkey `change_log`::
+
+    X:/data/0001.png<TAB>X:/data/cat.png
+    X:/data/0002.png<TAB>X:/data/dog.png
+
+All the rows happen at once, so swapping the names (a -> b, b -> a) is acceptable. (see ``planner.RenamePlanner``)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Iterable, List, Tuple, Dict, NamedTuple, Callable, Union, Set
+import itertools
+import os
+import sys
+import threading
+import time
+from .utils import ILLEGAL_CHARS
+from .dirindex import DirIndexRegistry, DIR_INDEX
+from .planner import RenameRow, RenameOp, RenamePlanner, path_key, rename_no_replace
+from .journal import RenameJournal, decode_record, open_journal
+from .journalindex import file_hash
+
+
+class RenameError(NamedTuple):
+    row: RenameRow
+    reason: str
+
+    def __str__(self):
+        return f'line {self.row.line_no}: {self.row.old} -> {self.row.new}: {self.reason}'
+
+
+def read_plan(plan_path: Union[Path, str], sep='\t', encoding='utf-8') -> Iterator[RenameRow]:
+    """
+    Read the plan line by line. The empty line and the line starts with `#` are ignored,
+    and only the first two columns are used, so the extra columns are acceptable.
+    If the first line is the record of the journal, the file is regarded as the journal (e.g. ``change_log``),
+    and the line which fails the checksum (the torn record) is ignored.
+    """
+    is_journal = None
+    with open(plan_path, 'r', encoding=encoding) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            record = decode_record(line + '\n') if sep == '\t' else None
+            if is_journal is None:
+                is_journal = record is not None
+            if is_journal:
+                if record is None:
+                    continue
+                old, new, *_ = list(record.fields) + ['']
+            else:
+                old, new, *_ = line.split(sep) + ['']
+            yield RenameRow(Path(old), Path(new), line_no)
+
+
+class PlanValidator:
+    """
+    The same rules as ``RenameFactory.on_click_commit``:
+
+        - the name is not empty and it does not contain ``ILLEGAL_CHARS``
+        - the name does not exist in the target directory (case insensitive), unless that file is renamed by an accepted row.
+
+    and the source and the target are not used twice in the plan.
+    """
+    __slots__ = ('dir_index', '_set_source', '_set_target')
+
+    def __init__(self, dir_index: DirIndexRegistry = DIR_INDEX):
+        self.dir_index = dir_index
+        self._set_source: Set[str] = set()  # casefolded path of the sources of the plan.
+        self._set_target: Set[str] = set()  # casefolded path of the targets which are already accepted.
+
+    def check(self, row: RenameRow) -> Union[str, None]:
+        """
+        The rules of the row itself, the existing target is checked by ``split``.
+
+        :return: the reason if it is not acceptable.
+        """
+        old, new, _ = row
+        if not new.stem.strip():
+            return 'name is empty'
+        if [char for char in ILLEGAL_CHARS if char in new.name]:
+            return f'ILLEGAL_CHARS: {" ".join(ILLEGAL_CHARS)}'
+        if old.name not in self.dir_index.get(old.parent):
+            return 'FileNotFoundError'
+        target_key = path_key(new)
+        if target_key in self._set_target:
+            return 'the target is duplicated in the plan'
+        self._set_target.add(target_key)
+
+    def split(self, rows: Iterable[RenameRow]) -> Tuple[List[RenameRow], List[RenameError]]:
+        """
+        The existing target is free only if the row which moves that file away is accepted,
+        so rejecting a row rejects the rows that rely on it too, until nothing changes.
+        """
+        rows = list(rows)
+        dict_accepted: Dict[str, RenameRow] = dict()  # key of the source: row
+        err_list = []
+        for row in rows:
+            source_key = path_key(row.old)
+            if source_key in self._set_source:
+                err_list.append(RenameError(row, 'the source is duplicated in the plan'))
+                continue
+            self._set_source.add(source_key)
+            reason = self.check(row)
+            if reason is None:
+                dict_accepted[source_key] = row
+            else:
+                err_list.append(RenameError(row, reason))
+
+        dict_waiting: Dict[str, str] = dict()  # key of the existing target: key of the source of the row which relies on it.
+        rejected_list = []
+        for source_key, row in dict_accepted.items():
+            if row.new.name in self.dir_index.get(row.new.parent):  # case insensitive
+                dict_waiting[path_key(row.new)] = source_key
+        for target_key, source_key in dict_waiting.items():
+            if target_key not in dict_accepted:
+                rejected_list.append(source_key)
+        while rejected_list:
+            source_key = rejected_list.pop()
+            row = dict_accepted.pop(source_key)
+            err_list.append(RenameError(row, 'FileExistsError'))
+            dependent_key = dict_waiting.get(source_key)  # the target is unique, so at most one row relies on it.
+            if dependent_key is not None and dependent_key in dict_accepted and dependent_key != source_key:
+                rejected_list.append(dependent_key)
+        err_list.sort(key=lambda error: error.row.line_no)
+        return list(dict_accepted.values()), err_list
+
+
+class BatchReport:
+    __slots__ = ('n_done', 'n_failed', 'errors', 'begin_time', '_lock')
+
+    def __init__(self):
+        self.n_done = 0
+        self.n_failed = 0
+        self.errors: List[RenameError] = []
+        self.begin_time = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        elapsed = time.perf_counter() - self.begin_time
+        return f'done: {self.n_done} failed: {self.n_failed} ' \
+               f'({elapsed:.1f}s, {self.n_done / elapsed if elapsed else 0:.0f} files/s)'
+
+    def add_done(self, n=1):
+        with self._lock:
+            self.n_done += n
+
+    def add_error(self, error: RenameError):
+        with self._lock:
+            self.n_failed += 1
+            self.errors.append(error)
+
+
+class BatchRenamer:
+    """
+    USAGE::
+
+        report = BatchRenamer(max_workers=8).run(read_plan('plan.tsv'))
+        print(report)
+
+    The rows are ordered by ``RenamePlanner`` (the cycles are broken by the temporary names),
+    and then the sequences are grouped by the target directory.
+    The renames in one group run in order and the groups run concurrently.
+
+    If the `chunk_size` is set, the plan is read by chunks, the rows in the different chunks can't depend on each other.
+    If the `journal_path` is set, the done rows are appended to it (the same as the hotkey `change_log`),
+    so ``img_rename_journal`` is able to answer for the batch renames too.
+    """
+    __slots__ = ('max_workers', 'dry_run', 'chunk_size',
+                 'progress_interval', 'progress_cb', 'validator',
+                 'journal', 'is_hash')
+
+    def __init__(self, max_workers: int = None, dry_run=False, chunk_size: int = None,
+                 progress_interval: float = 1.0, progress_cb: Callable[[BatchReport], None] = None,
+                 journal_path: Union[Path, str] = None, is_hash=True):
+        """
+        :param max_workers: the number of the threads.
+        :param dry_run: validate only, do not rename.
+        :param chunk_size: the number of the rows which is read at once. None: the whole plan.
+        :param progress_interval: seconds. The interval of calling `progress_cb`.
+        :param progress_cb: default: print the report to the stderr.
+        :param journal_path: the journal of the renames. None: do not write it.
+        :param is_hash: write the content hash to the journal. (it reads the whole file on the thread of the journal)
+        """
+        self.max_workers = max_workers if max_workers else min(32, (os.cpu_count() or 1) * 4)
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self.progress_cb = progress_cb if progress_cb else lambda report: print(report, file=sys.stderr)
+        self.validator = PlanValidator()
+        self.journal: Union[RenameJournal, None] = open_journal(journal_path) if journal_path and not dry_run else None
+        self.is_hash = is_hash
+
+    def run(self, rows: Iterable[RenameRow]) -> BatchReport:
+        report = BatchReport()
+        stop_event = threading.Event()
+        progress_thread = threading.Thread(target=self._report_progress, args=(report, stop_event), daemon=True)
+        progress_thread.start()
+        try:
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix='batch-rename') as executor:
+                rows = iter(rows)
+                for chunk in iter(lambda: list(itertools.islice(rows, self.chunk_size)), []):
+                    ok_list, err_list = self.validator.split(chunk)
+                    [report.add_error(error) for error in err_list]
+                    if self.dry_run:
+                        report.add_done(len(ok_list))
+                        continue
+                    dict_group: Dict[Path, List[List[RenameOp]]] = dict()
+                    for sequence in RenamePlanner(ok_list).plan():
+                        dict_group.setdefault(sequence[-1].dst.parent, []).append(sequence)
+                    list(executor.map(lambda group: self._rename_group(group, report), dict_group.values()))
+        finally:
+            stop_event.set()
+            progress_thread.join()
+            if self.journal:
+                self.journal.flush()
+        self.progress_cb(report)
+        return report
+
+    def _rename_group(self, group: List[List[RenameOp]], report: BatchReport):
+        for sequence in group:
+            self._rename_sequence(sequence, report)
+
+    def _rename_sequence(self, sequence: List[RenameOp], report: BatchReport):
+        for idx, op in enumerate(sequence):
+            try:
+                rename_no_replace(op.src, op.dst)  # the target may appear after the validation.
+            except OSError as e:
+                report.add_error(RenameError(op.row, f'{e.__class__.__name__}: {e.strerror}'))
+                set_moved = {done_op.dst for done_op in sequence[:idx]}
+                for rest_op in sequence[idx + 1:]:  # they depend on this one.
+                    if rest_op.row is not op.row:
+                        kept = f', the file is kept as {rest_op.src}' if rest_op.src in set_moved else ''  # the temporary name of the cycle
+                        report.add_error(RenameError(rest_op.row, f'skipped: {op.src} -> {op.dst} failed{kept}'))
+                return
+            self.validator.dir_index.on_rename(op.src, op.dst)
+            if op.dst == op.row.new:
+                report.add_done()
+                if self.journal:
+                    self.journal.append(str(op.row.old.absolute()), str(op.dst.absolute()),
+                                        (lambda path=op.dst: file_hash(path)) if self.is_hash else '')
+
+    def _report_progress(self, report: BatchReport, stop_event: threading.Event):
+        while not stop_event.wait(self.progress_interval):
+            self.progress_cb(report)
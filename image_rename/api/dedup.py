@@ -0,0 +1,368 @@
+"""
+Find the duplicate (the same content) and the near-duplicate (burst shots, re-imports, resized copies) images::
+
+    finder = DuplicateFinder(Path('./hash.db'), max_distance=8)
+    finder.start(img_path_list)  # hash the queue on the background thread, the files are read by the process pool.
+    finder.group(img_path)  # [DuplicateItem(path, distance, is_exact), ...]
+
+- content hash: BLAKE2b of the file (``journalindex.file_hash``)
+- dHash, pHash: 64 bits, computed from the reduced decode (``IMREAD_REDUCED_GRAYSCALE_{2, 4, 8}``) in batch by NumPy.
+
+The near-duplicates are searched by the BK-tree of the pHash (Hamming distance),
+and the hashes are cached (SQLite) by (mtime, size) across the runs.
+"""
+from concurrent.futures import ProcessPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Set, Tuple, Union
+import os
+import sqlite3
+import threading
+import numpy as np
+import cv2
+from .imagehelper import get_preview_flag, REDUCED_GRAYSCALE_FLAG_TABLE
+from .journalindex import file_hash
+
+THUMB_SIZE = 32  # pHash: the DCT of 32x32, the lowest 8x8 frequencies are kept.
+HASH_SIZE = 8
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k, x = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+DCT_MATRIX = _dct_matrix(THUMB_SIZE)
+
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+    """
+    :param bits: (n, 64) bool
+    :return: (n,) uint64
+    """
+    return np.packbits(bits, axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def dhash_batch(stack: np.ndarray) -> np.ndarray:
+    """
+    :param stack: (n, 8, 9) the grayscale images
+    :return: (n,) uint64, the bit is 1 if the right pixel is brighter.
+    """
+    bits = stack[:, :, 1:] > stack[:, :, :-1]
+    return _pack(bits.reshape(len(stack), HASH_SIZE * HASH_SIZE))
+
+
+def phash_batch(stack: np.ndarray) -> np.ndarray:
+    """
+    :param stack: (n, 32, 32) the grayscale images
+    :return: (n,) uint64, the bit is 1 if the frequency is higher than the median (DC is excluded).
+    """
+    dct = DCT_MATRIX @ stack.astype(np.float32) @ DCT_MATRIX.T
+    low = dct[:, :HASH_SIZE, :HASH_SIZE].reshape(len(stack), HASH_SIZE * HASH_SIZE)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return _pack(low > median)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _to_signed(value: int) -> int:
+    """ SQLite INTEGER is int64. """
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: Union[int, None]) -> Union[int, None]:
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+def decode_thumbnail(path: Union[Path, str]) -> Union[np.ndarray, None]:
+    """
+    :return: 32x32 grayscale, None if it can't be decoded.
+    """
+    flag = get_preview_flag(path, (THUMB_SIZE, THUMB_SIZE), cv2.IMREAD_GRAYSCALE, REDUCED_GRAYSCALE_FLAG_TABLE)
+    img = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), flag)
+    if img is None:
+        return None
+    return cv2.resize(img, (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def _hash_chunk(item_list: List[Tuple[str, int, int]]) -> List[Tuple[str, int, int, str, Union[int, None], Union[int, None]]]:
+    """
+    It runs on the process of the pool.
+
+    :param item_list: (path, size, mtime_ns)
+    :return: (path, size, mtime_ns, content hash, dHash, pHash), the perceptual hashes are None if it is not an image.
+    """
+    row_list, thumb_list, thumb_idx_list = [], [], []
+    for path, file_size, mtime_ns in item_list:
+        try:
+            content = file_hash(path)
+            thumb = decode_thumbnail(path)
+        except OSError:  # It is gone.
+            continue
+        except Exception:  # PIL.Image.DecompressionBombError, cv2.error, ...
+            thumb = None
+        if thumb is not None:
+            thumb_list.append(thumb)
+            thumb_idx_list.append(len(row_list))
+        row_list.append([path, file_size, mtime_ns, content, None, None])
+
+    if thumb_list:
+        stack = np.stack(thumb_list)
+        small = np.stack([cv2.resize(thumb, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA) for thumb in thumb_list])
+        for i, dhash, phash in zip(thumb_idx_list, dhash_batch(small), phash_batch(stack)):
+            row_list[i][4:] = int(dhash), int(phash)
+    return [tuple(row) for row in row_list]
+
+
+class BKTree:
+    """
+    The metric tree of the Hamming distance, so the search visits the branches whose distance is in [d - r, d + r] only.
+    """
+    __slots__ = ('root', '_size')
+
+    def __init__(self):
+        self.root: Union[list, None] = None  # [value, item_list, {distance: node}]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value: int, item: Hashable):
+        self._size += 1
+        if self.root is None:
+            self.root = [value, [item], dict()]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], dict()]
+                return
+            node = child
+
+    def remove(self, value: int, item: Hashable) -> bool:
+        """
+        The node is kept (its children are still reachable), only the item is removed.
+        """
+        node = self.root
+        while node is not None:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                if item in node[1]:
+                    node[1].remove(item)
+                    self._size -= 1
+                    return True
+                return False
+            node = node[2].get(distance)
+        return False
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Hashable]]:
+        """
+        :return: [(distance, item), ...]
+        """
+        result = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_value, item_list, dict_child = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                result.extend((distance, item) for item in item_list)
+            stack.extend(child for d, child in dict_child.items() if distance - radius <= d <= distance + radius)
+        return result
+
+
+class DuplicateItem(NamedTuple):
+    path: Path
+    distance: int  # the Hamming distance of the pHash
+    is_exact: bool  # the same content hash
+
+
+class DuplicateFinder:
+    __slots__ = ('db_path', 'max_distance', 'max_workers', 'chunk_size',
+                 'n_hashed', 'is_done',
+                 '_tree', '_dict_record', '_dict_content', '_lock', '_thread')
+
+    _SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS image_hash (
+        path TEXT PRIMARY KEY,
+        file_size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        dhash INTEGER,  -- signed int64
+        phash INTEGER
+    );
+    '''
+
+    def __init__(self, db_path: Union[Path, str, None] = None, max_distance: int = 8,
+                 max_workers: int = None, chunk_size: int = 64):
+        """
+        :param db_path: the cache of the hashes. None: do not cache.
+        :param max_distance: the images are near-duplicate if the Hamming distance of the pHash (64 bits) <= it.
+        :param max_workers: the number of the processes. 0: hash on the thread of the ``build``.
+        :param chunk_size: the number of the files which are sent to the process at once.
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.max_distance = max_distance
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.n_hashed = 0
+        self.is_done = False
+        self._tree = BKTree()
+        self._dict_record: Dict[Path, Tuple[str, Union[int, None]]] = dict()  # path: (content hash, pHash)
+        self._dict_content: Dict[str, Set[Path]] = dict()
+        self._lock = threading.Lock()
+        self._thread: Union[threading.Thread, None] = None
+
+    def __repr__(self):
+        return f'<DuplicateFinder n_hashed={self.n_hashed}{"" if self.is_done else "+"}>'
+
+    def __len__(self):
+        return len(self._dict_record)
+
+    def start(self, path_list: Iterable[Path]):
+        """
+        ``build`` on the background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.build, args=(path_list,), name='dedup', daemon=True)
+            self._thread.start()
+
+    def join(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def build(self, path_list: Iterable[Path]):
+        """
+        :param path_list: the list of the paths, or ImageScanner (the paths are hashed while it is scanning).
+        """
+        conn = sqlite3.connect(str(self.db_path)) if self.db_path else None
+        executor: Union[ProcessPoolExecutor, None] = None
+        future_list: List[Future] = []
+        row_list = []
+
+        def on_done(f: Future):
+            if not f.cancelled() and f.exception() is None:
+                self._add_rows(f.result(), dict_path)
+
+        dict_path: Dict[str, Path] = dict()  # The key of the cache is the absolute path, the app uses the original one.
+        try:
+            dict_cache: Dict[str, tuple] = dict()
+            if conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(self._SCHEMA)
+                dict_cache = {row[0]: row for row in conn.execute('SELECT * FROM image_hash')}
+
+            pending: List[Tuple[str, int, int]] = []
+            for path in path_list:
+                key = os.path.abspath(path)
+                try:
+                    stat = os.stat(key)
+                except OSError:
+                    continue
+                dict_path[key] = Path(path)
+                row = dict_cache.get(key)
+                if row is not None and row[1:3] == (stat.st_size, stat.st_mtime_ns):
+                    self._add(Path(path), row[3], _to_unsigned(row[5]))
+                    continue
+                pending.append((key, stat.st_size, stat.st_mtime_ns))
+                if len(pending) < self.chunk_size:
+                    continue
+                if self.max_workers == 0:
+                    row_list.extend(self._add_rows(_hash_chunk(pending), dict_path))
+                else:
+                    executor = executor if executor else ProcessPoolExecutor(self.max_workers)
+                    future = executor.submit(_hash_chunk, pending)
+                    future.add_done_callback(on_done)  # The group is able to find it before the queue is finished.
+                    future_list.append(future)
+                pending = []
+            if pending:
+                row_list.extend(self._add_rows(_hash_chunk(pending), dict_path))
+            for future in future_list:  # They are added by the callback already, only the cache is written.
+                row_list.extend(future.result())
+
+            if conn and row_list:
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO image_hash VALUES (?, ?, ?, ?, ?, ?)',
+                                     [(path, file_size, mtime_ns, content,
+                                       None if dhash is None else _to_signed(dhash),
+                                       None if phash is None else _to_signed(phash))
+                                      for path, file_size, mtime_ns, content, dhash, phash in row_list])
+        finally:
+            if executor:
+                executor.shutdown()
+            if conn:
+                conn.close()
+            self.is_done = True
+
+    def _add_rows(self, row_list: List[tuple], dict_path: Dict[str, Path]) -> List[tuple]:
+        for path, _, _, content, _, phash in row_list:
+            self._add(dict_path.get(path, Path(path)), content, phash)
+        return row_list
+
+    def _add(self, path: Path, content: str, phash: Union[int, None]):
+        with self._lock:
+            if path in self._dict_record:
+                return
+            self._dict_record[path] = content, phash
+            self._dict_content.setdefault(content, set()).add(path)
+            if phash is not None:
+                self._tree.add(phash, path)
+            self.n_hashed += 1
+
+    def discard(self, path: Path):
+        """
+        Call it after the file is deleted.
+        """
+        with self._lock:
+            record = self._dict_record.pop(path, None)
+            if record is None:
+                return
+            content, phash = record
+            self._dict_content[content].discard(path)
+            if phash is not None:
+                self._tree.remove(phash, path)
+
+    def on_rename(self, old_path: Path, new_path: Path):
+        with self._lock:
+            record = self._dict_record.get(old_path)
+        if record is None:
+            return
+        self.discard(old_path)
+        self._add(new_path, *record)
+
+    def group(self, path: Path) -> List[DuplicateItem]:
+        """
+        If the image is not hashed yet (the background thread has not reached it), it is hashed right now.
+
+        :return: the other images of the group, sorted by the distance. The exact duplicates are first.
+        """
+        path = Path(path)
+        with self._lock:
+            record = self._dict_record.get(path)
+        if record is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return []
+            for _, _, _, content, _, phash in _hash_chunk([(str(path), stat.st_size, stat.st_mtime_ns)]):
+                self._add(path, content, phash)
+            with self._lock:
+                record = self._dict_record.get(path)
+            if record is None:
+                return []
+
+        content, phash = record
+        with self._lock:
+            dict_item = {other: DuplicateItem(other, 0, True) for other in self._dict_content.get(content, ()) if other != path}
+            if phash is not None:
+                for distance, other in self._tree.search(phash, self.max_distance):
+                    if other != path and other not in dict_item:
+                        dict_item[other] = DuplicateItem(other, distance, False)
+        return sorted(dict_item.values(), key=lambda item: (not item.is_exact, item.distance, str(item.path)))
@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import Dict, Set, Tuple, Union
+import os
+import threading
+
+
+class DirNameIndex:
+    """
+    The casefolded file names of one directory. It is built once by `os.scandir`,
+    and then it is updated in place when we rename or delete the file, so the collision check is O(1).
+
+    If the mtime of the directory was changed by someone else, the index is rebuilt. (see `DirIndexRegistry.get`)
+    """
+    __slots__ = ('dir_path', 'names', 'mtime_ns', '_dict_hint')
+
+    def __init__(self, dir_path: Union[Path, str]):
+        self.dir_path = Path(dir_path)
+        self.names: Set[str] = set()
+        self.mtime_ns = 0
+        self._dict_hint: Dict[Tuple[str, str], int] = dict()  # (stem, suffix): the next number of next_free
+        self.refresh()
+
+    def __contains__(self, name: str):
+        return name.casefold() in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def refresh(self):
+        with os.scandir(self.dir_path) as it:
+            self.names = {entry.name.casefold() for entry in it}
+        self._dict_hint.clear()
+        self.touch()
+
+    def touch(self):
+        """
+        Remember the mtime of the directory after we changed it, so it will not be regarded as the external change.
+        """
+        self.mtime_ns = os.stat(self.dir_path).st_mtime_ns
+
+    def is_stale(self) -> bool:
+        try:
+            return os.stat(self.dir_path).st_mtime_ns != self.mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def add(self, name: str):
+        self.names.add(name.casefold())
+
+    def discard(self, name: str):
+        self.names.discard(name.casefold())
+
+    def rename(self, old_name: str, new_name: str):
+        self.discard(old_name)
+        self.add(new_name)
+
+    def next_free(self, stem: str, suffix: str = '', width: int = 3, sep: str = '_') -> str:
+        """
+        :return: the first name of ``{stem}{sep}{number:0{width}d}{suffix}`` (name_001.png, name_002.png, ...) which does not exist.
+        """
+        key = stem.casefold(), suffix.casefold()
+        number = self._dict_hint.get(key, 1)
+        while f'{stem}{sep}{number:0{width}d}{suffix}'.casefold() in self.names:
+            number += 1
+        self._dict_hint[key] = number
+        return f'{stem}{sep}{number:0{width}d}{suffix}'
+
+
+class DirIndexRegistry:
+    """
+    USAGE::
+
+        dir_index = DIR_INDEX.get(new_file.parent)
+        if new_file.name in dir_index:
+            ...
+        org_file.rename(new_file)
+        DIR_INDEX.on_rename(org_file, new_file)
+    """
+    __slots__ = ('_dict_index', '_lock')
+
+    def __init__(self):
+        self._dict_index: Dict[str, DirNameIndex] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, dir_path: Union[Path, str]) -> DirNameIndex:
+        key = os.path.normcase(os.path.abspath(dir_path))
+        with self._lock:
+            dir_index = self._dict_index.get(key)
+            if dir_index is None:
+                dir_index = self._dict_index[key] = DirNameIndex(dir_path)
+            elif dir_index.is_stale():
+                dir_index.refresh()
+            return dir_index
+
+    def _find(self, dir_path: Union[Path, str]) -> Union[DirNameIndex, None]:
+        return self._dict_index.get(os.path.normcase(os.path.abspath(dir_path)))
+
+    def on_rename(self, old_path: Path, new_path: Path):
+        old_index, new_index = self._find(old_path.parent), self._find(new_path.parent)
+        if old_index is not None:
+            old_index.discard(old_path.name)
+            old_index.touch()
+        if new_index is not None:
+            new_index.add(new_path.name)
+            new_index.touch()
+
+    def on_delete(self, path: Path):
+        dir_index = self._find(path.parent)
+        if dir_index is not None:
+            dir_index.discard(path.name)
+            dir_index.touch()
+
+    def clear(self):
+        self._dict_index.clear()
+
+
+DIR_INDEX = DirIndexRegistry()
@@ -0,0 +1,210 @@
+"""
+Read the IFD {EXIF, GPS} of the image on the worker thread, and cache it by (path, mtime).
+
+USAGE::
+
+    EXIF_CACHE.schedule(img_path_list[idx + 1: idx + 3])  # run ahead with the prefetcher
+    EXIF_CACHE.request(img_path, callback=lambda metadata: ...)  # the callback runs on the thread of the event loop.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple, Union
+import asyncio
+import os
+import threading
+from .ifdparser import read_ifd, IFDError, IFD_EXIF, IFD_GPS
+
+try:
+    import PIL.Image
+    import PIL.ExifTags  # https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/exif.html
+except ImportError:
+    raise ImportError('Please `pip install Pillow`')
+
+# They were built on each call of `get_exif`, now they are built once.
+TAG_ID_BY_NAME_EXIF: Dict[str, int] = {name: tag_id for tag_id, name in PIL.ExifTags.TAGS.items()}
+TAG_ID_BY_NAME_GPS: Dict[str, int] = {name: tag_id for tag_id, name in PIL.ExifTags.GPSTAGS.items()}
+
+
+class ImageMetadata(NamedTuple):
+    size: Tuple[int, int]  # width, height
+    exif: Dict[int, Any]  # IFD0 and the Exif IFD
+    gps: Dict[int, Any]
+
+    def __bool__(self):
+        return bool(self.exif or self.gps)
+
+    def lookup(self, search_list: Iterable[Union[int, str]], fill_empty=None) -> List[Any]:
+        """
+        :param search_list: the id (int), the hex string of the id, or the name of the tag.
+        :param fill_empty: Fill the value with the flag if the value is empty.
+        """
+        result_list = []
+        for key in search_list:
+            if isinstance(key, str):
+                try:
+                    key = int(key, 16)
+                except ValueError:
+                    tag_id = TAG_ID_BY_NAME_EXIF.get(key)
+                    if tag_id is not None and tag_id in self.exif:
+                        result_list.append(self.exif[tag_id])
+                    else:
+                        result_list.append(self.gps.get(TAG_ID_BY_NAME_GPS.get(key), fill_empty))
+                    continue
+            result_list.append(self.exif.get(key, self.gps.get(key, fill_empty)))
+        return result_list
+
+
+def read_metadata_pil(im: PIL.Image.Image) -> ImageMetadata:
+    exif: PIL.Image.Exif = im.getexif()
+    dict_exif = dict(exif)
+    dict_exif.update(exif.get_ifd(IFD_EXIF))  # ExifVersion, DateTimeOriginal, ... are in the Exif IFD.
+    dict_gps = {key: val for key, val in exif.items() if key in PIL.ExifTags.GPSTAGS and key not in PIL.ExifTags.TAGS}
+    dict_gps.update(exif.get_ifd(IFD_GPS))  # GPSTAGS is inside of the GPSInfo
+    return ImageMetadata(im.size, dict_exif, dict_gps)
+
+
+def read_metadata_by_pil(file_path: Union[Path, str]) -> ImageMetadata:
+    with PIL.Image.open(str(file_path)) as im:
+        return read_metadata_pil(im)
+
+
+def read_metadata(file_path: Union[Path, str]) -> ImageMetadata:
+    """
+    Parse the header of JPEG, PNG, TIFF by ``ifdparser`` (a few KB are read), the others are read by Pillow.
+    """
+    try:
+        result = read_ifd(file_path)
+    except IFDError:
+        result = None
+    if result is None:
+        return read_metadata_by_pil(file_path)
+    return ImageMetadata(*result)
+
+
+def get_exif(file_path: Union[Path, PIL.Image.Image],
+             search_list: Union[int, str, List, Tuple] = None,
+             ignore_error=True, fill_empty=None,
+             ) -> Union[int, PIL.Image.Exif, List]:
+    """
+    :param file_path: image path
+    :param search_list: if you want to get some property, then you can pass the id or name, it will return by order.
+    :param ignore_error:
+    :param fill_empty Fill the value with the flag if the value is empty.
+    :return:
+        int: -1 FileNotFoundError, or exif is None
+        PIL.Image.Exif: when the `search_list` is None, return the whole Exif (use ``read_metadata`` for ``ImageMetadata``)
+    """
+    try:
+        if search_list is None:
+            im = file_path if isinstance(file_path, PIL.Image.Image) else PIL.Image.open(str(file_path))
+            metadata = im.getexif()
+        else:
+            metadata = read_metadata_pil(file_path) if isinstance(file_path, PIL.Image.Image) else read_metadata(file_path)
+    except FileNotFoundError:
+        if ignore_error:
+            return -1
+        else:
+            raise FileNotFoundError(file_path)
+
+    if not metadata:
+        if ignore_error:
+            return -1
+        else:
+            raise ValueError("exif is None")
+    if search_list is None:
+        return metadata
+    if not isinstance(search_list, (list, tuple)):
+        search_list = [search_list]
+    return metadata.lookup(search_list, fill_empty)
+
+
+class ExifCache:
+    """
+    The metadata are read on the worker thread, so the panels only fill the Treeview when the image is changed.
+
+    The key is (path, mtime), the renamed or modified file is read again.
+    """
+    __slots__ = ('max_size', 'reader', 'executor', '_cache', '_dict_future', '_lock')
+
+    def __init__(self, max_size: int = 1024, reader: Callable[[Path], ImageMetadata] = read_metadata, max_workers: int = 1):
+        self.max_size = max_size
+        self.reader = reader
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='exif')
+        self._cache: OrderedDict = OrderedDict()  # (path, mtime): ImageMetadata
+        self._dict_future: Dict[Tuple[str, int], Future] = dict()  # (path, mtime): Future, in-flight
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    @staticmethod
+    def make_key(path: Path) -> Union[Tuple[str, int], None]:
+        try:
+            return str(path), os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, path: Path) -> Union[ImageMetadata, None]:
+        key = self.make_key(path)
+        with self._lock:
+            if key not in self._cache:
+                return None
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+    def _load(self, path: Path, key: Tuple[str, int]) -> Union[ImageMetadata, None]:
+        try:
+            metadata = self.reader(path)
+        except (OSError, SyntaxError, ValueError):  # PIL.UnidentifiedImageError is an OSError
+            metadata = None
+        with self._lock:
+            self._dict_future.pop(key, None)
+            if metadata is not None:
+                self._cache[key] = metadata
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        return metadata
+
+    def _submit(self, path: Path) -> Union[Future, None]:
+        """
+        :return: None if it is in the cache (or the file does not exist).
+        """
+        key = self.make_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return None
+            future = self._dict_future.get(key)
+            if future is None:
+                future = self._dict_future[key] = self.executor.submit(self._load, path, key)
+            return future
+
+    def schedule(self, path_list: Iterable[Path]):
+        [self._submit(path) for path in path_list]
+
+    def request(self, path: Path, callback: Callable[[Union[ImageMetadata, None]], Any],
+                loop: asyncio.AbstractEventLoop = None):
+        """
+        If it is in the cache, the callback is called right now, otherwise it is called by the `loop` when it is ready.
+        """
+        future = self._submit(path)
+        if future is None:
+            callback(self.get(path))
+            return
+        loop = loop if loop else asyncio.get_event_loop()
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(callback, None if f.cancelled() else f.result()))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        with self._lock:
+            [future.cancel() for future in self._dict_future.values()]  # `cancel_futures` is new in 3.9
+        self.executor.shutdown(wait=False)
+
+
+EXIF_CACHE = ExifCache()
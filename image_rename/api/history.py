@@ -0,0 +1,92 @@
+"""
+The model of the history (the images which were shown), it is bounded and searchable by the file name::
+
+    model = HistoryModel(max_size=100_000)
+    model.append(Path('X:/data/cat.png'))
+    model.replace_latest(Path('X:/data/dog.png'))  # renamed
+    model[0]  # HistoryEntry(seq, name, path), the newest is the first.
+    model.search('do')  # [seq, ...], the file names which start with it (case insensitive), the newest is the first.
+    model.search('', by_name=True)  # all, sorted by the file name.
+
+The view (Treeview) only shows the rows in the visible window, so it does not grow with the history.
+"""
+from pathlib import Path
+from typing import List, NamedTuple, Union
+import bisect
+
+
+class HistoryEntry(NamedTuple):
+    seq: int  # It is unique and increasing, so it is able to refer the entry after the older ones are dropped.
+    name: str
+    path: str
+
+
+class HistoryModel:
+    __slots__ = ('max_size', '_ring', '_next_seq', '_key_list')
+
+    def __init__(self, max_size: int = 100_000):
+        """
+        :param max_size: The oldest entry is dropped if it is full.
+        """
+        self.max_size = max_size
+        self._ring: List[Union[HistoryEntry, None]] = [None] * max_size
+        self._next_seq = 0
+        self._key_list: List[tuple] = []  # sorted (name.casefold(), seq), the index of the search.
+
+    def __len__(self):
+        return min(self._next_seq, self.max_size)
+
+    @property
+    def first_seq(self) -> int:
+        """ The oldest seq which is kept. """
+        return self._next_seq - len(self)
+
+    def __getitem__(self, idx: int) -> HistoryEntry:
+        """
+        :param idx: 0 is the newest.
+        """
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._ring[(self._next_seq - 1 - idx) % self.max_size]
+
+    def get(self, seq: int) -> Union[HistoryEntry, None]:
+        if not self.first_seq <= seq < self._next_seq:
+            return None
+        return self._ring[seq % self.max_size]
+
+    def append(self, path: Path) -> int:
+        slot = self._next_seq % self.max_size
+        old_entry = self._ring[slot]
+        if old_entry is not None:
+            self._remove_key(old_entry)
+        entry = self._ring[slot] = HistoryEntry(self._next_seq, path.name, str(path.absolute()))
+        bisect.insort(self._key_list, (entry.name.casefold(), entry.seq))
+        self._next_seq += 1
+        return entry.seq
+
+    def replace_latest(self, path: Path):
+        if not len(self):
+            return
+        slot = (self._next_seq - 1) % self.max_size
+        entry = self._ring[slot]
+        self._remove_key(entry)
+        entry = self._ring[slot] = HistoryEntry(entry.seq, path.name, str(path.absolute()))
+        bisect.insort(self._key_list, (entry.name.casefold(), entry.seq))
+
+    def _remove_key(self, entry: HistoryEntry):
+        key = entry.name.casefold(), entry.seq
+        idx = bisect.bisect_left(self._key_list, key)
+        if idx < len(self._key_list) and self._key_list[idx] == key:
+            del self._key_list[idx]
+
+    def search(self, prefix: str, by_name=False) -> List[int]:
+        """
+        :param by_name: sort by the file name. default: the newest is the first.
+        :return: the seq of the entries which file name starts with the `prefix` (case insensitive).
+        """
+        prefix = prefix.casefold()
+        lo = bisect.bisect_left(self._key_list, (prefix,))
+        hi = bisect.bisect_left(self._key_list, (prefix + '\U0010ffff',))
+        if by_name:
+            return [seq for _, seq in self._key_list[lo: hi]]
+        return sorted((seq for _, seq in self._key_list[lo: hi]), reverse=True)
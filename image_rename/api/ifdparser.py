@@ -0,0 +1,182 @@
+"""
+Read the IFD {EXIF, GPS} from the header of the file, without opening the image by Pillow.
+
+- JPEG: the APP1 segment (``Exif\\0\\0``), and the size from the SOF segment.
+- PNG: the eXIf chunk (before IDAT), and the size from IHDR.
+- TIFF: the file is mapped by ``mmap``, only the pages of the IFDs are read.
+
+``None`` is returned for the other formats (and BigTIFF), use Pillow instead. (see ``exif.read_metadata``)
+"""
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+import mmap
+import struct
+
+IFD_EXIF = 0x8769
+IFD_GPS = 0x8825
+TAG_WIDTH, TAG_HEIGHT = 0x0100, 0x0101
+
+MAX_ENTRY = 1000  # guard of the broken file
+
+# type: (the size of one value, the format of struct)
+DICT_TYPE: Dict[int, Tuple[int, str]] = {
+    1: (1, 'B'),  # BYTE
+    2: (1, 's'),  # ASCII
+    3: (2, 'H'),  # SHORT
+    4: (4, 'L'),  # LONG
+    5: (8, 'LL'),  # RATIONAL
+    6: (1, 'b'),  # SBYTE
+    7: (1, 's'),  # UNDEFINED
+    8: (2, 'h'),  # SSHORT
+    9: (4, 'l'),  # SLONG
+    10: (8, 'll'),  # SRATIONAL
+    11: (4, 'f'),  # FLOAT
+    12: (8, 'd'),  # DOUBLE
+}
+
+JPEG_SOF = frozenset([0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF])
+JPEG_SOS = 0xDA
+
+
+class IFDError(ValueError):
+    ...
+
+
+def _read_value(buf, endian: str, type_id: int, count: int, offset: int) -> Any:
+    size, fmt = DICT_TYPE[type_id]
+    if offset + size * count > len(buf):
+        raise IFDError('out of range')
+    if fmt == 's':
+        raw = bytes(buf[offset: offset + count])
+        if type_id == 2:  # ASCII
+            return raw.split(b'\0', 1)[0].decode('utf-8', errors='replace')
+        return raw
+    if type_id == 1 and count > 1:
+        return bytes(buf[offset: offset + count])
+    values = struct.unpack_from(f'{endian}{fmt * count}', buf, offset)
+    if type_id in (5, 10):  # numerator, denominator
+        values = tuple(num / den if den else float('nan') for num, den in zip(values[::2], values[1::2]))
+    return values[0] if count == 1 else values
+
+
+def _read_ifd(buf, endian: str, base: int, ifd_offset: int) -> Dict[int, Any]:
+    """
+    :param base: the offset of the TIFF header in the `buf`, the offsets in the IFD are relative to it.
+    """
+    pos = base + ifd_offset
+    n_entry, = struct.unpack_from(f'{endian}H', buf, pos)
+    if n_entry > MAX_ENTRY:
+        raise IFDError('too many entries')
+    result = dict()
+    for entry_pos in range(pos + 2, pos + 2 + n_entry * 12, 12):
+        tag, type_id, count = struct.unpack_from(f'{endian}HHL', buf, entry_pos)
+        if type_id not in DICT_TYPE:
+            continue
+        size = DICT_TYPE[type_id][0] * count
+        value_pos = entry_pos + 8 if size <= 4 else base + struct.unpack_from(f'{endian}L', buf, entry_pos + 8)[0]
+        result[tag] = _read_value(buf, endian, type_id, count, value_pos)
+    return result
+
+
+def parse_tiff(buf, base: int = 0) -> Tuple[Dict[int, Any], Dict[int, Any]]:
+    """
+    :param buf: bytes, or mmap
+    :param base: the offset of the TIFF header (``II*\\0`` or ``MM\\0*``)
+    :return: exif (IFD0 and the Exif IFD), gps
+    """
+    byte_order = bytes(buf[base: base + 4])
+    if byte_order == b'II*\0':
+        endian = '<'
+    elif byte_order == b'MM\0*':
+        endian = '>'
+    else:
+        raise IFDError(f'not a TIFF header: {byte_order!r}')  # BigTIFF: II+\0
+    ifd0_offset, = struct.unpack_from(f'{endian}L', buf, base + 4)
+    dict_exif = _read_ifd(buf, endian, base, ifd0_offset)
+    dict_gps = dict()
+    if isinstance(dict_exif.get(IFD_EXIF), int):
+        dict_exif.update(_read_ifd(buf, endian, base, dict_exif[IFD_EXIF]))
+    if isinstance(dict_exif.get(IFD_GPS), int):
+        dict_gps = _read_ifd(buf, endian, base, dict_exif[IFD_GPS])
+    return dict_exif, dict_gps
+
+
+def _parse_jpeg(f) -> Tuple[Tuple[int, int], Dict[int, Any], Dict[int, Any]]:
+    size = None
+    dict_exif, dict_gps = dict(), dict()
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise IFDError('broken JPEG')
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:  # no length
+            continue
+        if marker[1] == 0xFF:  # fill byte
+            f.seek(-1, 1)
+            continue
+        length, = struct.unpack('>H', f.read(2))
+        if marker[1] == 0xE1 and not dict_exif:
+            segment = f.read(length - 2)
+            if segment[:6] == b'Exif\0\0':
+                dict_exif, dict_gps = parse_tiff(segment, 6)
+            continue
+        if marker[1] in JPEG_SOF:  # APP1 is before SOF.
+            height, width = struct.unpack('>xHH', f.read(5))
+            size = width, height
+            break
+        if marker[1] == JPEG_SOS:
+            break
+        f.seek(length - 2, 1)
+    if size is None:
+        raise IFDError('SOF is not found')
+    return size, dict_exif, dict_gps
+
+
+def _parse_png(f) -> Tuple[Tuple[int, int], Dict[int, Any], Dict[int, Any]]:
+    size = None
+    f.seek(8)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack('>L4s', header)
+        if chunk_type == b'IHDR':
+            size = struct.unpack('>LL', f.read(8))
+            f.seek(length - 8 + 4, 1)
+        elif chunk_type == b'eXIf':
+            dict_exif, dict_gps = parse_tiff(f.read(length))
+            return size, dict_exif, dict_gps
+        elif chunk_type in (b'IDAT', b'IEND'):
+            break
+        else:
+            f.seek(length + 4, 1)  # data, crc
+    if size is None:
+        raise IFDError('IHDR is not found')
+    return size, dict(), dict()
+
+
+def _parse_tiff_file(f) -> Tuple[Tuple[int, int], Dict[int, Any], Dict[int, Any]]:
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        dict_exif, dict_gps = parse_tiff(buf)
+    if TAG_WIDTH not in dict_exif or TAG_HEIGHT not in dict_exif:
+        raise IFDError('the size is not found')
+    return (dict_exif[TAG_WIDTH], dict_exif[TAG_HEIGHT]), dict_exif, dict_gps
+
+
+def read_ifd(file_path: Union[Path, str]) -> Union[Tuple[Tuple[int, int], Dict[int, Any], Dict[int, Any]], None]:
+    """
+    :return: (width, height), exif, gps. None if the format is not supported.
+    :raise IFDError: the file is broken.
+    """
+    with open(file_path, 'rb') as f:
+        signature = f.read(8)
+        try:
+            if signature[:2] == b'\xff\xd8':
+                return _parse_jpeg(f)
+            if signature == b'\x89PNG\r\n\x1a\n':
+                return _parse_png(f)
+            if signature[:4] in (b'II*\0', b'MM\0*'):
+                return _parse_tiff_file(f)
+        except struct.error as e:
+            raise IFDError(str(e))
+    return None
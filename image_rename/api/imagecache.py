@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Union, Tuple, Callable, Hashable
+import threading
+import os
+import numpy as np
+
+
+class ImageCache:
+    """
+    A process-wide LRU cache of the decoded images.
+
+    The key is (path, mtime, size, flag), so the cache will miss automatically if the file was modified or renamed.
+    The frames are stored as read-only arrays, copy it if you want to draw on it.
+
+    USAGE::
+
+        cache = ImageCache(max_bytes=256 * 1024 ** 2)
+        np_img = cache.get_or_load(img_path, cv2.IMREAD_UNCHANGED, loader=lambda: imread(img_path))
+        print(cache.hits, cache.misses)
+    """
+    __slots__ = ('max_bytes', 'cur_bytes', 'hits', 'misses',
+                 '_data', '_lock')
+
+    def __init__(self, max_bytes: int = 512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.cur_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()  # The frames may come from the worker threads.
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return key in self._data
+
+    def __repr__(self):
+        return f'<ImageCache n={len(self)} {self.cur_bytes / 1024 ** 2:.1f}/{self.max_bytes / 1024 ** 2:.1f}MB ' \
+               f'hits={self.hits} misses={self.misses}>'
+
+    @staticmethod
+    def make_key(file: Union[Path, str], flag: Hashable) -> Tuple[str, int, int, Hashable]:
+        """
+        :raise FileNotFoundError
+        """
+        file = str(file)
+        stat = os.stat(file)
+        return file, stat.st_mtime_ns, stat.st_size, flag
+
+    def get(self, key: Hashable) -> Union[np.ndarray, None]:
+        with self._lock:
+            np_img = self._data.get(key)
+            if np_img is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return np_img
+
+    def put(self, key: Hashable, np_img: np.ndarray) -> np.ndarray:
+        np_img.setflags(write=False)
+        if np_img.nbytes > self.max_bytes:
+            return np_img  # too big to keep, but the caller still can use it.
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.cur_bytes -= old.nbytes
+            self._data[key] = np_img
+            self.cur_bytes += np_img.nbytes
+            while self.cur_bytes > self.max_bytes:
+                _, evict_img = self._data.popitem(last=False)
+                self.cur_bytes -= evict_img.nbytes
+        return np_img
+
+    def get_or_load(self, file: Union[Path, str], flag: Hashable, loader: Callable[[], np.ndarray]) -> np.ndarray:
+        key = self.make_key(file, flag)
+        np_img = self.get(key)
+        if np_img is None:
+            np_img = loader()
+            if np_img is None:  # cv2.imdecode failed
+                return np_img
+            np_img = self.put(key, np_img)
+        return np_img
+
+    def resize(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self.cur_bytes > self.max_bytes and self._data:
+                _, evict_img = self._data.popitem(last=False)
+                self.cur_bytes -= evict_img.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.cur_bytes = 0
+            self.hits = self.misses = 0
+
+
+IMAGE_CACHE = ImageCache()
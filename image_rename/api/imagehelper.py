@@ -1,6 +1,64 @@
 import numpy as np
-from typing import Union, List
+from typing import Union, List, Tuple, Dict, Deque, Hashable
+from collections import deque
+from pathlib import Path
+import functools
+import os
 import cv2
+import PIL.Image
+
+REDUCED_FLAG_TABLE = ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                      (4, cv2.IMREAD_REDUCED_COLOR_4),
+                      (2, cv2.IMREAD_REDUCED_COLOR_2))
+REDUCED_GRAYSCALE_FLAG_TABLE = ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+                                (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                                (2, cv2.IMREAD_REDUCED_GRAYSCALE_2))
+
+
+@functools.lru_cache(maxsize=4096)
+def _read_image_header(file: str, mtime_ns: int, file_size: int) -> Tuple[Tuple[int, int], bool]:
+    with PIL.Image.open(file) as im:  # only the header is read.
+        return im.size, im.mode in ('RGBA', 'RGBa', 'LA', 'La', 'PA') or 'transparency' in im.info
+
+
+def _image_header(file: Union[Path, str]) -> Tuple[Tuple[int, int], bool]:
+    file = str(file)
+    stat = os.stat(file)
+    return _read_image_header(file, stat.st_mtime_ns, stat.st_size)
+
+
+def get_image_size(file: Union[Path, str]) -> Tuple[int, int]:
+    """
+    :return: (width, height) without decoding the image.
+    """
+    return _image_header(file)[0]
+
+
+def get_preview_flag(file: Union[Path, str], target_size: Tuple[int, int], default_flag=cv2.IMREAD_UNCHANGED,
+                     flag_table=REDUCED_FLAG_TABLE) -> int:
+    """
+    Choose the ``IMREAD_REDUCED_COLOR_{2, 4, 8}`` that the decoded image is still not smaller than the target size.
+    The JPEG is scaled on the DCT by libjpeg, so it is much faster than decoding the full resolution and resizing it.
+
+    The reduced flags drop the alpha, so the image with the alpha keeps ``IMREAD_UNCHANGED``
+    unless the caller asks for the color (or the gray) by the `default_flag`.
+
+    :param file: image path
+    :param target_size: (width, height) of the display
+    :param default_flag: used if the image is too small to reduce or the header can't be read.
+    :param flag_table: ``REDUCED_GRAYSCALE_FLAG_TABLE`` if the color is not needed.
+    """
+    target_w, target_h = target_size
+    try:
+        (img_w, img_h), has_alpha = _image_header(file)
+    except (OSError, PIL.Image.DecompressionBombError):  # PIL.UnidentifiedImageError is an OSError
+        return default_flag
+    if has_alpha and default_flag == cv2.IMREAD_UNCHANGED:
+        return default_flag
+    for factor, flag in flag_table:
+        if img_w // factor >= target_w and img_h // factor >= target_h:
+            return flag
+    return default_flag
 
 
 def append_image_to_news(src_img: np.array,
@@ -62,3 +120,175 @@ def append_image_to_news(src_img: np.array,
             concat_img[src_h:src_h + a_h, : a_w, :] = append_img
         new_image = concat_img
     return new_image
+
+
+def _paste(dst: np.ndarray, img: np.ndarray):
+    """
+    Write the image to the BGRA buffer in place. (The gray and BGR image are converted by cvtColor with `dst`,
+    so it does not create the temporary RGBA image)
+
+    The 16-bit (or float) image is scaled to 0-255 instead of being wrapped by ``astype``.
+    """
+    if img.dtype != np.uint8:
+        img = cv2.convertScaleAbs(img, alpha=255 / max(int(img.max()), 1))
+    n_channel = img.shape[2] if img.ndim == 3 else 1
+    if n_channel == 4:
+        dst[...] = img
+    else:
+        cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA if n_channel == 1 else cv2.COLOR_BGR2BGRA, dst=dst)
+
+
+def compose_mosaic(img_list: List[np.ndarray], n_col: int = None,
+                   highlight_idx: int = None, highlight_color: Tuple[int, int, int] = None,
+                   border_thickness: int = 0, out: np.ndarray = None) -> np.ndarray:
+    """
+    Put all the images on the grid (rows x cols) at once. The layout is computed first,
+    so it only allocates one BGRA buffer and each image is copied exactly once.
+
+    USAGE:
+        - compose_mosaic([img1, img2, img3])  # a row strip, the same as append_image_to_news(img1, [img2, img3], 'r')
+        - compose_mosaic(img_list, n_col=4)  # grid
+        - compose_mosaic(img_list, highlight_idx=0, highlight_color=(0, 0, 255), border_thickness=10)
+
+    :param img_list: gray, BGR, or BGRA images.
+    :param n_col: the number of the images per row. None: a row strip.
+    :param highlight_idx: the image is surrounded by the border of `highlight_color`, like ``cv2.copyMakeBorder``
+    :param highlight_color: BGR
+    :param border_thickness:
+    :param out: reuse this buffer if its shape is right.
+    """
+    n_img = len(img_list)
+    n_col = n_img if n_col is None else max(1, min(n_col, n_img))
+    n_row = -(-n_img // n_col)
+    pad = border_thickness if highlight_color is not None and highlight_idx is not None else 0
+
+    list_cell_size = []
+    for idx, img in enumerate(img_list):
+        h, w = img.shape[:2]
+        if pad and idx == highlight_idx:
+            h, w = h + 2 * pad, w + 2 * pad
+        list_cell_size.append((h, w))
+    list_row_h = [max(h for h, w in list_cell_size[row * n_col: (row + 1) * n_col]) for row in range(n_row)]
+    list_col_w = [max(list_cell_size[idx][1] for idx in range(col, n_img, n_col)) for col in range(n_col)]
+    list_y = np.cumsum([0] + list_row_h).tolist()
+    list_x = np.cumsum([0] + list_col_w).tolist()
+
+    shape = (list_y[-1], list_x[-1], 4)
+    if out is None or out.shape != shape or out.dtype != np.uint8:
+        out = np.zeros(shape, dtype=np.uint8)
+    else:
+        out.fill(0)
+
+    for idx, img in enumerate(img_list):
+        row, col = divmod(idx, n_col)
+        y, x = list_y[row], list_x[col]
+        h, w = img.shape[:2]
+        if pad and idx == highlight_idx:
+            cell = out[y: y + h + 2 * pad, x: x + w + 2 * pad]
+            color = (*highlight_color[:3], 255)
+            cell[:pad] = color
+            cell[-pad:] = color
+            cell[pad:-pad, :pad] = color
+            cell[pad:-pad, -pad:] = color
+            y, x = y + pad, x + pad
+        _paste(out[y: y + h, x: x + w], img)
+    return out
+
+
+class StripCompositor:
+    """
+    The row strip of the sliding window. (the first image is the current image and it is highlighted)
+
+    It keeps the tiles which are already converted to BGRA as a ring. When the window advances by one,
+    the ring is shifted, only the new trailing tile is prepared, and the canvas is reused
+    (shift the pixels to the left and redraw the highlight border) if its shape is not changed.
+
+    Each cell has a margin of `border_thickness`, so moving the highlight does not change the layout.
+
+    USAGE::
+
+        strip = StripCompositor(highlight_color=(0, 0, 255), border_thickness=10)
+        list_missing = strip.missing(key_list)
+        img_display = strip.compose(key_list, {key: load(key) for key in list_missing})
+    """
+    __slots__ = ('highlight_color', 'border_thickness', '_ring', '_canvas')
+
+    def __init__(self, highlight_color: Tuple[int, int, int] = None, border_thickness: int = 0):
+        self.highlight_color = highlight_color
+        self.border_thickness = border_thickness
+        self._ring: Deque[Tuple[Hashable, np.ndarray]] = deque()
+        self._canvas: Union[np.ndarray, None] = None
+
+    @property
+    def pad(self) -> int:
+        return self.border_thickness if self.highlight_color is not None else 0
+
+    def missing(self, key_list: List[Hashable]) -> List[Hashable]:
+        """
+        :return: the keys which are not in the ring, you should load these images and pass it to `compose`.
+        """
+        set_key = {key for key, _ in self._ring}
+        return [key for key in key_list if key not in set_key]
+
+    def compose(self, key_list: List[Hashable], dict_img: Dict[Hashable, np.ndarray]) -> np.ndarray:
+        """
+        :return: the canvas, it will be modified by the next call.
+        """
+        old_key_list = [key for key, _ in self._ring]
+        if key_list == old_key_list and self._canvas is not None:
+            return self._canvas
+
+        dict_tile = dict(self._ring)
+        new_ring = deque((key, dict_tile[key] if key in dict_tile else self._prepare(dict_img[key])) for key in key_list)
+        is_advance = len(key_list) > 1 and old_key_list[1:] == key_list[:-1]
+        if not (is_advance and self._shift(self._ring[0][1], new_ring[-1][1])):
+            self._rebuild(new_ring)
+        self._ring = new_ring
+        self._draw_highlight(new_ring[0][1])
+        return self._canvas
+
+    @staticmethod
+    def _prepare(img: np.ndarray) -> np.ndarray:
+        tile = np.empty((*img.shape[:2], 4), dtype=np.uint8)
+        _paste(tile, img)
+        return tile
+
+    def _shift(self, drop_tile: np.ndarray, new_tile: np.ndarray) -> bool:
+        """
+        If the dropped tile and the new tile have the same shape, the layout is not changed.
+        """
+        if self._canvas is None or drop_tile.shape != new_tile.shape:
+            return False
+        pad = self.pad
+        h, w = new_tile.shape[:2]
+        cell_w = w + 2 * pad
+        canvas = self._canvas
+        canvas[:, :-cell_w] = canvas[:, cell_w:]
+        cell = canvas[:, -cell_w:]
+        cell.fill(0)
+        cell[pad: pad + h, pad: pad + w] = new_tile
+        return True
+
+    def _rebuild(self, ring: Deque[Tuple[Hashable, np.ndarray]]):
+        pad = self.pad
+        canvas_h = max(tile.shape[0] for _, tile in ring) + 2 * pad
+        canvas_w = sum(tile.shape[1] + 2 * pad for _, tile in ring)
+        canvas = np.zeros((canvas_h, canvas_w, 4), dtype=np.uint8)
+        x = 0
+        for _, tile in ring:
+            h, w = tile.shape[:2]
+            canvas[pad: pad + h, x + pad: x + pad + w] = tile
+            x += w + 2 * pad
+        self._canvas = canvas
+
+    def _draw_highlight(self, tile: np.ndarray):
+        pad = self.pad
+        if not pad:
+            return
+        h, w = tile.shape[:2]
+        cell = self._canvas[: h + 2 * pad, : w + 2 * pad]
+        color = (*self.highlight_color[:3], 255)
+        cell[:pad] = color
+        cell[-pad:] = color
+        cell[pad:-pad, :pad] = color
+        cell[pad:-pad, -pad:] = color
@@ -0,0 +1,192 @@
+"""
+The append-only journal of the renames (or any records).
+
+Each line is one record::
+
+    field_1<TAB>field_2<TAB>...<TAB>timestamp<TAB>crc32
+
+The records are buffered in the memory and written by the background thread (by time or by count) with one fsync.
+The field is able to be a function, it is called on that thread. (e.g. the hash of the file, see ``journalindex.file_hash``)
+If the app crashes while writing, the torn line fails the checksum and it is ignored by the reader.
+The first columns are the fields, so the change log is still a plan of ``img_rename_batch``.
+"""
+from pathlib import Path
+from typing import List, Dict, Tuple, Iterator, NamedTuple, Union, Callable
+import atexit
+import os
+import threading
+import time
+import zlib
+
+SEP = '\t'
+
+
+class JournalRecord(NamedTuple):
+    fields: Tuple[str, ...]
+    timestamp: float
+
+
+def check_field(field: str):
+    if SEP in field or '\n' in field or '\r' in field:
+        raise ValueError(f'The field contains the tab or the newline: {field!r}')
+
+
+def encode_record(fields: Tuple[str, ...], timestamp: float) -> str:
+    [check_field(field) for field in fields]
+    body = SEP.join([*fields, f'{timestamp:.6f}'])
+    return f'{body}{SEP}{zlib.crc32(body.encode("utf-8")):08x}\n'
+
+
+def decode_record(line: str) -> Union[JournalRecord, None]:
+    """
+    :return: None if the line is torn or broken.
+    """
+    if not line.endswith('\n'):
+        return None
+    body, _, crc = line[:-1].rpartition(SEP)
+    try:
+        if int(crc, 16) != zlib.crc32(body.encode('utf-8')):
+            return None
+        *fields, timestamp = body.split(SEP)
+        return JournalRecord(tuple(fields), float(timestamp))
+    except ValueError:
+        return None
+
+
+def read_journal(path: Union[Path, str], offset: int = 0) -> Iterator[Tuple[JournalRecord, int]]:
+    """
+    :param path:
+    :param offset: start from the byte offset. (the offset returned by the last record)
+    :return: (record, the offset of the next record)
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw_line in f:
+            offset += len(raw_line)
+            record = decode_record(raw_line.decode('utf-8', errors='replace'))
+            if record is not None:
+                yield record, offset
+
+
+class RenameJournal:
+    """
+    USAGE::
+
+        journal = open_journal(Path('change_log.txt'))
+        journal.append(str(old_path), str(new_path))
+    """
+    __slots__ = ('path', 'flush_interval', 'flush_count', 'is_fsync',
+                 '_buffer', '_cond', '_write_lock', '_thread', '_is_closed')
+
+    def __init__(self, path: Path, flush_interval: float = 1.0, flush_count: int = 64, is_fsync=True):
+        """
+        :param path:
+        :param flush_interval: seconds. The longest time that the record stays in the memory.
+        :param flush_count: write right now if there are so many records in the buffer.
+        :param is_fsync: call os.fsync once for each flush.
+        """
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self.is_fsync = is_fsync
+        self._buffer: List[Tuple[tuple, float]] = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._is_closed = False
+        self._repair_tail()
+        self._thread = threading.Thread(target=self._run, name=f'journal-{self.path.name}', daemon=True)
+        self._thread.start()
+
+    def _repair_tail(self):
+        """
+        If the last line is torn, end it, so that the next record starts at a new line.
+        """
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    def append(self, *fields: Union[str, Callable[[], str]], timestamp: float = None):
+        [check_field(field) for field in fields if not callable(field)]
+        with self._cond:
+            if self._is_closed:
+                raise ValueError(f'The journal is closed: {self.path}')
+            self._buffer.append((fields, time.time() if timestamp is None else timestamp))
+            if len(self._buffer) >= self.flush_count:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._is_closed or len(self._buffer) >= self.flush_count,
+                                    self.flush_interval)
+                is_closed = self._is_closed
+            self.flush()
+            if is_closed:
+                return
+
+    def flush(self):
+        with self._write_lock:
+            with self._cond:
+                records, self._buffer = self._buffer, []
+            if records:
+                self._write([encode_record(tuple(self._resolve(field) for field in fields), timestamp)
+                             for fields, timestamp in records])
+
+    @staticmethod
+    def _resolve(field: Union[str, Callable[[], str]]) -> str:
+        if not callable(field):
+            return field
+        try:
+            value = field()
+            check_field(value)
+            return value
+        except (OSError, ValueError):  # The file was moved or deleted before flushing.
+            return ''
+
+    def _write(self, lines: List[str]):
+        with open(self.path, 'a', encoding='utf-8', newline='\n') as f:
+            f.write(''.join(lines))
+            f.flush()
+            if self.is_fsync:
+                os.fsync(f.fileno())
+
+    def close(self):
+        with self._cond:
+            if self._is_closed:
+                return
+            self._is_closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        self.flush()
+        if self.path.exists():
+            for record, _ in read_journal(self.path):
+                yield record
+
+
+_dict_journal: Dict[str, RenameJournal] = dict()
+_lock = threading.Lock()
+
+
+def open_journal(path: Union[Path, str], **options) -> RenameJournal:
+    """
+    The journal of the same path is shared, and it is closed (flushed) when the program exits.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    with _lock:
+        journal = _dict_journal.get(key)
+        if journal is None or journal._is_closed:
+            journal = _dict_journal[key] = RenameJournal(Path(path), **options)
+        return journal
+
+
+@atexit.register
+def close_all_journal():
+    with _lock:
+        for journal in _dict_journal.values():
+            journal.close()
+        _dict_journal.clear()
@@ -0,0 +1,173 @@
+"""
+The index of the rename journals (SQLite, WAL mode), so that the provenance questions do not need to grep the logs::
+
+    index = JournalIndex(Path('journal.db'))
+    index.ingest(Path('my_change_log.txt'))  # only the new records (by the byte offset) are read.
+    index.origin(Path('X:/data/cat.png'))    # what was this file originally called?
+
+The record of the change log is ``old_path<TAB>new_path[<TAB>hash]`` (see ``journal.RenameJournal``).
+"""
+from pathlib import Path
+from typing import List, Iterable, Iterator, NamedTuple, Union
+import hashlib
+import os
+import sqlite3
+from .journal import read_journal
+
+
+def file_hash(path: Union[Path, str], chunk_size: int = 1 << 20) -> str:
+    """
+    The content hash of the file. (BLAKE2b, 128 bits)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RenameEntry(NamedTuple):
+    id: int
+    old: str
+    new: str
+    hash: str
+    timestamp: float
+
+
+class JournalIndex:
+    """
+    The chain (a -> b -> c) is followed by the time, so the file which reuses the old name later is not mixed up.
+    """
+    __slots__ = ('db_path', 'conn')
+
+    MAX_CHAIN = 10000  # guard of the broken journal
+
+    _SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rename (
+        id INTEGER PRIMARY KEY,
+        old TEXT NOT NULL,
+        new TEXT NOT NULL,
+        hash TEXT NOT NULL DEFAULT '',
+        ts REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_rename_old ON rename (old, ts);
+    CREATE INDEX IF NOT EXISTS idx_rename_new ON rename (new, ts);
+    CREATE INDEX IF NOT EXISTS idx_rename_hash ON rename (hash);
+    CREATE INDEX IF NOT EXISTS idx_rename_ts ON rename (ts);
+    CREATE TABLE IF NOT EXISTS journal (
+        path TEXT PRIMARY KEY,
+        offset INTEGER NOT NULL
+    );
+    '''
+
+    def __init__(self, db_path: Union[Path, str]):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self._SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def normalize(path: Union[Path, str]) -> str:
+        """
+        The same for the ingested records and the queries, so the relative path (to the current directory) is found too.
+        """
+        return os.path.abspath(path) if str(path) else ''
+
+    def ingest(self, journal_path: Union[Path, str]) -> int:
+        """
+        Read the records which are appended after the last ingest.
+
+        :return: the number of the new records.
+        """
+        key = os.path.normcase(os.path.abspath(journal_path))
+        row = self.conn.execute('SELECT offset FROM journal WHERE path = ?', (key,)).fetchone()
+        offset = row[0] if row else 0
+        if offset > os.path.getsize(journal_path):  # The file was replaced.
+            offset = 0
+
+        def iter_row() -> Iterator[tuple]:
+            nonlocal offset
+            for record, offset in read_journal(journal_path, offset):
+                if len(record.fields) < 2:  # e.g. history_log
+                    continue
+                old, new, content_hash, *_ = record.fields + ('',)
+                yield self.normalize(old), self.normalize(new), content_hash, record.timestamp
+
+        with self.conn:
+            n_before = self.conn.total_changes
+            self.conn.executemany('INSERT INTO rename (old, new, hash, ts) VALUES (?, ?, ?, ?)', iter_row())
+            n_new = self.conn.total_changes - n_before
+            self.conn.execute('INSERT OR REPLACE INTO journal (path, offset) VALUES (?, ?)', (key, offset))
+        return n_new
+
+    def _query(self, sql: str, params: Iterable) -> List[RenameEntry]:
+        return [RenameEntry(*row) for row in self.conn.execute(sql, tuple(params))]
+
+    def by_old(self, path: Union[Path, str]) -> List[RenameEntry]:
+        return self._query('SELECT id, old, new, hash, ts FROM rename WHERE old = ? ORDER BY ts, id', [self.normalize(path)])
+
+    def by_new(self, path: Union[Path, str]) -> List[RenameEntry]:
+        return self._query('SELECT id, old, new, hash, ts FROM rename WHERE new = ? ORDER BY ts, id', [self.normalize(path)])
+
+    def by_hash(self, content_hash: str) -> List[RenameEntry]:
+        return self._query('SELECT id, old, new, hash, ts FROM rename WHERE hash = ? ORDER BY ts, id', [content_hash])
+
+    def between(self, begin: float = None, end: float = None) -> List[RenameEntry]:
+        """
+        :param begin: timestamp, included.
+        :param end: timestamp, excluded.
+        """
+        return self._query('SELECT id, old, new, hash, ts FROM rename WHERE ts >= ? AND ts < ? ORDER BY ts, id',
+                           [begin if begin is not None else float('-inf'), end if end is not None else float('inf')])
+
+    def history(self, path: Union[Path, str]) -> List[RenameEntry]:
+        """
+        The renames which end with the last name of the `path`, from the oldest to the newest. (one query)
+
+        USAGE::
+
+            entries = index.history(Path('c.png'))  # a -> b, b -> c
+            original_name = entries[0].old if entries else Path('c.png')
+        """
+        return self._query('''
+        WITH RECURSIVE chain(id, old, new, hash, ts, depth) AS (
+            SELECT * FROM (SELECT id, old, new, hash, ts, 0 FROM rename WHERE new = ? ORDER BY ts DESC, id DESC LIMIT 1)
+            UNION ALL
+            SELECT r.id, r.old, r.new, r.hash, r.ts, c.depth + 1 FROM chain c JOIN rename r ON r.id = (
+                SELECT id FROM rename WHERE new = c.old AND (ts, id) < (c.ts, c.id) ORDER BY ts DESC, id DESC LIMIT 1
+            ) WHERE c.depth < ?
+        )
+        SELECT id, old, new, hash, ts FROM chain ORDER BY depth DESC
+        ''', [self.normalize(path), self.MAX_CHAIN])
+
+    def future(self, path: Union[Path, str]) -> List[RenameEntry]:
+        """
+        The renames which start from the first time of the `path`, from the oldest to the newest. (one query)
+        """
+        return self._query('''
+        WITH RECURSIVE chain(id, old, new, hash, ts, depth) AS (
+            SELECT * FROM (SELECT id, old, new, hash, ts, 0 FROM rename WHERE old = ? ORDER BY ts, id LIMIT 1)
+            UNION ALL
+            SELECT r.id, r.old, r.new, r.hash, r.ts, c.depth + 1 FROM chain c JOIN rename r ON r.id = (
+                SELECT id FROM rename WHERE old = c.new AND (ts, id) > (c.ts, c.id) ORDER BY ts, id LIMIT 1
+            ) WHERE c.depth < ?
+        )
+        SELECT id, old, new, hash, ts FROM chain ORDER BY depth
+        ''', [self.normalize(path), self.MAX_CHAIN])
+
+    def origin(self, path: Union[Path, str]) -> Path:
+        """
+        :return: the original name of the `path`. (the path itself if it was never renamed)
+        """
+        entries = self.history(path)
+        return Path(entries[0].old) if entries else Path(path)
@@ -0,0 +1,173 @@
+"""
+The index (SQLite) of the stat, the size and the EXIF of the images, so that the queue is able to be sorted and filtered
+before viewing::
+
+    index = MetadataIndex(Path('./metadata.db'))
+    index.refresh(ImageScanner(Path('./data'), max_depth=None))  # only the new or modified files are read.
+    img_path_list = index.select("make = ? AND file_size > ?", ('Canon', 20 * 1024 ** 2), order_by='date_time_original')
+
+The files are read by the process pool, and it is incremental by (mtime, size).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple, Union
+import os
+import sqlite3
+from .exif import read_metadata
+
+TAG_MAKE, TAG_MODEL, TAG_DATE_TIME_ORIGINAL = 0x010F, 0x0110, 0x9003
+
+COLUMNS = ('path', 'dir', 'suffix', 'file_size', 'mtime_ns',
+           'width', 'height', 'date_time_original', 'make', 'model')
+
+
+class RefreshReport(NamedTuple):
+    n_total: int
+    n_updated: int
+    n_removed: int
+
+
+def _extract(item_list: List[Tuple[str, int, int]]) -> List[tuple]:
+    """
+    It runs on the process of the pool.
+
+    :param item_list: (path, size, mtime_ns)
+    :return: the rows of the COLUMNS
+    """
+    row_list = []
+    for path, file_size, mtime_ns in item_list:
+        width = height = date_time_original = make = model = None
+        try:
+            metadata = read_metadata(path)
+            (width, height), exif = metadata.size, metadata.exif
+            date_time_original, make, model = [str(exif[tag]).strip() if tag in exif else None
+                                               for tag in (TAG_DATE_TIME_ORIGINAL, TAG_MAKE, TAG_MODEL)]
+        except (OSError, SyntaxError, ValueError):  # The file is broken or not an image, only the stat is kept.
+            ...
+        row_list.append((path, os.path.dirname(path), os.path.splitext(path)[1].lower(), file_size, mtime_ns,
+                         width, height, date_time_original, make, model))
+    return row_list
+
+
+class MetadataIndex:
+    __slots__ = ('db_path', 'conn', 'max_workers', 'chunk_size')
+
+    _SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS image (
+        path TEXT PRIMARY KEY,
+        dir TEXT NOT NULL,
+        suffix TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        width INTEGER,
+        height INTEGER,
+        date_time_original TEXT,  -- YYYY:MM:DD HH:MM:SS
+        make TEXT,
+        model TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_image_dir ON image (dir);
+    CREATE INDEX IF NOT EXISTS idx_image_file_size ON image (file_size);
+    CREATE INDEX IF NOT EXISTS idx_image_mtime ON image (mtime_ns);
+    CREATE INDEX IF NOT EXISTS idx_image_date_time_original ON image (date_time_original);
+    CREATE INDEX IF NOT EXISTS idx_image_make ON image (make, model);
+    '''
+
+    def __init__(self, db_path: Union[Path, str], max_workers: int = None, chunk_size: int = 256):
+        """
+        :param max_workers: the number of the processes. 0: read on this process.
+        :param chunk_size: the number of the files which are sent to the process at once.
+        """
+        self.db_path = Path(db_path)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self._SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self, path_list: Iterable[Path], prune=True) -> RefreshReport:
+        """
+        :param path_list: the list of the paths, or ImageScanner.
+        :param prune: remove the files which are not in the `path_list` but their directories are.
+        """
+        return self._refresh(path_list, prune)[0]
+
+    def refresh_and_select(self, path_list: Iterable[Path], where: str = None, params: Sequence = (),
+                           order_by: str = 'path', limit: int = None) -> List[Path]:
+        """
+        The same as ``refresh`` and then ``select``, but only the paths in the `path_list` are returned.
+        """
+        _, set_seen = self._refresh(path_list, prune=True)
+        path_list = [path for path in self.select(where, params, order_by) if str(path) in set_seen]
+        return path_list[:limit] if limit is not None else path_list
+
+    def _refresh(self, path_list: Iterable[Path], prune: bool) -> Tuple[RefreshReport, Set[str]]:
+        dict_stat: Dict[str, Tuple[int, int]] = dict(
+            (path, (file_size, mtime_ns)) for path, file_size, mtime_ns in
+            self.conn.execute('SELECT path, file_size, mtime_ns FROM image'))
+        set_seen = set()
+        changed_list: List[Tuple[str, int, int]] = []
+        for path in path_list:
+            path = os.fspath(path)
+            if not os.path.isabs(path):  # The paths of ImageScanner are absolute already.
+                path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            set_seen.add(path)
+            if dict_stat.get(path) != (stat.st_size, stat.st_mtime_ns):
+                changed_list.append((path, stat.st_size, stat.st_mtime_ns))
+
+        removed_list = []
+        if prune:
+            set_dir = {os.path.dirname(path) for path in set_seen}
+            removed_list = [(path,) for path in dict_stat if path not in set_seen and os.path.dirname(path) in set_dir]
+
+        with self.conn:
+            self.conn.executemany('DELETE FROM image WHERE path = ?', removed_list)
+            sql = f'INSERT OR REPLACE INTO image ({", ".join(COLUMNS)}) VALUES ({", ".join("?" * len(COLUMNS))})'
+            for row_list in self._extract_all(changed_list):
+                self.conn.executemany(sql, row_list)
+        return RefreshReport(len(set_seen), len(changed_list), len(removed_list)), set_seen
+
+    def _extract_all(self, item_list: List[Tuple[str, int, int]]) -> Iterable[List[tuple]]:
+        chunk_list = [item_list[i: i + self.chunk_size] for i in range(0, len(item_list), self.chunk_size)]
+        if self.max_workers == 0 or len(chunk_list) <= 1:  # starting the processes costs more.
+            return map(_extract, chunk_list)
+        return self._extract_by_pool(chunk_list)
+
+    def _extract_by_pool(self, chunk_list: List[List[Tuple[str, int, int]]]) -> Iterable[List[tuple]]:
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            yield from executor.map(_extract, chunk_list)
+
+    def select(self, where: str = None, params: Sequence = (), order_by: str = 'path', limit: int = None) -> List[Path]:
+        """
+        USAGE::
+
+            index.select('date_time_original IS NOT NULL', order_by='date_time_original, path')
+            index.select('make = ?', ('Canon',))
+            index.select('file_size > ?', (20 * 1024 ** 2,), order_by='file_size DESC', limit=100)
+
+        :param where: the condition of SQL, the columns are ``COLUMNS``
+        """
+        sql = 'SELECT path FROM image' + (f' WHERE {where}' if where else '') + f' ORDER BY {order_by}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return [Path(path) for path, in self.conn.execute(sql, tuple(params))]
+
+    def get(self, path: Union[Path, str]) -> Union[Dict[str, Union[str, int, None]], None]:
+        row = self.conn.execute(f'SELECT {", ".join(COLUMNS)} FROM image WHERE path = ?', (os.path.abspath(path),)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM image').fetchone()[0]
@@ -0,0 +1,142 @@
+"""
+Propose the new names by the template, for the whole queue at once::
+
+    template = NameTemplate('{DateTimeOriginal:%Y%m%d_%H%M%S}_{Make}_{seq:04d}')
+    rows = template.propose(img_path_list)  # [RenameRow(old, new), ...], the collisions are resolved already.
+
+The fields:
+
+    - ``seq``: the number in the queue (start from 1), ``idx``: start from 0
+    - ``stem``, ``ext`` (without the dot), ``parent``: the name of the folder
+    - ``size``: bytes, ``mtime``: datetime
+    - ``width``, ``height``
+    - ``DateTimeOriginal``: datetime (the ``mtime`` if the image does not have it)
+    - the other name of the EXIF tag, e.g. ``Make``, ``Model``, ``ExifVersion``. (empty if the image does not have it)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Set, Tuple, Union
+import datetime
+import os
+import string
+from .dirindex import DirIndexRegistry, DIR_INDEX
+from .exif import ImageMetadata, read_metadata
+from .planner import RenameRow
+from .utils import ILLEGAL_CHARS
+
+STAT_FIELDS = frozenset(['seq', 'idx', 'stem', 'ext', 'parent', 'size', 'mtime'])
+
+
+class _Context(dict):
+    __slots__ = ('metadata',)
+
+    def __init__(self, metadata: Union[ImageMetadata, None], **kwargs):
+        super().__init__(**kwargs)
+        self.metadata = metadata
+
+    def __missing__(self, key: str):
+        if self.metadata is None:
+            return ''
+        value, = self.metadata.lookup([key], fill_empty='')
+        return value.decode('utf-8', errors='replace').rstrip('\0') if isinstance(value, bytes) else value
+
+
+class _Formatter(string.Formatter):
+    def format_field(self, value: Any, format_spec: str) -> str:
+        text = super().format_field(value, format_spec)
+        return ''.join('_' if char in ILLEGAL_CHARS else char for char in text).strip()
+
+
+class NameTemplate:
+    __slots__ = ('template', 'sep', 'width', 'max_workers', 'dir_index', '_field_set')
+
+    _formatter = _Formatter()
+
+    def __init__(self, template: str, sep: str = '_', width: int = 3, max_workers: int = None,
+                 dir_index: DirIndexRegistry = DIR_INDEX):
+        """
+        :param sep, width: If the name is used, the number is appended. ``{name}{sep}{number:0{width}d}``
+        :param max_workers: the number of the threads of reading the metadata.
+        """
+        self.template = template
+        self.sep = sep
+        self.width = width
+        self.max_workers = max_workers
+        self.dir_index = dir_index
+        self._field_set: Set[str] = {field_name.split('.')[0].split('[')[0]
+                                     for _, field_name, _, _ in self._formatter.parse(template) if field_name}
+
+    def __repr__(self):
+        return f'<NameTemplate {self.template!r}>'
+
+    @property
+    def need_metadata(self) -> bool:
+        return bool(self._field_set - STAT_FIELDS)
+
+    def format(self, path: Path, idx: int = 0, metadata: ImageMetadata = None) -> str:
+        """
+        :return: the stem of the new name.
+        """
+        stat = os.stat(path)
+        mtime = datetime.datetime.fromtimestamp(stat.st_mtime)
+        context = _Context(metadata, seq=idx + 1, idx=idx,
+                           stem=path.stem, ext=path.suffix[1:], parent=path.parent.name,
+                           size=stat.st_size, mtime=mtime,
+                           DateTimeOriginal=mtime)
+        if metadata is not None:
+            context['width'], context['height'] = metadata.size
+            date_time_original, = metadata.lookup(['DateTimeOriginal'])
+            try:
+                context['DateTimeOriginal'] = datetime.datetime.strptime(str(date_time_original).strip(), '%Y:%m:%d %H:%M:%S')
+            except ValueError:
+                ...
+        return self._formatter.vformat(self.template, (), context)
+
+    def _format_one(self, path: Path, idx: int) -> str:
+        metadata = None
+        if self.need_metadata:
+            try:
+                metadata = read_metadata(path)
+            except (OSError, SyntaxError, ValueError):
+                ...
+        return self.format(path, idx, metadata)
+
+    def propose(self, path_list: Sequence[Path], start_idx: int = 0) -> List[RenameRow]:
+        """
+        The metadata are read by the thread pool, and then the collisions are resolved by one scan of each directory.
+        """
+        path_list = [Path(path) for path in path_list]
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix='name-template') as executor:
+            stem_list = list(executor.map(self._format_one, path_list, range(start_idx, start_idx + len(path_list))))
+        rows = [RenameRow(path, path.parent / Path((stem if stem else path.stem) + path.suffix), line_no)
+                for line_no, (path, stem) in enumerate(zip(path_list, stem_list), start_idx + 1)]
+        return self.resolve_collisions(rows)
+
+    def resolve_collisions(self, rows: List[RenameRow]) -> List[RenameRow]:
+        """
+        The name is free if no one else uses it, the files of the rows will leave their names,
+        so their names are free too. The later row gets ``{name}_001``, ``{name}_002``, ... if the name is taken.
+        The number search continues from the last one of the same name (like ``DirNameIndex.next_free``), so it is O(n).
+        """
+        dict_group: Dict[str, List[int]] = dict()  # the directory: the index of the rows
+        for i, row in enumerate(rows):
+            dict_group.setdefault(os.path.normcase(os.path.abspath(row.new.parent)), []).append(i)
+
+        result = list(rows)
+        for dir_path, idx_list in dict_group.items():
+            set_source = {rows[i].old.name.casefold() for i in idx_list
+                          if os.path.normcase(os.path.abspath(rows[i].old.parent)) == dir_path}
+            set_used = self.dir_index.get(rows[idx_list[0]].new.parent).names - set_source
+            dict_hint: Dict[Tuple[str, str], int] = dict()  # (stem, suffix): the next number, `set_used` only grows.
+            for i in idx_list:
+                old, new, line_no = rows[i]
+                if new.name.casefold() in set_used:
+                    key = new.stem.casefold(), new.suffix.casefold()
+                    number = dict_hint.get(key, 1)
+                    while f'{new.stem}{self.sep}{number:0{self.width}d}{new.suffix}'.casefold() in set_used:
+                        number += 1
+                    dict_hint[key] = number + 1
+                    new = new.parent / Path(f'{new.stem}{self.sep}{number:0{self.width}d}{new.suffix}')
+                set_used.add(new.name.casefold())
+                result[i] = RenameRow(old, new, line_no)
+        return result
@@ -0,0 +1,167 @@
+"""
+Order the renames so that the plan is able to swap the names (a -> b, b -> a) and shift them (a -> b, b -> c).
+
+The plan is regarded as a mapping of the current names, all the rows happen at once::
+
+    a -> b, b -> c, c -> a
+
+    a -> a.tmp    # break the cycle
+    c -> a
+    b -> c
+    a.tmp -> b
+"""
+from pathlib import Path
+from typing import List, Dict, NamedTuple, Iterable, Callable, Union
+import errno
+import os
+import sys
+import uuid
+
+
+class RenameRow(NamedTuple):
+    old: Path
+    new: Path
+    line_no: int = 0
+
+
+class RenameOp(NamedTuple):
+    src: Path
+    dst: Path
+    row: RenameRow  # The row of the plan that this operation belongs to.
+
+
+def path_key(path: Path) -> str:
+    return os.path.normcase(os.path.abspath(path)).casefold()
+
+
+def rename_no_replace(src: Path, dst: Path):
+    """
+    ``os.rename`` which raises FileExistsError instead of replacing the other file. (``os.rename`` replaces it silently on POSIX)
+    The case-only change of the same file is acceptable.
+    """
+    if sys.platform == 'win32':  # os.rename does not replace on Windows.
+        os.rename(src, dst)
+        return
+    if os.path.lexists(dst):
+        if not os.path.samefile(src, dst):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+        os.rename(src, dst)  # case-only change on the case-insensitive file system
+        return
+    try:
+        os.link(src, dst)  # atomic, it fails if `dst` exists.
+    except FileExistsError:
+        raise
+    except OSError:  # the directory, or the file system does not support the hard link.
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
+
+def find_scc(dict_next: Dict[str, str]) -> List[List[str]]:
+    """
+    Tarjan's algorithm (iterative) of the strongly connected components.
+
+    :param dict_next: node: the next node. Each node has at most one edge, since the source is not duplicated in the plan.
+    :return: the components, only the components with the cycle are returned.
+    """
+    index_counter = 0
+    dict_index: Dict[str, int] = dict()
+    dict_low: Dict[str, int] = dict()
+    stack: List[str] = []
+    on_stack = set()
+    scc_list = []
+    for start in dict_next:
+        if start in dict_index:
+            continue
+        call_stack = [(start, False)]
+        while call_stack:
+            node, is_returned = call_stack.pop()
+            if not is_returned:
+                dict_index[node] = dict_low[node] = index_counter
+                index_counter += 1
+                stack.append(node)
+                on_stack.add(node)
+                call_stack.append((node, True))
+                next_node = dict_next.get(node)
+                if next_node is not None and next_node in dict_next and next_node not in dict_index:
+                    call_stack.append((next_node, False))
+                continue
+            next_node = dict_next.get(node)
+            if next_node is not None and next_node in on_stack:
+                dict_low[node] = min(dict_low[node], dict_low[next_node])
+            if dict_low[node] == dict_index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or dict_next.get(node) == node:
+                    scc_list.append(component[::-1])
+    return scc_list
+
+
+class RenamePlanner:
+    """
+    USAGE::
+
+        for sequence in RenamePlanner(rows).plan():
+            for op in sequence:  # The operations in the sequence must run in order.
+                rename_no_replace(op.src, op.dst)
+
+    The sequences do not depend on each other, so they are able to run concurrently.
+    """
+    __slots__ = ('rows', 'temp_name')
+
+    def __init__(self, rows: Iterable[RenameRow], temp_name: Callable[[Path], Path] = None):
+        """
+        :param rows: The source and the target must be unique in the rows. (see ``PlanValidator``)
+        :param temp_name: The temporary name which is used to break the cycle.
+        """
+        self.rows = list(rows)
+        self.temp_name = temp_name if temp_name else lambda path: path.parent / Path(f'.{path.name}.{uuid.uuid4().hex[:8]}.tmp')
+
+    def plan(self) -> List[List[RenameOp]]:
+        dict_row: Dict[str, RenameRow] = dict()  # key of the source: row
+        dict_next: Dict[str, str] = dict()  # key of the source: key of the target
+        for row in self.rows:
+            src_key, dst_key = path_key(row.old), path_key(row.new)
+            if src_key == dst_key and row.old.name == row.new.name:
+                continue  # nothing to do
+            dict_row[src_key] = row
+            dict_next[src_key] = dst_key
+        set_target = set(dict_next.values())
+
+        sequence_list: List[List[RenameOp]] = []
+        visited = set()
+
+        # The chains: start from the source which is not the target of the others. x0 -> x1 -> ... -> xn
+        for head in dict_next:
+            if head in set_target:
+                continue
+            chain: List[str] = []
+            node: Union[str, None] = head
+            while node in dict_next and node not in visited:
+                visited.add(node)
+                chain.append(node)
+                node = dict_next[node]
+            sequence_list.append([self._op(dict_row[key]) for key in reversed(chain)])  # free the end of the chain first.
+
+        # The rest of the nodes are on the cycles.
+        for cycle in find_scc({key: dst for key, dst in dict_next.items() if key not in visited}):
+            visited.update(cycle)
+            if len(cycle) == 1:  # case-only change of the same file, or a -> a.
+                sequence_list.append([self._op(dict_row[cycle[0]])])
+                continue
+            first_row = dict_row[cycle[0]]
+            temp_path = self.temp_name(first_row.old)
+            sequence = [RenameOp(first_row.old, temp_path, first_row)]
+            sequence.extend([self._op(dict_row[key]) for key in reversed(cycle[1:])])
+            sequence.append(RenameOp(temp_path, first_row.new, first_row))
+            sequence_list.append(sequence)
+        return sequence_list
+
+    @staticmethod
+    def _op(row: RenameRow) -> RenameOp:
+        return RenameOp(row.old, row.new, row)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, List
+import asyncio
+import numpy as np
+
+
+class Prefetcher:
+    """
+    Decode the upcoming images on the thread pool (cv2 releases the GIL) while the user is typing.
+
+    The finished frames are handed to the display loop through a bounded queue (at most `depth` images are waiting),
+    the oldest one will be dropped if the user jumped over it.
+
+    USAGE::
+
+        prefetcher = Prefetcher(loader=lambda path: imread(path, cache=IMAGE_CACHE), depth=2)
+        prefetcher.schedule(img_path_list[idx + 1: idx + 3])
+        np_img = await prefetcher.get(img_path_list[idx])
+    """
+    __slots__ = ('loader', 'depth', 'executor', '_queue')
+
+    def __init__(self, loader: Callable[[Path], np.ndarray], depth: int = 2, max_workers: int = None):
+        self.loader = loader
+        self.depth = depth
+        self.executor = ThreadPoolExecutor(max_workers=max_workers if max_workers else max(depth, 1),
+                                           thread_name_prefix='prefetch')
+        self._queue: OrderedDict = OrderedDict()  # path: Future
+
+    def __contains__(self, path: Path):
+        return path in self._queue
+
+    def schedule(self, path_list: Iterable[Path]):
+        for path in path_list:
+            if path in self._queue:
+                continue
+            self._queue[path] = self.executor.submit(self.loader, path)
+            while len(self._queue) > self.depth:
+                _, future = self._queue.popitem(last=False)
+                future.cancel()
+
+    async def get(self, path: Path) -> np.ndarray:
+        future: Future = self._queue.pop(path, None)
+        if future is None or future.cancelled():
+            future = self.executor.submit(self.loader, path)
+        return await asyncio.wrap_future(future)
+
+    async def get_all(self, path_list: Iterable[Path]) -> List[np.ndarray]:
+        return list(await asyncio.gather(*[self.get(path) for path in path_list]))
+
+    def shutdown(self):
+        for future in self._queue.values():
+            future.cancel()
+        self._queue.clear()
+        self.executor.shutdown(wait=False)
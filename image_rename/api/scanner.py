@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Union, List, Tuple, Iterator, Iterable
+import asyncio
+import os
+import threading
+
+
+class ImageScanner:
+    """
+    Find the images by `os.scandir` on the background thread, and you can use the paths while it is still scanning.
+
+    It is able to replace the list of the paths in the setting file::
+
+        img_path_list = ImageScanner(Path('./test/image'), extensions=('png', 'bmp', 'jpg'), max_depth=None)
+
+    - iterate or index it: it waits until the path is found.
+    - ``n_found``, ``is_done``: the progress.
+    - ``len()``: it waits until the scanning is finished.
+    """
+    __slots__ = ('roots', 'extensions', 'max_depth',
+                 'is_done', '_found', '_cond', '_thread')
+
+    BATCH_SIZE = 256  # notify the waiting threads once per batch.
+
+    def __init__(self, roots: Union[Path, str, Iterable[Union[Path, str]]],
+                 extensions: Tuple[str, ...] = ('png', 'bmp', 'jpg'),
+                 max_depth: Union[int, None] = 0, start=True):
+        """
+        :param roots: directory or the list of the directory.
+        :param extensions: case insensitive, without the dot.
+        :param max_depth: 0: only the files of the roots. None: no limit.
+        :param start: start scanning right now.
+        """
+        if isinstance(roots, (str, Path)):
+            roots = [roots]
+        self.roots: List[Path] = [Path(root).absolute() for root in roots]  # The working directory may change later.
+        self.extensions = frozenset('.' + ext.lower().lstrip('.') for ext in extensions)
+        self.max_depth = max_depth
+        self.is_done = False
+        self._found: List[Path] = []
+        self._cond = threading.Condition()
+        self._thread: Union[threading.Thread, None] = None
+        if start:
+            self.start()
+
+    def __repr__(self):
+        return f'<ImageScanner roots={[str(root) for root in self.roots]} n_found={self.n_found}{"" if self.is_done else "+"}>'
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._scan, name='image-scanner', daemon=True)
+            self._thread.start()
+
+    def _scan(self):
+        batch: List[Path] = []
+        try:
+            for root in self.roots:
+                stack = [(root, 0)]
+                while stack:
+                    dir_path, depth = stack.pop()
+                    try:
+                        it = os.scandir(dir_path)
+                    except OSError:  # PermissionError, ...
+                        continue
+                    with it:
+                        sub_dir_list = []
+                        for entry in it:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.max_depth is None or depth < self.max_depth:
+                                    sub_dir_list.append((entry.path, depth + 1))
+                                continue
+                            if os.path.splitext(entry.name)[1].lower() in self.extensions:
+                                batch.append(Path(entry.path))
+                                if len(batch) >= self.BATCH_SIZE or not self._found:
+                                    self._publish(batch)
+                    self._publish(batch)
+                    stack.extend(reversed(sub_dir_list))  # keep the order of scandir
+        finally:
+            with self._cond:
+                self._found.extend(batch)
+                self.is_done = True
+                self._cond.notify_all()
+
+    def _publish(self, batch: List[Path]):
+        if not batch:
+            return
+        with self._cond:
+            self._found.extend(batch)
+            self._cond.notify_all()
+        batch.clear()
+
+    @property
+    def n_found(self) -> int:
+        return len(self._found)
+
+    def wait_count(self, n: Union[int, None], timeout: float = None) -> int:
+        """
+        Block until `n` paths are found or the scanning is finished. (None: wait until finished)
+
+        :return: the number of the paths found.
+        """
+        self.start()
+        with self._cond:
+            self._cond.wait_for(lambda: self.is_done or (n is not None and len(self._found) >= n), timeout)
+            return len(self._found)
+
+    async def await_count(self, n: Union[int, None], interval: float = 0.01) -> int:
+        """
+        The same as `wait_count`, but it does not block the event loop.
+        """
+        self.start()
+        while not self.is_done and (n is None or len(self._found) < n):
+            await asyncio.sleep(interval)
+        return len(self._found)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[Path, List[Path]]:
+        if isinstance(item, slice):
+            is_need_all = item.stop is None or item.stop < 0 or (item.start or 0) < 0
+            self.wait_count(None if is_need_all else item.stop)
+            return self._found[item]
+        self.wait_count(item + 1 if item >= 0 else None)
+        return self._found[item]
+
+    def __iter__(self) -> Iterator[Path]:
+        idx = 0
+        while self.wait_count(idx + 1) > idx:
+            yield self._found[idx]
+            idx += 1
+
+    def __len__(self):
+        self.wait_count(None)
+        return len(self._found)
@@ -0,0 +1,118 @@
+"""
+Remember which images are processed, so that the next run starts from the first unprocessed one.
+
+The session is a journal (see ``journal.RenameJournal``) in the ``session_dir``, each record is one of::
+
+    cursor<TAB>idx<TAB>path        # the image which is showing
+    skip<TAB>idx<TAB>path
+    pending<TAB>old<TAB>new        # written (and flushed) before the rename
+    done<TAB>idx<TAB>old<TAB>new   # after the rename
+
+The session file is keyed by the fingerprint of the input: the roots of the ``ImageScanner``,
+or the directories of the list. (the names of the files are changed by the renames themselves)
+"""
+from pathlib import Path
+from typing import Set, Tuple, Union, Sequence
+import hashlib
+import os
+from .journal import RenameJournal, open_journal, read_journal
+from .planner import path_key
+
+
+def fingerprint(img_path_list: Sequence[Path]) -> str:
+    roots = getattr(img_path_list, 'roots', None)
+    if roots is not None:  # ImageScanner
+        items = ['scanner', *sorted(str(root) for root in roots),
+                 *sorted(img_path_list.extensions), str(img_path_list.max_depth)]
+    else:
+        items = ['list', *sorted({os.path.abspath(os.path.dirname(path)) for path in img_path_list})]
+    return hashlib.sha1('\n'.join(items).encode('utf-8')).hexdigest()[:16]
+
+
+class RenameSession:
+    """
+    USAGE::
+
+        session = RenameSession.open(Path('.session'), img_path_list)
+        idx = session.resume_index(img_path_list)
+        ...
+        session.begin_rename(old_path, new_path)
+        old_path.rename(new_path)
+        session.done(idx, old_path, new_path)
+
+    ``is_done`` is a lookup of the set, so the processed images are neither stat-ed nor decoded.
+    """
+    __slots__ = ('path', 'journal', 'cursor', 'cursor_path',
+                 'n_done', '_set_done')
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.cursor = 0
+        self.cursor_path: Union[str, None] = None
+        self.n_done = 0
+        self._set_done: Set[str] = set()
+        self._load()
+        self.journal: RenameJournal = open_journal(self.path)
+
+    @classmethod
+    def open(cls, session_dir: Union[Path, str], img_path_list: Sequence[Path]) -> 'RenameSession':
+        session_dir = Path(session_dir)
+        session_dir.mkdir(parents=True, exist_ok=True)
+        return cls(session_dir / Path(f'{fingerprint(img_path_list)}.session'))
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        pending: Union[Tuple[str, str], None] = None
+        for record, _ in read_journal(self.path):
+            op, *args = record.fields
+            if op == 'cursor':
+                self.cursor, self.cursor_path = int(args[0]), args[1]
+            elif op == 'skip':
+                self._mark(args[1])
+            elif op == 'pending':
+                pending = args[0], args[1]
+            elif op == 'done':
+                self._mark(args[1], args[2])
+                pending = None
+        if pending is not None:  # The app was closed between the rename and the `done` record.
+            old, new = pending
+            if not os.path.exists(old) and os.path.exists(new):
+                self._mark(old, new)
+
+    def _mark(self, *paths: str):
+        self.n_done += 1
+        self._set_done.update(path_key(path) for path in paths)
+
+    def is_done(self, path: Path) -> bool:
+        return path_key(path) in self._set_done
+
+    def resume_index(self, img_path_list: Sequence[Path]) -> int:
+        """
+        :return: the index of the image which was showing last time if the list is not changed, otherwise 0.
+                 (the processed images after it are skipped by ``is_done``)
+        """
+        if self.cursor_path is None:
+            return 0
+        try:
+            if str(img_path_list[self.cursor]) == self.cursor_path:
+                return self.cursor
+        except IndexError:
+            ...
+        return 0
+
+    def set_cursor(self, idx: int, path: Path):
+        self.cursor, self.cursor_path = idx, str(path)
+        self.journal.append('cursor', str(idx), str(path))
+
+    def skip(self, idx: int, path: Path):
+        self._mark(str(path))
+        self.journal.append('skip', str(idx), str(path))
+
+    def begin_rename(self, old_path: Path, new_path: Path):
+        self.journal.append('pending', str(old_path), str(new_path))
+        self.journal.flush()
+
+    def done(self, idx: int, old_path: Path, new_path: Path):
+        self._mark(str(old_path), str(new_path))
+        self.journal.append('done', str(idx), str(old_path), str(new_path))
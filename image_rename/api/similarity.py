@@ -0,0 +1,164 @@
+"""
+Order the queue by the visual similarity, so the similar images come one after another (and F4 ``insert_previous`` is useful)::
+
+    img_path_list = order_by_similarity(ImageScanner(Path('./data'), max_depth=None))
+
+1. signature: the 8x8 image (Lab) of the reduced decode, read by the process pool.
+2. k-means (about sqrt(n) clusters), the distances are computed by the matrix multiplication in batch.
+3. The clusters are visited by the nearest neighbour of the centroids, and the images of each cluster are too.
+
+The images which can't be decoded are put at the end, in the original order.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Union
+import numpy as np
+import cv2
+from .imagehelper import get_preview_flag
+
+SIGNATURE_SIZE = 8  # 8x8x3 = 192 dims
+MAX_CLUSTER_SIZE = 2048  # The larger cluster is clustered again, the greedy path is O(n^2).
+
+
+def signature(path: Union[Path, str]) -> Union[np.ndarray, None]:
+    """
+    :return: (192,) float32, centered and normalized, so that the brightness and the contrast matter less.
+    """
+    flag = get_preview_flag(path, (SIGNATURE_SIZE * 4, SIGNATURE_SIZE * 4), cv2.IMREAD_COLOR)
+    img = cv2.imdecode(np.fromfile(str(path), dtype=np.uint8), flag)
+    if img is None:
+        return None
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    elif img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    if img.dtype != np.uint8:
+        img = cv2.convertScaleAbs(img, alpha=255 / max(int(img.max()), 1))
+    small = cv2.resize(img, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA)
+    vector = cv2.cvtColor(small, cv2.COLOR_BGR2LAB).astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _signature_chunk(path_list: List[str]) -> np.ndarray:
+    """
+    It runs on the process of the pool.
+
+    :return: (n, 192), the row is NaN if the image can't be decoded.
+    """
+    result = np.full((len(path_list), SIGNATURE_SIZE * SIGNATURE_SIZE * 3), np.nan, dtype=np.float32)
+    for i, path in enumerate(path_list):
+        try:
+            vector = signature(path)
+        except Exception:  # OSError, PIL.Image.DecompressionBombError, cv2.error, ...
+            continue
+        if vector is not None:
+            result[i] = vector
+    return result
+
+
+def compute_signatures(path_list: List[Path], max_workers: int = None, chunk_size: int = 256) -> np.ndarray:
+    """
+    :param max_workers: the number of the processes. 0: compute on this process.
+    """
+    chunk_list = [[str(path) for path in path_list[i: i + chunk_size]] for i in range(0, len(path_list), chunk_size)]
+    if not chunk_list:
+        return np.empty((0, SIGNATURE_SIZE * SIGNATURE_SIZE * 3), dtype=np.float32)
+    if max_workers == 0 or len(chunk_list) <= 1:
+        return np.concatenate([_signature_chunk(chunk) for chunk in chunk_list])
+    with ProcessPoolExecutor(max_workers) as executor:
+        return np.concatenate(list(executor.map(_signature_chunk, chunk_list)))
+
+
+def squared_distance(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    :return: (len(x), len(y)), ``|x|^2 - 2 x.y + |y|^2``
+    """
+    return np.maximum((x * x).sum(1)[:, None] - 2 * x @ y.T + (y * y).sum(1)[None, :], 0)
+
+
+def _assign(x: np.ndarray, centroid: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+    centroid_norm = (centroid * centroid).sum(1)
+    return np.concatenate([(centroid_norm - 2 * x[i: i + batch_size] @ centroid.T).argmin(1)  # |x|^2 does not matter
+                           for i in range(0, len(x), batch_size)])
+
+
+def kmeans(x: np.ndarray, k: int, n_iter: int = 20, seed: int = 0, n_sample_per_cluster: int = 64) -> np.ndarray:
+    """
+    The centroids are fitted on the random sample (``n_sample_per_cluster * k`` rows), and then all rows are assigned.
+
+    :return: the label of each row.
+    """
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), min(len(x), n_sample_per_cluster * k), replace=False)]
+    sample_t = np.ascontiguousarray(sample.T)
+    centroid = sample[rng.choice(len(sample), k, replace=False)].copy()
+    label = np.zeros(len(sample), dtype=np.int64)
+    for i_iter in range(n_iter):
+        new_label = _assign(sample, centroid)
+        if i_iter and np.array_equal(new_label, label):
+            break
+        label = new_label
+        count = np.bincount(label, minlength=k)
+        total = np.stack([np.bincount(label, weights=column, minlength=k) for column in sample_t], 1)  # np.add.at is slow
+        is_empty = count == 0  # reseed by the random points
+        centroid[~is_empty] = total[~is_empty] / count[~is_empty, None]
+        centroid[is_empty] = sample[rng.choice(len(sample), int(is_empty.sum()), replace=False)]
+    return _assign(x, centroid)
+
+
+def greedy_path(x: np.ndarray, start: int = 0) -> List[int]:
+    """
+    Go to the nearest unvisited row each step. O(n^2), use it on the small set (a cluster).
+    """
+    norm = (x * x).sum(1)
+    visited = np.zeros(len(x), dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(len(x) - 1):
+        last = x[order[-1]]
+        row = np.where(visited, np.inf, norm - 2 * (x @ last))  # |last|^2 is the same for all
+        order.append(int(row.argmin()))
+        visited[order[-1]] = True
+    return order
+
+
+def similarity_order(x: np.ndarray, n_cluster: int = None, seed: int = 0) -> List[int]:
+    """
+    :param x: (n, d) the signatures
+    :param n_cluster: default: sqrt(n), so each cluster (and the centroids) is about sqrt(n).
+    :return: the permutation of the rows.
+    """
+    n = len(x)
+    if n <= 2:
+        return list(range(n))
+    n_cluster = min(n, n_cluster if n_cluster else int(np.sqrt(n)))
+    label = kmeans(x, n_cluster, seed=seed)
+    member_list = [np.flatnonzero(label == c) for c in range(n_cluster)]
+    member_list = [member for member in member_list if len(member)]
+    centroid = np.stack([x[member].mean(0) for member in member_list])
+
+    order: List[int] = []
+    for c in greedy_path(centroid):
+        member = member_list[c]
+        if len(member) > MAX_CLUSTER_SIZE and len(member) < n:
+            order.extend(int(member[i]) for i in similarity_order(x[member], seed=seed))
+            continue
+        start = 0 if not order else int(squared_distance(x[order[-1]][None, :], x[member]).argmin())
+        order.extend(int(member[i]) for i in greedy_path(x[member], start))
+    return order
+
+
+def order_by_similarity(path_list: Iterable[Path], max_workers: int = None,
+                        n_cluster: int = None, seed: int = 0) -> List[Path]:
+    """
+    :param path_list: the list of the paths, or ImageScanner (it waits until the scanning is finished).
+    """
+    path_list = list(path_list)
+    x = compute_signatures(path_list, max_workers)
+    is_valid = ~np.isnan(x).any(1)
+    valid_idx = np.flatnonzero(is_valid)
+    order = [int(valid_idx[i]) for i in similarity_order(x[valid_idx], n_cluster, seed)]
+    order += [int(i) for i in np.flatnonzero(~is_valid)]
+    return [path_list[i] for i in order]
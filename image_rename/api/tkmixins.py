@@ -1,7 +1,9 @@
 from tkinter import ttk
 import tkinter as tk
-from typing import Tuple, NamedTuple, Union
+from typing import Tuple, NamedTuple, Union, Dict, Iterable
 from tkinter.font import Font
+import functools
+import weakref
 import cv2
 import numpy as np
 from pathlib import Path
@@ -21,7 +23,49 @@ class TkMixin:
             return None
 
 
+@functools.lru_cache(maxsize=1)
+def _default_font() -> Font:
+    return Font()
+
+
+@functools.lru_cache(maxsize=16384)
+def text_width(text: str) -> int:
+    """
+    The width (pixel) of the text with the default font, it is memoized. (``Font().measure`` is a round trip of Tcl)
+    """
+    try:
+        return _default_font().measure(text)
+    except (tk.TclError, RuntimeError):  # The root of the cached font is destroyed.
+        _default_font.cache_clear()
+        return _default_font().measure(text)
+
+
+class TreeRows:
+    """
+    The Python side of the Treeview: the values of the rows, and the width of the columns.
+    """
+    __slots__ = ('dict_values', 'dict_width', '__weakref__')
+
+    def __init__(self):
+        self.dict_values: Dict[str, Tuple] = dict()  # item id: values
+        self.dict_width: Dict[str, int] = dict()  # column: width
+
+
+_TREE_ROWS: 'weakref.WeakKeyDictionary[ttk.Treeview, TreeRows]' = weakref.WeakKeyDictionary()
+
+
+def get_tree_rows(tree: ttk.Treeview) -> TreeRows:
+    rows = _TREE_ROWS.get(tree)
+    if rows is None:
+        rows = _TREE_ROWS[tree] = TreeRows()
+    return rows
+
+
 class TreeMixin:
+    """
+    Use ``insert_row``, ``update_row``, ``clear_rows`` instead of ``tree.insert``, ..., so the values are kept on the Python side,
+    and then ``sort_by`` does not need to read them from the Treeview.
+    """
     __slots__ = ()
 
     header: NamedTuple
@@ -40,21 +84,65 @@ class TreeMixin:
     def adjust_column(self, row_data: Tuple, tree: ttk.Treeview = None):
         """
         Decide the width of each column by the maximum string.
+        The maximum is kept on the Python side, so the Treeview is only configured when the column becomes wider.
         """
         if tree is None:
             tree = self.tree
+        dict_width = get_tree_rows(tree).dict_width
         for idx, col_string in enumerate(row_data):
-            col_width = Font().measure(col_string)
-            if col_width > tree.column(self.header[idx], width=None):
-                tree.column(self.header[idx], width=col_width)
+            col_name = self.header[idx]
+            col_width = text_width(str(col_string))
+            if col_name not in dict_width:
+                dict_width[col_name] = tree.column(col_name, width=None)
+            if col_width > dict_width[col_name]:
+                dict_width[col_name] = col_width
+                tree.column(col_name, width=col_width)
+
+    def insert_row(self, row_data: Tuple, tree: ttk.Treeview = None, index: Union[int, str] = 'end', **options) -> str:
+        """
+        :return: the item id
+        """
+        if tree is None:
+            tree = self.tree
+        item_id = tree.insert('', index, values=row_data, **options)
+        get_tree_rows(tree).dict_values[item_id] = tuple(row_data)
+        self.adjust_column(row_data, tree)
+        return item_id
+
+    def update_row(self, item_id: str, row_data: Tuple, tree: ttk.Treeview = None):
+        if tree is None:
+            tree = self.tree
+        tree.item(item_id, values=row_data)
+        get_tree_rows(tree).dict_values[item_id] = tuple(row_data)
+        self.adjust_column(row_data, tree)
+
+    def clear_rows(self, tree: ttk.Treeview = None, item_ids: Iterable[str] = None):
+        """
+        :param item_ids: default: all rows.
+        """
+        if tree is None:
+            tree = self.tree
+        dict_values = get_tree_rows(tree).dict_values
+        item_ids = list(item_ids) if item_ids is not None else tree.get_children('')
+        tree.delete(*item_ids)
+        [dict_values.pop(item_id, None) for item_id in item_ids]
 
     def sort_by(self, col_name: str, is_descending: bool, tree: ttk.Treeview = None):
+        """
+        Sort the values on the Python side, and then reorder all rows by one call. (``set_children``)
+        """
         if tree is None:
             tree = self.tree
-        data_list = [(tree.set(child_id, col_name), child_id) for child_id in tree.get_children('')]
+        col_idx = list(self.header).index(col_name)
+        dict_values = get_tree_rows(tree).dict_values
+        data_list = []
+        for child_id in tree.get_children(''):
+            values = dict_values.get(child_id)
+            if values is None:  # It was inserted by ``tree.insert``.
+                values = dict_values[child_id] = tuple(tree.item(child_id, option='values'))
+            data_list.append((str(values[col_idx]) if col_idx < len(values) else '', child_id))
         data_list.sort(reverse=is_descending)
-        for new_idx, (item_name, item_id) in enumerate(data_list):
-            tree.move(item_id, '', new_idx)
+        tree.set_children('', *[item_id for _, item_id in data_list])
 
         # switch the heading so it will sort in the opposite direction
         tree.heading(col_name, command=lambda col=col_name: self.sort_by(col, (not is_descending), tree))
@@ -2,6 +2,9 @@ from contextlib import contextmanager
 from pathlib import Path
 import os
 from typing import Callable, NamedTuple, Type
+import time
+
+ILLEGAL_CHARS = ('\\', '/', '?', '*', '<', '>', '|')  # These characters is not acceptable for the filename.
 
 
 @contextmanager
@@ -55,3 +58,38 @@ def init_namedtuple(init_func_name):
             return instance_obj
         return new_instance
     return wrap
+
+
+class CPUMeter:
+    """
+    Measure how much CPU time the process takes while it is idle.
+
+    USAGE::
+
+        meter = CPUMeter()
+        while ...:
+            meter.tick(is_idle)  # the state of the period from the last tick to now.
+        print(meter.report())
+    """
+    __slots__ = ('begin_wall', 'last_wall', 'last_cpu',
+                 'idle_wall', 'idle_cpu')
+
+    def __init__(self):
+        self.begin_wall = self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+        self.idle_wall = self.idle_cpu = 0.0
+
+    def tick(self, is_idle: bool):
+        cur_wall, cur_cpu = time.perf_counter(), time.process_time()
+        if is_idle:
+            self.idle_wall += cur_wall - self.last_wall
+            self.idle_cpu += cur_cpu - self.last_cpu
+        self.last_wall, self.last_cpu = cur_wall, cur_cpu
+
+    @property
+    def idle_cpu_percent(self) -> float:
+        return self.idle_cpu / self.idle_wall * 100 if self.idle_wall else 0.0
+
+    def report(self) -> str:
+        return f'idle CPU: {self.idle_cpu_percent:.2f}% ' \
+               f'(idle {self.idle_wall:.1f}s of {self.last_wall - self.begin_wall:.1f}s, cpu {self.idle_cpu:.2f}s)'
@@ -1,13 +1,14 @@
-import asyncio
 import importlib
 import importlib.machinery
 from pathlib import Path
 
-from .core import ImageRenameApp
 from .api.utils import work_dir
+from .api.batch import BatchRenamer, read_plan
+from .api.journalindex import JournalIndex
 from image_rename import __version__
 
 from typing import Any
+import sys
 import types
 
 
@@ -24,6 +25,9 @@ def main(input_setting_path=None):
         if not isinstance(args.setting, Path):
             raise RuntimeError
 
+    import asyncio
+    from .core import ImageRenameApp  # tkinter, cv2, numpy, ... `--version` does not need them.
+
     with work_dir(args.setting.parent):
         loader = importlib.machinery.SourceFileLoader('setting', args.setting.name)
         config = setting_module = types.ModuleType(loader.name)  # type: Any
@@ -37,5 +41,98 @@ def main(input_setting_path=None):
         app.run()
 
 
+def batch_main(argv=None):
+    """
+    Rename the files by the plan file without the UI. (the format is the same as the output of the hotkey `change_log`)
+
+    Or rename all the images of the directory by the template::
+
+        img_rename_batch X:/data --template "{DateTimeOriginal:%Y%m%d_%H%M%S}_{Make}_{seq:04d}" --dry-run > plan.tsv
+    """
+    import argparse
+    arg_parser = argparse.ArgumentParser(prog='img_rename_batch.exe', formatter_class=argparse.RawTextHelpFormatter)
+    arg_parser.add_argument('--version', action='version', version='%(prog)s:' + f'{__version__}')
+    arg_parser.add_argument('plan', type=Path, help="path of the plan file. each line: old_path<TAB>new_path\n"
+                                                    "or the directory of the images if the --template is used")
+    arg_parser.add_argument('--template', help="propose the names by the template. (see NameTemplate)")
+    arg_parser.add_argument('--extensions', nargs='+', default=['png', 'bmp', 'jpg'], help="used with --template")
+    arg_parser.add_argument('--max-depth', type=int, default=0, help="used with --template. -1: no limit")
+    arg_parser.add_argument('--dry-run', action='store_true', help="validate only")
+    arg_parser.add_argument('--workers', type=int, default=None, help="number of threads")
+    arg_parser.add_argument('--sep', default='\t', help="column separator of the plan")
+    arg_parser.add_argument('--encoding', default='utf-8')
+    arg_parser.add_argument('--progress-interval', type=float, default=1.0, help="seconds")
+    arg_parser.add_argument('--chunk-size', type=int, default=None,
+                            help="read the plan by chunks. (the swaps and the chains can't cross the chunks)")
+    arg_parser.add_argument('--journal', type=Path, default=None,
+                            help="append the renames to the journal. (the same as the hotkey `change_log`, see img_rename_journal)")
+    arg_parser.add_argument('--no-hash', action='store_true', help="do not write the content hash to the journal")
+    args = arg_parser.parse_args(argv)
+
+    renamer = BatchRenamer(max_workers=args.workers, dry_run=args.dry_run, chunk_size=args.chunk_size,
+                           progress_interval=args.progress_interval, journal_path=args.journal, is_hash=not args.no_hash)
+    if args.template:
+        from .api.nametemplate import NameTemplate  # Pillow
+        from .api.scanner import ImageScanner  # asyncio
+        scanner = ImageScanner(args.plan, extensions=tuple(args.extensions), max_depth=None if args.max_depth < 0 else args.max_depth)
+        rows = NameTemplate(args.template).propose(scanner)
+        if args.dry_run:  # The proposal is able to be the plan file.
+            [print(f'{row.old.absolute()}\t{row.new.absolute()}') for row in rows]
+    else:
+        rows = read_plan(args.plan, sep=args.sep, encoding=args.encoding)
+    report = renamer.run(rows)
+    for error in report.errors:  # stderr, so `--dry-run > plan.tsv` is still a plan.
+        print(error, file=sys.stderr)
+    return 1 if report.n_failed else 0
+
+
+def journal_main(argv=None):
+    """
+    Query the rename journals (the output of the hotkey `change_log`) by the index.
+    """
+    import argparse
+    import datetime
+    arg_parser = argparse.ArgumentParser(prog='img_rename_journal.exe', formatter_class=argparse.RawTextHelpFormatter)
+    arg_parser.add_argument('--version', action='version', version='%(prog)s:' + f'{__version__}')
+    arg_parser.add_argument('db', type=Path, help="path of the index file. (SQLite)")
+    arg_parser.add_argument('--ingest', type=Path, nargs='+', default=[], help="add the new records of the journals to the index")
+    group = arg_parser.add_mutually_exclusive_group()
+    group.add_argument('--old', type=Path, help="the renames from this path")
+    group.add_argument('--new', type=Path, help="the renames to this path")
+    group.add_argument('--hash', help="the renames of the file with this content hash")
+    group.add_argument('--origin', type=Path, help="follow the chain back: a -> b -> c, `--origin c` shows both")
+    group.add_argument('--chain', type=Path, help="follow the chain forward: a -> b -> c, `--chain a` shows both")
+    group.add_argument('--since', type=datetime.datetime.fromisoformat, help="ISO format. e.g. 2021-01-31T08:00")
+    arg_parser.add_argument('--until', type=datetime.datetime.fromisoformat,
+                            help="ISO format, the renames before it. (with --since, or alone)")
+    args = arg_parser.parse_args(argv)
+    if args.until and any([args.old, args.new, args.hash, args.origin, args.chain]):
+        arg_parser.error('argument --until: only allowed with --since or alone')
+
+    with JournalIndex(args.db) as index:
+        for journal_path in args.ingest:
+            print(f'{journal_path}: {index.ingest(journal_path)} new records')
+
+        if args.old:
+            entries = index.by_old(args.old)
+        elif args.new:
+            entries = index.by_new(args.new)
+        elif args.hash:
+            entries = index.by_hash(args.hash)
+        elif args.origin:
+            entries = index.history(args.origin)
+        elif args.chain:
+            entries = index.future(args.chain)
+        elif args.since or args.until:
+            entries = index.between(args.since.timestamp() if args.since else None,
+                                    args.until.timestamp() if args.until else None)
+        else:
+            return 0
+
+    for entry in entries:
+        print('\t'.join([entry.old, entry.new, entry.hash, datetime.datetime.fromtimestamp(entry.timestamp).isoformat(timespec='seconds')]))
+    return 0 if entries else 1
+
+
 if __name__ == '__main__':
     main()
@@ -1,8 +1,8 @@
 from typing import Tuple
 from pathlib import Path
 from image_rename import (
-    Engine,
-    PLUGIN_MS_PAINT, PLUGIN_IFD_TAG, PLUGIN_IFD_TAG_V2,
+    Engine, ImageScanner, MetadataIndex, order_by_similarity,
+    PLUGIN_MS_PAINT, PLUGIN_IFD_TAG, PLUGIN_IFD_TAG_V2, PLUGIN_DUPLICATES,
 )
 
 dict_hotkey = dict(
@@ -23,21 +23,37 @@ else:
         PLUGIN_MS_PAINT,
         # PLUGIN_IFD_TAG,
         PLUGIN_IFD_TAG_V2,
+        # PLUGIN_DUPLICATES,
         ])
 
 window_size = None  # (300, 400)
+preview_decode = True  # Decode the image with the reduced resolution which is fit to the window_size. (work only when the window_size is not None)
 clear_window = True if window_size is None else False  # If True, it will fill the canvas with the white color every time, avoid the last remaining.
 display_n_img = 3  # Display how many images in once.
 if display_n_img > 1:
     highlight_color = (0, 0, 255)  # BGR  # fill the border with the red on the current image.
     border_thickness = 10
+image_cache_size = 512  # MB. The decoded images are kept in the memory, so that it does not need to decode again when the image is shown again.
+prefetch_depth = 2  # Decode how many images in advance on the background threads. 0: disable
+auto_resolve_conflict = False  # If the name already exists, then rename it to name_001, name_002, ... instead of showing the error.
 default_name_flag = True  # If the flag is True, then it will show the name in the widget of entry in each image.
-img_path_list = [f for f in Path('./test/image').glob('*') if f.suffix[1:].lower() in ('png', 'bmp', 'jpg')]
-# img_path_list = [f for f in Path('./test').glob('**/*') if f.suffix[1:].lower() in ('png', 'bmp', 'jpg')]  # It's able to look the nest directory.
+name_template = None  # '{DateTimeOriginal:%Y%m%d_%H%M%S}_{Make}_{seq:04d}'  # Fill the entry with the proposed name instead. (see NameTemplate)
+img_path_list = ImageScanner(Path('./test/image'), extensions=('png', 'bmp', 'jpg'), max_depth=0)  # It starts showing the image as soon as the first one is found.
+# img_path_list = ImageScanner(Path('./test'), extensions=('png', 'bmp', 'jpg'), max_depth=None)  # It's able to look the nest directory.
+# img_path_list = [f for f in Path('./test/image').glob('*') if f.suffix[1:].lower() in ('png', 'bmp', 'jpg')]  # The list is also acceptable.
+# img_path_list = MetadataIndex(Path('./metadata.db')).refresh_and_select(img_path_list, order_by='date_time_original')  # Sort or filter by the metadata. (see MetadataIndex.select)
+# img_path_list = order_by_similarity(img_path_list)  # The similar images come one after another, so F4 (insert_previous) is more useful.
+session_dir = None  # Path('./.session')  # Remember the processed images, the next run starts from the first unprocessed one. None: disable
 
 if 'The area record the variable used for the plugin':
     output_history_log_path = Path('./my_history_log.txt')
     output_change_log_path = Path('./my_change_log.txt')
+    duplicate_db_path = None  # Path('./hash.db')  # PLUGIN_DUPLICATES: cache the hashes across the runs. None: do not cache.
+    duplicate_max_distance = 8  # PLUGIN_DUPLICATES: near-duplicate if the Hamming distance of the pHash (64 bits) <= it.
+
+interval = 1 / 40  # The main loop sleeps until something happened (Tk events, commit, skip).
+max_idle_interval = 0.1  # If nothing happened, the checking interval of the Tk events backs off to this. (the main loop does not wake up)
+measure_cpu = False  # Print the CPU usage while the app is idle when closing.
 
 DEBUG = True
 if DEBUG:
@@ -1,30 +1,46 @@
 import tkinter as tk
-from typing import Union, List, Dict, Tuple, Callable
+import _tkinter
+from typing import Union, List, Dict, Tuple, Callable, Iterator, Set
 from pathlib import Path
 from grid_extractor import show_img
-from .api.imagehelper import append_image_to_news
+from .api.imagehelper import StripCompositor, get_preview_flag
+from .api.imagecache import ImageCache, IMAGE_CACHE
+from .api.prefetch import Prefetcher
+from .api.dirindex import DIR_INDEX
+from .api.scanner import ImageScanner
+from .api.journal import close_all_journal
+from .api.planner import rename_no_replace
+from .api.session import RenameSession
+from .api.nametemplate import NameTemplate
 from .api.tkmixins import TkMixin
+from .api.utils import CPUMeter, ILLEGAL_CHARS
 import cv2
 import numpy as np
 import asyncio
+import bisect
+import itertools
 import os
 import types
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
 from enum import Enum
 
 APP_ICON_PATH = Path(__file__).parent / Path('asset/icon/main.ico')
 
 
-def imread(file, flag=cv2.IMREAD_UNCHANGED) -> np.ndarray:
+def imread(file, flag=cv2.IMREAD_UNCHANGED, cache: ImageCache = None) -> np.ndarray:
     """
     To fix the problem of the path contains Chinese.
     :param file: Path or str
     :param flag:
+    :param cache: If assigned, the decoded image is taken from (or saved to) the cache, and it is read-only.
     """
     if not Path(file).exists():
         raise FileNotFoundError(f"{file}")
     if isinstance(file, Path):
         file = str(file)
+    if cache is not None:
+        return cache.get_or_load(file, flag, lambda: imread(file, flag))
     np_img = cv2.imdecode(np.fromfile(file, dtype=np.uint8), flag)
     return np_img
 
@@ -59,29 +75,190 @@ class JobState(Enum):
     FOREVER = 1
 
 
+class Job:
+    __slots__ = ('name', 'priority', 'func', 'event', 'state',
+                 'seq', 'is_alive')
+
+    def __init__(self, name: str, priority: int, func: Callable, event: Event, state: JobState, seq: int):
+        self.name = name
+        self.priority = priority
+        self.func = func
+        self.event = event
+        self.state = state
+        self.seq = seq
+        self.is_alive = True
+
+    def __lt__(self, other: 'Job'):
+        return (-self.priority, self.seq) < (-other.priority, other.seq)  # the bigger priority runs first.
+
+    def to_tuple(self) -> Tuple[int, Callable, Event, JobState]:
+        return self.priority, self.func, self.event, self.state
+
+
+class JobRegistry(MutableMapping):
+    """
+    The jobs of ``on_hotkey_event``. The jobs are indexed by the Event, and each list is kept sorted by priority,
+    so the dispatcher only looks at the jobs of the current event.
+
+    The removed job is only marked (O(1)) and it is dropped from the list when there are too many of them.
+
+    USAGE::
+
+        app.job_registry.register('change_log', func, Event.IMG_CHANGE, JobState.FOREVER, priority=1)
+        app.job_registry.unregister('change_log')
+
+    It is also a dict of ``name: (priority, func, event, state)``, so the plugin which writes `dict_job` still works.
+    """
+    __slots__ = ('_dict_job', '_dict_event', '_dict_n_dead', '_counter')
+
+    def __init__(self):
+        self._dict_job: Dict[str, Job] = dict()
+        self._dict_event: Dict[Event, List[Job]] = dict()
+        self._dict_n_dead: Dict[Event, int] = dict()
+        self._counter = itertools.count()
+
+    def register(self, name: str, func: Callable, event: Event, state: JobState = JobState.FOREVER, priority: int = 0):
+        if name in self._dict_job:
+            self.unregister(name)
+        job = Job(name, priority, func, event, state, next(self._counter))
+        self._dict_job[name] = job
+        bisect.insort(self._dict_event.setdefault(event, []), job)
+
+    def unregister(self, name: str):
+        job = self._dict_job.pop(name)
+        job.is_alive = False
+        n_dead = self._dict_n_dead.get(job.event, 0) + 1
+        job_list = self._dict_event[job.event]
+        if n_dead * 2 > len(job_list):
+            job_list[:] = [_ for _ in job_list if _.is_alive]
+            n_dead = 0
+        self._dict_n_dead[job.event] = n_dead
+
+    def dispatch(self, cur_event: Event):
+        job_list = self._dict_event.get(cur_event)
+        if not job_list:
+            return
+        for job in tuple(job_list):  # the job is able to register the other job.
+            if not job.is_alive:
+                continue
+            job.func()
+            if job.state == JobState.ONCE and job.is_alive:
+                self.unregister(job.name)
+
+    def __getitem__(self, name: str) -> Tuple[int, Callable, Event, JobState]:
+        return self._dict_job[name].to_tuple()
+
+    def __setitem__(self, name: str, value: Tuple[int, Callable, Event, JobState]):
+        priority, func, event, state = value
+        self.register(name, func, event, state, priority)
+
+    def __delitem__(self, name: str):
+        self.unregister(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dict_job)
+
+    def __len__(self):
+        return len(self._dict_job)
+
+
+class PanelRegistry:
+    """
+    The subscription table of the panels. (see ``template.node.PanelBase``)
+
+    The panel only receives the events that it subscribes to. If the panel is subscribed with `defer_when_hidden`,
+    the update is postponed while its window is withdrawn, and only the last event is sent when the window shows again.
+    """
+    __slots__ = ('_dict_event', '_dict_defer', '_dict_pending')
+
+    def __init__(self):
+        self._dict_event: Dict[Event, List] = dict()
+        self._dict_defer: Dict[int, bool] = dict()  # id(panel): defer_when_hidden
+        self._dict_pending: Dict[int, Event] = dict()
+
+    def __contains__(self, panel):
+        return id(panel) in self._dict_defer
+
+    def subscribe(self, panel, events: Tuple[Event, ...], defer_when_hidden=False):
+        """
+        :param panel: It has the attribute of `parent` (tk.Toplevel) and the method of `update(event)`.
+        :param events:
+        :param defer_when_hidden:
+        """
+        if panel in self:
+            self.unsubscribe(panel)
+        for event in events:
+            self._dict_event.setdefault(event, []).append(panel)
+        self._dict_defer[id(panel)] = defer_when_hidden
+        if defer_when_hidden:
+            window: tk.Toplevel = panel.parent
+            window.bind('<Map>', lambda e: self.flush(panel) if e.widget is window else None, add='+')
+
+    def unsubscribe(self, panel):
+        for panel_list in self._dict_event.values():
+            if panel in panel_list:
+                panel_list.remove(panel)
+        self._dict_defer.pop(id(panel), None)
+        self._dict_pending.pop(id(panel), None)
+
+    def dispatch(self, cur_event: Event):
+        for panel in tuple(self._dict_event.get(cur_event, ())):
+            try:
+                if self._dict_defer[id(panel)] and panel.parent.wm_state() in ('withdrawn', 'iconic'):
+                    self._dict_pending[id(panel)] = cur_event
+                    continue
+                panel.update(event=cur_event)
+            except tk.TclError:  # the window was destroyed.
+                self.unsubscribe(panel)
+
+    def flush(self, panel):
+        event = self._dict_pending.pop(id(panel), None)
+        if event is not None:
+            panel.update(event=event)
+
+
 class RenameFactory(EditBoxBase, TkMixin):
     __slots__ = ('img_path_list', '_next_img_flag',
-                 'config', 'widget_info')
+                 'config', 'widget_info',
+                 'prefetcher', 'prefetch_hooks', 'rename_hooks', 'wake_event', 'session',
+                 'name_template', 'dict_proposal', 'set_skip_path',
+                 'job_registry', 'panel_registry',)
 
-    ILLEGAL_CHARS = ('\\', '/', '?', '*', '<', '>', '|')  # These characters is not acceptable for the filename.
+    ILLEGAL_CHARS = ILLEGAL_CHARS
+    PROPOSAL_BATCH = 256  # The names of so many images are proposed at once by the `name_template`.
     FINISHED_MSG = 'FINISHED'
     IMG_WINDOW_NAME = 'demo'
 
     @dataclass(repr=False, eq=False)
     class WidgetInfo:
         cur_img_path: Path = field(init=False, default=None)
+        cur_idx: int = field(init=False, default=0)
         previous_img_path: Path = field(init=False, default=None)
         previous_info: Path = field(init=False, default=None)
         entry: tk.Entry = field(init=False, default=None)
 
-    def __init__(self, img_path_list: List[Path], config: types.SimpleNamespace, **options):
+    def __init__(self, img_path_list: Union[List[Path], ImageScanner], config: types.SimpleNamespace, **options):
         self.img_path_list = img_path_list
 
         self.config = config
+        if hasattr(config, 'image_cache_size'):
+            IMAGE_CACHE.resize(config.image_cache_size * 1024 ** 2)
+        prefetch_depth = getattr(config, 'prefetch_depth', 0)
+        self.prefetcher = Prefetcher(self.read_image, prefetch_depth) if prefetch_depth > 0 else None
+        self.prefetch_hooks: List[Callable[[List[Path]], None]] = []  # They are called with the next images. (e.g. EXIF_CACHE.schedule)
+        self.rename_hooks: List[Callable[['RenameFactory', Path, Path], None]] = []  # They are called after each rename. (e.g. change_log)
         self.widget_info = self.WidgetInfo()
         self._next_img_flag = False
+        self.wake_event = asyncio.Event()  # set it to wake the main loop up. (commit, skip, the event of Tk)
+        session_dir = getattr(config, 'session_dir', None)
+        self.session = RenameSession.open(session_dir, img_path_list) if session_dir else None
+        name_template = getattr(config, 'name_template', None)
+        self.name_template = NameTemplate(name_template) if name_template else None
+        self.dict_proposal: Dict[Path, str] = dict()  # path: the proposed stem
+        self.set_skip_path: Set[Path] = set()  # The images which are handled by the plugin already (e.g. the duplicates are deleted).
+        self.job_registry = JobRegistry()
+        self.panel_registry = PanelRegistry()
         EditBoxBase.__init__(self, **options)
-        self.__class__.on_hotkey_event.dict_job = dict()
 
     def init_ui(self):
         self.root.iconbitmap(APP_ICON_PATH)
@@ -152,39 +329,79 @@ class RenameFactory(EditBoxBase, TkMixin):
             widget.config(**options)
             return widget
 
-    async def main(self, interval: float):
-        if len(self.img_path_list) == 0:
-            print('empty img_path_list')
-            return
+    def wake(self):
+        self.wake_event.set()
+
+    async def wait_wake(self, timeout: float = None):
+        """
+        Sleep until someone calls `wake`, or the timeout. (None: no timeout)
+        """
+        try:
+            await asyncio.wait_for(self.wake_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            ...
+        self.wake_event.clear()
+
+    def is_skipped(self, img_path: Path) -> bool:
+        """
+        The image is handled already, by the plugin (``set_skip_path``) or by the last session.
+        """
+        return img_path in self.set_skip_path or bool(self.session and self.session.is_done(img_path))
+
+    async def next_images(self, idx: int, n: int) -> List[Path]:
+        """
+        :return: at most `n` images after `idx` which are not skipped and still exist.
+        """
+        result = []
+        i = idx + 1
+        while len(result) < n and await self.fetch_img_path(i + 1) > i:
+            img_path: Path = self.img_path_list[i]
+            if not self.is_skipped(img_path) and img_path.exists():
+                result.append(img_path)
+            i += 1
+        return result
+
+    async def main(self, interval: float = None):
+        """
+        :param interval: the longest time of sleeping. None: sleep until it is woken up by the events
+                         (Tk events, commit, skip, the closed image window, see ``updater``).
+        """
         window_size: Tuple[int, int] = getattr(self.config, 'window_size', None)
         display_n_img = getattr(self.config, 'display_n_img', 1)
         highlight_color: Tuple[int, int, int] = getattr(self.config, 'highlight_color', None)
         border_thickness: int = getattr(self.config, 'border_thickness', 1)
-        n_total_img = len(self.img_path_list)
-        for idx, img_path in enumerate(self.img_path_list):
-            img_display = imread(img_path)
+        prefetch_depth = self.prefetcher.depth if self.prefetcher else 0
+        strip = StripCompositor(highlight_color, border_thickness) if display_n_img > 1 else None
+        idx = 0
+        if self.session:  # jump to the image which was showing last time.
+            await self.fetch_img_path(self.session.cursor + 1)
+            idx = self.session.resume_index(self.img_path_list)
+        while await self.fetch_img_path(idx + display_n_img + prefetch_depth) > idx:
+            img_path: Path = self.img_path_list[idx]
+            if self.is_skipped(img_path):
+                idx += 1
+                continue
+            self.root.title(f'Rename Tool ({idx + 1}/{self.img_path_count()})')
             show_flag = True
             self._next_img_flag = False
             is_first_show = True
-            while await asyncio.sleep(interval, True):
+            while True:
                 if (cv2.getWindowProperty(self.IMG_WINDOW_NAME,
                                           cv2.WND_PROP_FULLSCREEN) == -1  # If the user closed the window, then show it again.
                         or show_flag):
-                    img_cur = imread(img_path)
-                    if display_n_img > 1:
-                        if img_cur.ndim == 2 or img_cur.shape[-1] == 1:
-                            img_cur = cv2.cvtColor(img_cur, cv2.COLOR_GRAY2RGBA)
-                        if highlight_color is not None:
-                            img_cur = cv2.copyMakeBorder(img_cur,
-                                                         border_thickness, border_thickness, border_thickness,
-                                                         border_thickness,
-                                                         cv2.BORDER_CONSTANT, value=highlight_color)
-                    img_display: np.ndarray = img_cur if display_n_img == 1 else \
-                        append_image_to_news(img_cur,
-                                             [imread(_) for _ in
-                                              self.img_path_list[idx + 1:min(idx + display_n_img, n_total_img)] if
-                                              idx + 1 < n_total_img],
-                                             direction='r')
+                    # The plugin may delete or rename the next images (e.g. ``delete_duplicates``), so they are picked on each show.
+                    next_list = await self.next_images(idx, display_n_img - 1 + prefetch_depth)
+                    neighbour_list, upcoming_list = next_list[:display_n_img - 1], next_list[display_n_img - 1:]
+                    if strip is None:
+                        img_display, = await self.load_images([img_path])
+                    else:  # only the new trailing image is loaded when sliding to the next one.
+                        key_list = [ImageCache.make_key(path, None) for path in [img_path] + neighbour_list]
+                        list_missing = strip.missing(key_list)
+                        img_list = await self.load_images([Path(key[0]) for key in list_missing])
+                        img_display: np.ndarray = strip.compose(key_list, dict(zip(list_missing, img_list)))
+                    if self.prefetcher:  # decode the next images while the user is typing.
+                        self.prefetcher.schedule(upcoming_list)
+                        [hook(upcoming_list) for hook in self.prefetch_hooks]
                     show_img(img_display, window_name=self.IMG_WINDOW_NAME,
                              window_size=window_size if window_size is not None else -1,
                              delay_time=1)
@@ -192,7 +409,13 @@ class RenameFactory(EditBoxBase, TkMixin):
                     if is_first_show:
                         self.update_ui('label_abs_img_path', text=f'{str(img_path.resolve())[-50:]}')
                         self.widget_info.cur_img_path = img_path
-                        if hasattr(self.config, 'default_name_flag') and self.config.default_name_flag:
+                        self.widget_info.cur_idx = idx
+                        if self.session:
+                            self.session.set_cursor(idx, img_path)
+                        if self.name_template:
+                            await self.propose_name(idx)
+                            self.on_hotkey_insert_proposal(None)
+                        elif hasattr(self.config, 'default_name_flag') and self.config.default_name_flag:
                             self.on_hotkey_insert_file_name(None)
                         self.on_hotkey_event(Event.IMG_CHANGE)
                         self.update_panel(Event.IMG_CHANGE)
@@ -208,41 +431,78 @@ class RenameFactory(EditBoxBase, TkMixin):
                                  window_size=window_size if window_size is not None else -1,
                                  delay_time=1)  # Avoid previous images remaining. use destroyWindow is not a good idea, it's too slow.
                     break
+                await self.wait_wake(interval)
+            idx += 1
+        if idx == 0:
+            print('empty img_path_list')
+            return
         print('all done!')
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        close_all_journal()  # flush the change_log and the session now, do not depend on atexit.
         cv2.destroyAllWindows()
         return self.FINISHED_MSG
 
-    def refresh_window(self):
-        cv2.destroyWindow(self.IMG_WINDOW_NAME)
+    async def fetch_img_path(self, n: int) -> int:
+        """
+        If the img_path_list is an ImageScanner, wait until the first `n` paths are found (or the scanning is finished).
 
-    def on_hotkey_event(self, cur_event: Event):
-        dict_job = getattr(self.on_hotkey_event, 'dict_job', dict)
-        if not dict_job:
+        :return: the number of the paths which are ready to use.
+        """
+        await_count = getattr(self.img_path_list, 'await_count', None)
+        if await_count is None:
+            return len(self.img_path_list)
+        return await await_count(n)
+
+    def img_path_count(self) -> str:
+        """
+        :return: '120', or '120+' if it is still scanning.
+        """
+        if hasattr(self.img_path_list, 'await_count'):
+            return f'{self.img_path_list.n_found}{"" if self.img_path_list.is_done else "+"}'
+        return f'{len(self.img_path_list)}'
+
+    async def propose_name(self, idx: int):
+        """
+        Propose the names of the next ``PROPOSAL_BATCH`` images at once by the ``name_template``. (see ``NameTemplate.propose``)
+        """
+        img_path: Path = self.img_path_list[idx]
+        if img_path in self.dict_proposal:
             return
+        n_ready = await self.fetch_img_path(idx + self.PROPOSAL_BATCH)
+        path_list = self.img_path_list[idx: min(idx + self.PROPOSAL_BATCH, n_ready)]
+        rows = await asyncio.get_event_loop().run_in_executor(None, self.name_template.propose, path_list, idx)
+        self.dict_proposal = {row.old: row.new.stem for row in rows}
+
+    async def load_images(self, path_list: List[Path]) -> List[np.ndarray]:
+        """
+        If the prefetcher is enabled, the image is decoded on the thread pool, so the loop is not blocked.
+        """
+        if self.prefetcher is None:
+            return [self.read_image(path) for path in path_list]
+        return await self.prefetcher.get_all(path_list)
+
+    def read_image(self, img_path: Path) -> np.ndarray:
+        """
+        If ``preview_decode`` is set, the image is decoded with the reduced resolution which is fit to the ``window_size``.
+        Use ``imread`` directly if you need the full resolution.
+        """
+        window_size: Tuple[int, int] = getattr(self.config, 'window_size', None)
+        if window_size is None or not getattr(self.config, 'preview_decode', False):
+            return imread(img_path, cache=IMAGE_CACHE)
+        width, height = window_size
+        display_n_img = getattr(self.config, 'display_n_img', 1)
+        flag = get_preview_flag(img_path, (width // display_n_img, height))
+        return imread(img_path, flag, cache=IMAGE_CACHE)
 
-        dict_job = {k: v for k, v in [(k, v) for k, v in
-                                      sorted(dict_job.items(), key=lambda item: item[1][0])][::-1]
-                    # sorted by priority: ascending
-                    }
-        self.__class__.on_hotkey_event.dict_job = dict_job
+    def refresh_window(self):
+        cv2.destroyWindow(self.IMG_WINDOW_NAME)
 
-        for name, (n_priority, job, event, state) in dict_job.items():
-            job: Callable
-            if event == cur_event:
-                job()
-                if state == JobState.ONCE:
-                    del dict_job[name]
+    def on_hotkey_event(self, cur_event: Event):
+        self.job_registry.dispatch(cur_event)
 
     def update_panel(self, cur_event: Event):
-        from .template.node import PanelBase
-        dict_panel: Dict[str, tk.Toplevel] = {k: v for k, v in filter(lambda kv: kv[0].startswith('!panel_'),
-                                                                      self.root.children.items())}
-        if not dict_panel:
-            return
-        # dict_panel = dict_panel.get('children', {})
-        for window_name, panel in dict_panel.items():
-            panel: PanelBase
-            panel.update(event=cur_event)
+        self.panel_registry.dispatch(cur_event)
 
     def on_click_commit(self, _: Union[tk.Event, None]):
         new_file_name = self.entry.get()
@@ -254,23 +514,49 @@ class RenameFactory(EditBoxBase, TkMixin):
             return
         org_img_path = self.widget_info.cur_img_path
         new_file: Path = org_img_path.parent / Path(new_file_name + org_img_path.suffix)
-        # if new_file.exists():  # case insensitive
-        if new_file.name in os.listdir(new_file.parent):
-            self.update_ui('label_error_msg', text=f'FileExistsError: {org_img_path.name} -> {new_file.name}')
+        dir_index = DIR_INDEX.get(new_file.parent)
+        is_case_changed = new_file.name != org_img_path.name and new_file.name.casefold() == org_img_path.name.casefold()
+        if new_file.name in dir_index and not is_case_changed:  # case insensitive
+            if not getattr(self.config, 'auto_resolve_conflict', False):
+                self.update_ui('label_error_msg', text=f'FileExistsError: {org_img_path.name} -> {new_file.name}')
+                return
+            new_file = new_file.parent / dir_index.next_free(new_file_name, org_img_path.suffix)
+        try:
+            self.rename_file(org_img_path, new_file, self.widget_info.cur_idx)
+        except OSError as e:  # e.g. the file appears after the index is read.
+            self.update_ui('label_error_msg', text=f'{e.__class__.__name__}: {org_img_path.name} -> {new_file.name}')
             return
         self.update_ui('label_error_msg', text=f'')
         self.widget_info.previous_img_path = new_file
         self.widget_info.previous_info = org_img_path, new_file
-        org_img_path.rename(new_file)
         self.entry.delete(0, len(new_file_name))
         self._next_img_flag = True
+        self.wake()
+
+    def rename_file(self, org_img_path: Path, new_file: Path, idx: int = -1):
+        """
+        Rename it without replacing the other file, and record it to the session and the ``rename_hooks``.
+        The plugin which renames the files should call it too.
+
+        :param idx: the index in the queue. -1: unknown
+        """
+        if self.session:
+            self.session.begin_rename(org_img_path, new_file)
+        rename_no_replace(org_img_path, new_file)
+        DIR_INDEX.on_rename(org_img_path, new_file)
+        if self.session:
+            self.session.done(idx, org_img_path, new_file)
+        [hook(self, org_img_path, new_file) for hook in self.rename_hooks]
 
     def on_click_open_source_dir(self, _: Union[tk.Event, None]):
         img_path = self.widget_info.cur_img_path
         os.startfile(img_path.parent)
 
     def on_click_skip(self, _: Union[tk.Event, None]):
+        if self.session and not self._next_img_flag:
+            self.session.skip(self.widget_info.cur_idx, self.widget_info.cur_img_path)
         self._next_img_flag = True
+        self.wake()
         self.entry.delete(0, len(self.widget_info.cur_img_path.name))
         self.widget_info.previous_info = None
         return "break"  # ignore tab  # https://stackoverflow.com/questions/62366097/python-tk-setting-widget-focus-when-using-tab-key
@@ -280,6 +566,13 @@ class RenameFactory(EditBoxBase, TkMixin):
         self.entry.insert(0, img_path.stem)
         self.entry.icursor(0)
 
+    def on_hotkey_insert_proposal(self, _: Union[tk.Event, None]):
+        stem = self.dict_proposal.get(self.widget_info.cur_img_path)
+        if stem is None:
+            return
+        self.entry.insert(0, stem)
+        self.entry.icursor(0)
+
     def on_hotkey_insert_previous(self, _: Union[tk.Event, None]):
         if not self.widget_info.previous_img_path:
             return
@@ -290,8 +583,9 @@ class RenameFactory(EditBoxBase, TkMixin):
 
 class ImageRenameApp(RenameFactory):
     __slots__ = ('loop', 'dict_task',
-                 'interval',
+                 'interval', 'max_idle_interval',
                  'template',
+                 'cpu_meter',
                  'is_dead',)
 
     def __init__(self, loop, img_path_list, **options):
@@ -306,8 +600,10 @@ class ImageRenameApp(RenameFactory):
 
         self.root.protocol("WM_DELETE_WINDOW", self.close)  # override original function
         self.interval = interval = getattr(config, 'interval', 1 / 40)
+        self.max_idle_interval = max(getattr(config, 'max_idle_interval', 0.1), interval)
+        self.cpu_meter = CPUMeter() if getattr(config, 'measure_cpu', False) else None
         self.dict_task: Dict[str, asyncio.Task] = dict(
-            main=loop.create_task(self.main(interval)),
+            main=loop.create_task(self.main()),  # it sleeps until `wake`, it does not poll.
             updater=loop.create_task(self.updater(interval)),
         )
 
@@ -316,18 +612,52 @@ class ImageRenameApp(RenameFactory):
         if not self.is_dead:
             self.loop.close()
 
+    def process_tk_events(self) -> int:
+        """
+        Like ``root.update()``, but it tells you how many events are handled.
+        """
+        n_event = 0
+        while self.root.tk.dooneevent(_tkinter.DONT_WAIT):
+            n_event += 1
+        return n_event
+
     async def updater(self, interval):
+        """
+        Handle the events of Tk. If nothing happened, the sleeping time is doubled until the `max_idle_interval`.
+
+        Tk does not expose its file descriptor to asyncio, so Tk is pumped here, and the main loop is woken up
+        only when something happened: the events of Tk, or the image window was closed by the user.
+        """
+        cur_interval = interval
         while True:
-            self.root.update()
-            await asyncio.sleep(interval)
+            if self.process_tk_events():
+                cur_interval = interval
+                self.wake()
+            else:
+                cur_interval = min(cur_interval * 2, self.max_idle_interval)
+                if self.widget_info.cur_img_path is not None and \
+                        cv2.getWindowProperty(self.IMG_WINDOW_NAME, cv2.WND_PROP_FULLSCREEN) == -1:
+                    self.wake()  # show it again
+            if self.cpu_meter:
+                self.cpu_meter.tick(is_idle=cur_interval == self.max_idle_interval)
+            await asyncio.sleep(cur_interval)
             if getattr(self.dict_task['main'], '_result') == self.FINISHED_MSG:
                 break
         print('close updater')
+        self.report_cpu()
         self.loop.stop()
 
+    def report_cpu(self):
+        if self.cpu_meter:
+            print(self.cpu_meter.report())
+
     def close(self):
         for task_name, task in self.dict_task.items():
             task.cancel()
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        close_all_journal()
+        self.report_cpu()
         cv2.destroyAllWindows()
         self.root.destroy()
         self.loop.stop()
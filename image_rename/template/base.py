@@ -79,7 +79,7 @@ class Parser:
         nodelist = NodeList()
         for name, (func, key_list) in self.hotkeys.items():
             args_list, *_others = inspect.getfullargspec(func)
-            need_job_list = True if 'dict_job' in args_list else False
+            need_job_list = True if 'jobs' in args_list or 'dict_job' in args_list else False  # dict_job: old name
             self.extend_nodelist(nodelist, HotkeyNode(name, func, key_list, need_job_list), Token(TokenType.Hotkey))
 
         for window_name, (func, icon_path) in self.panels.items():
@@ -2,13 +2,151 @@ import importlib
 from .exceptions import (
     InvalidTemplateLibrary,
 )
-from typing import List
+from .library import Library
+from typing import Any, Callable, Dict, List, Union
 from types import ModuleType
 from pathlib import Path
+import ast
 import importlib.machinery
+import inspect
 from image_rename.api.utils import work_dir
 
 
+def _literal_eval(node: ast.AST) -> Any:
+    """
+    ``ast.literal_eval`` which accepts ``dict(key=value)`` too.
+    """
+    if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'dict' and not node.args:
+        return {keyword.arg: _literal_eval(keyword.value) for keyword in node.keywords}
+    if isinstance(node, ast.Dict):
+        return {_literal_eval(key): _literal_eval(value) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, ast.List):
+        return [_literal_eval(elt) for elt in node.elts]
+    if isinstance(node, ast.Tuple):
+        return tuple(_literal_eval(elt) for elt in node.elts)
+    return ast.literal_eval(node)
+
+
+def read_manifest(module_path: Path) -> Union[Dict[str, Any], None]:
+    """
+    Read ``__manifest__`` of the plugin by ``ast`` without running the module. ::
+
+        __manifest__ = dict(
+            hotkeys={'start_ms_paint': ['<Alt-P>', '<Alt-p>']},  # name: key_list
+            panels={'IFD TAG2': dict(icon_path='../../asset/icon/exif.ico',  # relative to the plugin
+                                     key_list=['<Alt-I>', '<Alt-i>'],  # open the panel (optional)
+                                     open_on_start=True)},  # False: open it by the key_list or F5 only. (default: True)
+        )
+
+        @register.hotkey(key_list=__manifest__['hotkeys']['start_ms_paint'])  # do not repeat the key_list
+        def start_ms_paint(app): ...
+
+    :return: None if the plugin does not have it.
+    """
+    tree = ast.parse(module_path.read_bytes(), str(module_path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == '__manifest__'
+                                                for target in node.targets):
+            try:
+                return _literal_eval(node.value)
+            except ValueError as e:
+                raise InvalidTemplateLibrary(f'__manifest__ of {module_path} must be the literal: {e}')
+    return None
+
+
+def load_library(module_path: Path) -> Library:
+    """
+    Run the plugin module and return its ``register``.
+    """
+    try:
+        with work_dir(module_path.parent):
+            loader = importlib.machinery.SourceFileLoader(f'module:{module_path.absolute()}', module_path.name)
+            plugin_module = ModuleType(loader.name)  # type: Any
+            loader.exec_module(plugin_module)
+    except ImportError as e:
+        raise InvalidTemplateLibrary(f'Invalid template library specified. ImportError raised when'
+                                     f'trying to load {module_path}: {e}')
+    if not hasattr(plugin_module, 'register'):
+        raise InvalidTemplateLibrary(f'There is no attribute `register` on your module: {plugin_module}')
+    return getattr(plugin_module, 'register')
+
+
+class LazyLibrary:
+    """
+    The hotkeys and the panels of ``__manifest__``, the module runs when one of them is used at the first time.
+
+    The panels open on the start (so the module runs then) unless ``open_on_start=False``,
+    which opens them by their key_list (or F5 ``rebuild_all_panel``) only.
+    """
+    __slots__ = ('module_path', 'manifest', 'hotkeys', 'panels', 'toolbars', '_library')
+
+    def __init__(self, module_path: Path, manifest: Dict[str, Any]):
+        from .node import PanelNode
+        self.module_path = module_path
+        self.manifest = manifest
+        self._library: Union[Library, None] = None
+        self.hotkeys = {name: (self._make_hotkey(name), key_list)
+                        for name, key_list in manifest.get('hotkeys', dict()).items()}
+        self.panels = dict()
+        self.toolbars = dict()
+        for window_name, options in manifest.get('panels', dict()).items():
+            icon_path = options.get('icon_path')
+            icon_path = (module_path.parent / Path(icon_path)).resolve() if icon_path else None
+            panel_func = self._make_panel(window_name, options.get('open_on_start', True))
+            self.panels[window_name] = panel_func, icon_path
+            if options.get('key_list'):
+                node = PanelNode(window_name, panel_func, icon_path)
+                self.hotkeys[f'open_panel:{window_name}'] = (lambda app, panel_node=node: panel_node.render(app),
+                                                             options['key_list'])
+
+    def __repr__(self):
+        return f'<LazyLibrary {self.module_path.name} is_loaded={self._library is not None}>'
+
+    @property
+    def library(self) -> Library:
+        if self._library is None:
+            self._library = self.check_manifest(load_library(self.module_path))
+        return self._library
+
+    def check_manifest(self, library: Library) -> Library:
+        """
+        The key_list of the manifest is the one which is bound, so it must be the same as the one of ``register``.
+        """
+        for name, key_list in self.manifest.get('hotkeys', dict()).items():
+            if name not in library.hotkeys:
+                raise InvalidTemplateLibrary(f'{name!r} of __manifest__ is not registered in {self.module_path}')
+            registered_key_list = library.hotkeys[name][1]
+            if ([registered_key_list] if isinstance(registered_key_list, str) else list(registered_key_list)) != \
+                    ([key_list] if isinstance(key_list, str) else list(key_list)):
+                raise InvalidTemplateLibrary(f'The key_list of {name!r} in __manifest__ {key_list} does not match '
+                                             f'the registered one {registered_key_list} in {self.module_path}')
+        for window_name in self.manifest.get('panels', dict()):
+            if window_name not in library.panels:
+                raise InvalidTemplateLibrary(f'{window_name!r} of __manifest__ is not registered in {self.module_path}')
+        return library
+
+    def _get(self, kind: str, name: str) -> Callable:
+        return getattr(self.library, kind)[name][0]  # checked by `check_manifest`
+
+    def _make_hotkey(self, name: str) -> Callable:
+        def hotkey(app, jobs=None):
+            func = self._get('hotkeys', name)
+            args_list, *_others = inspect.getfullargspec(func)
+            return func(app, jobs) if 'jobs' in args_list or 'dict_job' in args_list else func(app)
+
+        hotkey.__name__ = hotkey.__qualname__ = name
+        return hotkey
+
+    def _make_panel(self, window_name: str, open_on_start: bool) -> Callable:
+        def panel(parent, app):
+            func = self._get('panels', window_name)
+            args_list, *_others = inspect.getfullargspec(func)
+            return func(parent, app) if 'app' in args_list else func(parent)
+
+        panel.is_lazy = not open_on_start
+        return panel
+
+
 class Engine:
     __slots__ = ('dirs', 'template_builtins', 'file_charset')
 
@@ -24,17 +162,14 @@ class Engine:
 
     @staticmethod
     def get_template_builtins(builtin_list):
-        rtn_list: List[ModuleType] = []
+        """
+        If the plugin has ``__manifest__`` (see ``read_manifest``), it does not run until its hotkey or panel is used.
+        """
+        rtn_list: List[Union[Library, LazyLibrary]] = []
         for module_path in builtin_list:
-            try:
-                with work_dir(module_path.parent):
-                    loader = importlib.machinery.SourceFileLoader(f'module:{module_path.absolute()}', module_path.name)
-                    plugin_module = ModuleType(loader.name)  # type: Any
-                    loader.exec_module(plugin_module)
-            except ImportError as e:
-                raise InvalidTemplateLibrary(f'Invalid template library specified. ImportError raised when'
-                                             f'trying to load {module_path}: {e}')
-            if not hasattr(plugin_module, 'register'):
-                raise InvalidTemplateLibrary(f'There is no attribute `register` on your module: {plugin_module}')
-            rtn_list.append(getattr(plugin_module, 'register'))
+            manifest = read_manifest(module_path)
+            if manifest is not None and not manifest.get('toolbars'):  # The toolbars show on the start anyway.
+                rtn_list.append(LazyLibrary(module_path, manifest))
+                continue
+            rtn_list.append(load_library(module_path))
         return rtn_list
@@ -1,5 +1,5 @@
 from typing import List, Dict, TypeVar, Callable, Type, Union, Tuple
-from image_rename.core import ImageRenameApp, RenameFactory, Event
+from image_rename.core import ImageRenameApp, Event
 from image_rename import APP_ICON_PATH
 from image_rename.api.tkmixins import TkMixin, TkImageMixin
 import functools
@@ -16,7 +16,8 @@ class NodeList(list):
         for node in self:
             if isinstance(node, Node):
                 if target_type is None:
-                    node.render(app)
+                    if not getattr(node, 'is_lazy', False):  # ``open_on_start=False``, it opens by its hotkey. (see engine.LazyLibrary)
+                        node.render(app)
                     continue
                 if target_type.__name__ == node.__class__.__name__:
                     node.render(app)
@@ -50,10 +51,7 @@ class HotkeyNode(Node):
             self.key_list = [self.key_list]
         for key_name in self.key_list:
             if self.need_job_list:
-                new_func = functools.wraps(self.func)(lambda tk_event:
-                                                      self.func(app, getattr(RenameFactory.on_hotkey_event, 'dict_job',
-                                                                             lambda: None)),
-                                                      )
+                new_func = functools.wraps(self.func)(lambda tk_event: self.func(app, app.job_registry))
             else:
                 new_func = functools.wraps(self.func)(lambda tk_event: self.func(app))
             app.root.bind(key_name, new_func)
@@ -86,12 +84,13 @@ class TopWindow(TkMixin):
 
 
 class PanelNode(Node):
-    __slots__ = ('window_name', 'func', 'icon_path')
+    __slots__ = ('window_name', 'func', 'icon_path', 'is_lazy')
 
     def __init__(self, window_name: str, func: Callable, icon_path: Path = None):
         self.window_name = window_name
         self.func = func
         self.icon_path = icon_path
+        self.is_lazy: bool = getattr(func, 'is_lazy', False)
 
     def render(self, app: ImageRenameApp):
         win = TopWindow(app.root, self.window_name, f'!panel_{self.window_name}', self.icon_path)
@@ -100,18 +99,29 @@ class PanelNode(Node):
         window: tk.Toplevel = win.window
         args_list, *_others = inspect.getfullargspec(self.func)
         self.func(window, app) if 'app' in args_list else self.func(window)
+        panel: PanelBase = getattr(window, 'panel', None)
+        if isinstance(panel, PanelBase):
+            app.panel_registry.subscribe(panel, panel.EVENTS, panel.DEFER_WHEN_HIDDEN)
 
 
 class PanelBase:
+    """
+    EVENTS: The panel only updates on these events.
+    DEFER_WHEN_HIDDEN: If True, the update is postponed until the window shows again. (only the last event is kept)
+    """
     __slots__ = ('parent',)
 
+    EVENTS: Tuple[Event, ...] = tuple(Event)
+    DEFER_WHEN_HIDDEN: bool = False
+
     def __init__(self, parent):
         self.parent: tk.Toplevel = parent
         org_parent_update: Callable = self.parent.update
         self.parent.update = lambda event: self.update(event, org_parent_update)
+        self.parent.panel = self  # PanelNode subscribes it to the app.panel_registry
 
     def update(self, event: Event, parent_update=None):
-        parent_update()
+        parent_update() if parent_update else tk.Toplevel.update(self.parent)
 
 
 class ToolbarNode(Node, TkImageMixin):
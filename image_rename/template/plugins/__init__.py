@@ -1,5 +1,7 @@
-if '__file__' in globals():
-    from .mspaint import PLUGIN_MS_PAINT
-    from .ifdtag import PLUGIN_IFD_TAG
-    from .ifdtag2 import PLUGIN_IFD_TAG_V2
+if '__file__' in globals():  # Only the paths, the plugins run by the Engine. (importing them here would load Pillow, tkinter, ...)
+    from pathlib import Path
 
+    PLUGIN_MS_PAINT = Path(__file__).parent / Path('mspaint.py')
+    PLUGIN_IFD_TAG = Path(__file__).parent / Path('ifdtag.py')
+    PLUGIN_IFD_TAG_V2 = Path(__file__).parent / Path('ifdtag2.py')
+    PLUGIN_DUPLICATES = Path(__file__).parent / Path('duplicates.py')
@@ -1,11 +1,14 @@
 from image_rename import template
 from image_rename.template.node import PanelNode
-from image_rename.core import ImageRenameApp, Event, JobState
+from image_rename.core import ImageRenameApp, Event, JobState, JobRegistry
+from image_rename.api.dirindex import DIR_INDEX
+from image_rename.api.journal import open_journal
+from image_rename.api.journalindex import file_hash
 import tkinter.messagebox
 import os
 from pathlib import Path
 import functools
-from typing import List, Tuple, Callable, Dict
+from typing import List, Tuple, Callable
 
 register = template.Library(__name__)  # You can assign any str as a parameter. It can make the programmer easy to understand where the path of the module is.
 
@@ -15,49 +18,36 @@ def delete_file(app: ImageRenameApp):
     img_path = app.widget_info.cur_img_path
     if tkinter.messagebox.askokcancel('Delete', f'Do you want to delete the file?\n{img_path}'):
         os.remove(img_path)
+        DIR_INDEX.on_delete(img_path)
         app.on_click_skip(None)  # next image
 
 
+def write_change_log(app: ImageRenameApp, before_path: Path, after_path: Path):
+    if not getattr(change_log, 'is_run', False):
+        return
+    output_path: Path = app.config.output_change_log_path
+    open_journal(output_path).append(str(before_path.absolute()), str(after_path.absolute()),
+                                     lambda: file_hash(after_path))
+
+
 @register.hotkey(key_list='<F12>')
-def change_log(app: ImageRenameApp, dict_job: Dict[str, Tuple[int, Callable, Event, JobState]]):
+def change_log(app: ImageRenameApp):
     """
     Save the information to the log file (the name before rename and after)
     You can click again to suspend or reopen it.
-    """
-
-    def main(run: bool):
-        if not run:
-            return
-
-        if app.widget_info.previous_info is None:
-            return
-
-        output_path: Path = app.config.output_change_log_path
-        mode = 'a'
-        if not getattr(change_log, 'init_done', False):
-            change_log.init_done = True
-            mode = 'w'
-
-        sep = '\t'
-        with open(output_path, mode, encoding='utf-8') as f:
-            # rename before, after
-            before_path, after_path = app.widget_info.previous_info  # type: Path
-            f.write(sep.join([str(before_path.absolute()), str(after_path.absolute())]) + '\n')
 
+    The log is a journal (see ``api.journal``), it is appended, and it is able to be the plan of ``img_rename_batch``.
+    The third column is the content hash, it is computed on the thread of the journal. (``img_rename_journal --hash``)
+    Every rename of ``app.rename_file`` is logged, including the ones of the plugins (e.g. ``rename_duplicates``).
+    """
     # suspend when clicking hotkey again
     change_log.is_run = not change_log.is_run if getattr(change_log, 'is_run', False) else True
-
-    new_func = functools.wraps(change_log)(lambda: main(change_log.is_run))
-    priority = 1
-    dict_job[change_log.__name__] = (
-        priority,
-        new_func,
-        Event.IMG_CHANGE, JobState.FOREVER
-    )
+    if write_change_log not in app.rename_hooks:
+        app.rename_hooks.append(write_change_log)
 
 
 @register.hotkey(key_list='<F1>')
-def history_log(app: ImageRenameApp, dict_job: Dict[str, Tuple[int, Callable, Event, JobState]]):
+def history_log(app: ImageRenameApp, jobs: JobRegistry):
     """
     Save the history which data is the Path of your first sees the image.
     You can click again to suspend or reopen it.
@@ -68,25 +58,13 @@ def history_log(app: ImageRenameApp, dict_job: Dict[str, Tuple[int, Callable, Ev
             return
 
         output_path = app.config.output_history_log_path
-        mode = 'a'
-        if not getattr(history_log, 'init_done', False):
-            history_log.init_done = True
-            mode = 'w'
-
-        sep = '\t'
-        with open(output_path, mode, encoding='utf-8') as f:
-            f.write(sep.join([str(app.widget_info.cur_img_path.absolute())]) + '\n')
+        open_journal(output_path).append(str(app.widget_info.cur_img_path.absolute()))
 
     # suspend when clicking hotkey again
     history_log.is_run = not history_log.is_run if getattr(history_log, 'is_run', False) else True
 
     new_func = functools.wraps(history_log)(lambda: main(history_log.is_run))
-    priority = 1
-    dict_job[history_log.__name__] = (
-        priority,
-        new_func,
-        Event.IMG_CHANGE, JobState.FOREVER
-    )
+    jobs.register(history_log.__name__, new_func, Event.IMG_CHANGE, JobState.FOREVER, priority=1)
     new_func()
 
 
@@ -2,12 +2,12 @@ import image_rename
 from image_rename import template
 from image_rename.template.node import PanelBase
 from image_rename.core import ImageRenameApp, Event
-from image_rename.api.tkmixins import TreeMixin
+from image_rename.api.tkmixins import TreeMixin, text_width
+from image_rename.api.history import HistoryModel
 import tkinter as tk
-from tkinter.font import Font
 from tkinter import ttk
 from pathlib import Path
-from typing import Callable, Tuple, NamedTuple, Union
+from typing import Callable, Tuple, NamedTuple, Union, List
 import os
 import re
 
@@ -23,8 +23,15 @@ def history_panel(parent: tk.Toplevel, app: ImageRenameApp):
 
 
 class HistoryPanel(PanelBase, TreeMixin):
+    """
+    The history is kept by ``HistoryModel`` (bounded), and the Treeview only has the rows of the visible window,
+    so it does not become slower with the number of the images.
+
+    It is not ``DEFER_WHEN_HIDDEN``, every image is recorded, only the Treeview is refreshed when the window shows again.
+    """
     __slots__ = ('tree', 'parent', 'app',
-                 'regex',)
+                 'regex',
+                 'model', 'search_var', 'vsb', 'item_list', 'seq_list', 'offset', 'cur_width', 'is_sort_by_name')
 
     class Header(NamedTuple):
         name = 'file_name'
@@ -40,32 +47,54 @@ class HistoryPanel(PanelBase, TreeMixin):
             for val in self.to_tuple():
                 yield val
 
+    EVENTS = (Event.IMG_CHANGE,)
     header = Header()
 
-    def __init__(self, parent: tk.Toplevel, app: ImageRenameApp, top_n=None):
+    def __init__(self, parent: tk.Toplevel, app: ImageRenameApp, top_n=20, max_size=100_000):
+        """
+        :param top_n: the number of the visible rows.
+        :param max_size: the number of the images which are kept in the history.
+        """
         super().__init__(parent)
         # self.header = self.Header()
         self.parent = parent
         self.app = app
+        self.model = HistoryModel(max_size)
+        self.seq_list: Union[List[int], None] = None  # the result of the search. None: all
+        self.offset = 0  # the index of the first visible row
+        self.cur_width = 0
+        self.is_sort_by_name = False
         self.tree = ttk.Treeview(self.parent,
                                  show='headings',  # ignore the index column
                                  columns=self.header.to_tuple(),
                                  height=top_n  # numbers of row
                                  )  # https://docs.python.org/3/library/tkinter.ttk.html
-        # self.tree['columns'] = ('image_path',)
+        self.item_list: List[str] = [self.tree.insert('', 'end') for _ in range(top_n)]  # They are reused by `render`.
+        self.tree.detach(*self.item_list)
+        self.vsb = ttk.Scrollbar(self.parent, orient='vertical', command=self.on_scroll)
+        self.search_var = tk.StringVar()
         self.parent.protocol("WM_DELETE_WINDOW", lambda: self.parent.withdraw())  # hide window
         self.regex = re.compile(r"(?P<width>[0-9]+)x(?P<height>[0-9]+)\+(?P<xoffset>[0-9]+)\+(?P<offset_y>[0-9]+)")  # search 123*1+22+333
 
     def build(self):
         for col in self.header:
             text = col.replace('_', ' ').title()  # uppercase
-            self.tree.heading(col, text=text, command=lambda col_name=col: self.sort_by(col_name, is_descending=False))
-            # self.tree.column("name", width=150, anchor='e')
-            self.tree.column(col, width=Font().measure(text))
+            self.tree.heading(col, text=text, command=lambda col_name=col: self.sort_by(col_name))
+            self.tree.column(col, width=text_width(text))
 
         self.tree.bind('<Double-Button>', self.select_item)  # https://www.python-course.eu/tkinter_events_binds.php
-        self.tree.grid(sticky='news')
-        self.build_scrollbar(self.parent)
+        for sequence, step in (('<Button-4>', -1), ('<Button-5>', 1)):  # X11
+            self.tree.bind(sequence, lambda e, n=step: self.on_scroll('scroll', n, 'units'))
+        self.tree.bind('<MouseWheel>', lambda e: self.on_scroll('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.tree.grid(row=0, column=0, sticky='news')
+        self.vsb.grid(row=0, column=1, sticky='ns')
+        hsb = ttk.Scrollbar(self.parent, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+        hsb.grid(row=1, column=0, sticky='ew')
+        search_entry = ttk.Entry(self.parent, textvariable=self.search_var)
+        search_entry.grid(row=2, column=0, sticky='ew')  # filter by the file name (starts with)
+        self.search_var.trace_add('write', lambda *_: self.on_search())
+        self.parent.bind('<Map>', lambda e: self.render() if e.widget is self.parent else None, add='+')
 
         offset_x, offset_y = [int(_) for _ in self.app.root.geometry().split('+')[1:]]
         offset_y += self.parent.winfo_height() + 300
@@ -80,26 +109,56 @@ class HistoryPanel(PanelBase, TreeMixin):
         previous_info: Tuple[Path, Path] = self.app.widget_info.previous_info
         if previous_info:
             org_img_path, new_file_path = previous_info
-
-            tuple_children: Tuple[str] = self.tree.get_children()
-            item_id: str = tuple_children[0] if tuple_children else None
-            if item_id:
-                # dict_data: dict = self.tree.item(item_id)
-                # values: list = self.tree.item(item_id, option='values')
-                # https://blog.csdn.net/weixin_42272768/article/details/100915973
-                for row_data in [(new_file_path.name, new_file_path.absolute())]:
-                    self.tree.item(item_id, values=row_data)
-                    self.adjust_column(row_data)
-
-        cur_img_path = self.app.widget_info.cur_img_path
-        # self.tree.insert("", "end", text=cur_img_path.name, values=(cur_img_path.absolute(),))
-        for row_data in [(cur_img_path.name, cur_img_path.absolute())]:
-            self.tree.insert("", 0, text=cur_img_path.name, values=row_data)
-            self.adjust_column(row_data)
+            self.model.replace_latest(new_file_path)
+
+        self.model.append(self.app.widget_info.cur_img_path)
+        self.on_search()
+
+    def on_search(self):
+        text = self.search_var.get()
+        self.seq_list = self.model.search(text, self.is_sort_by_name) if text or self.is_sort_by_name else None
+        self.offset = 0
+        self.render()
+
+    def sort_by(self, col_name: str, is_descending: bool = False, tree: ttk.Treeview = None):
+        """
+        The rows are not all in the Treeview, so it is sorted by the model. file_name: by the name, image_path: the newest first.
+        """
+        self.is_sort_by_name = col_name == self.header.name
+        self.on_search()
+
+    def on_scroll(self, action: str, number, unit: str = None):
+        """
+        The command of the vertical scrollbar. ('moveto', fraction) or ('scroll', n, 'units' | 'pages')
+        """
+        n_total = len(self.model) if self.seq_list is None else len(self.seq_list)
+        if action == 'moveto':
+            self.offset = int(float(number) * n_total)
+        else:
+            self.offset += int(number) * (len(self.item_list) if unit == 'pages' else 1)
+        self.render()
+
+    def render(self):
+        if not self.parent.winfo_viewable():  # It is refreshed on <Map>
+            return
+        n_visible = len(self.item_list)
+        n_total = len(self.model) if self.seq_list is None else len(self.seq_list)
+        self.offset = max(0, min(self.offset, n_total - n_visible))
+        if self.seq_list is None:
+            entry_list = [self.model[idx] for idx in range(self.offset, min(self.offset + n_visible, n_total))]
+        else:
+            entry_list = [self.model.get(seq) for seq in self.seq_list[self.offset: self.offset + n_visible]]
+
+        for item_id, entry in zip(self.item_list, entry_list):
+            self.update_row(item_id, (entry.name, entry.path))
+        self.tree.set_children('', *self.item_list[:len(entry_list)])  # the others are detached.
+        self.vsb.set(*((self.offset / n_total, (self.offset + len(entry_list)) / n_total) if n_total else (0, 1)))
 
         cur_width = sum([self.tree.column(header_name)['width'] for header_name in self.header.to_tuple()])
-        width, height, x_offset, y_offset = self.regex.match(self.parent.geometry()).groups()  # groupdict()
-        self.parent.geometry(f'{cur_width}x{height}+{x_offset}+{y_offset}')
+        if cur_width != self.cur_width:  # only when the column is wider.
+            self.cur_width = cur_width
+            width, height, x_offset, y_offset = self.regex.match(self.parent.geometry()).groups()  # groupdict()
+            self.parent.geometry(f'{cur_width}x{height}+{x_offset}+{y_offset}')
 
     def select_item(self, event):
         # cur_item: dict = self.tree.item(self.tree.focus())  # cur_item['text'] 'values'
@@ -0,0 +1,166 @@
+"""
+Show the duplicate group (the same content, or the near-duplicate by the pHash) of the current image,
+and delete or rename the whole group by one hotkey. (see ``api.dedup``)
+
+The options of the setting file::
+
+    duplicate_db_path = Path('./hash.db')  # cache the hashes across the runs. None: do not cache.
+    duplicate_max_distance = 8  # the Hamming distance of the pHash (64 bits)
+"""
+__all__ = ('PLUGIN_DUPLICATES',)
+
+from pathlib import Path
+
+if '__file__' in globals():
+    PLUGIN_DUPLICATES = Path(__file__)
+
+__manifest__ = dict(  # It runs when one of them is used. (see engine.read_manifest)
+    hotkeys={'delete_duplicates': ['<Control-Alt-D>', '<Control-Alt-d>'],
+             'rename_duplicates': ['<Control-Alt-R>', '<Control-Alt-r>']},
+    panels={'Duplicates': dict(icon_path='../../asset/icon/history.ico', key_list=['<Control-Alt-G>', '<Control-Alt-g>'],
+                               open_on_start=False)},  # It hashes the whole queue, so it opens by the hotkey.
+)
+
+import tkinter as tk
+import tkinter.messagebox
+from tkinter import ttk
+from image_rename import ImageRenameApp, Event, template
+from image_rename.template.node import PanelBase
+import image_rename
+from image_rename.api.tkmixins import TreeMixin, text_width
+from image_rename.api.dedup import DuplicateFinder, DuplicateItem
+from image_rename.api.dirindex import DIR_INDEX
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+import os
+
+register = template.Library(__name__)
+
+dict_finder: Dict[int, DuplicateFinder] = dict()  # id(app): DuplicateFinder
+
+
+def get_finder(app: ImageRenameApp) -> DuplicateFinder:
+    """
+    The queue is hashed on the background thread since the first call.
+    """
+    finder = dict_finder.get(id(app))
+    if finder is None:
+        finder = dict_finder[id(app)] = DuplicateFinder(getattr(app.config, 'duplicate_db_path', None),
+                                                        getattr(app.config, 'duplicate_max_distance', 8))
+        finder.start(app.img_path_list)
+    return finder
+
+
+def _other_members(app: ImageRenameApp) -> List[DuplicateItem]:
+    return [item for item in get_finder(app).group(app.widget_info.cur_img_path)
+            if item.path not in app.set_skip_path and item.path.exists()]
+
+
+@register.hotkey(key_list=__manifest__['hotkeys']['delete_duplicates'])
+def delete_duplicates(app: ImageRenameApp):
+    """
+    Delete the other images of the group (the current one is kept), and they will not show.
+    """
+    member_list = _other_members(app)
+    if not member_list:
+        return
+    if not tkinter.messagebox.askokcancel('Delete', f'Do you want to delete {len(member_list)} files?\n' +
+                                          '\n'.join(str(item.path) for item in member_list)):
+        return
+    finder = get_finder(app)
+    for item in member_list:
+        os.remove(item.path)
+        DIR_INDEX.on_delete(item.path)
+        finder.discard(item.path)
+        app.set_skip_path.add(item.path)
+
+
+@register.hotkey(key_list=__manifest__['hotkeys']['rename_duplicates'])
+def rename_duplicates(app: ImageRenameApp):
+    """
+    Commit the name of the entry for the current image, and the others of the group are renamed to ``{name}_001``, ...
+    All of them go through ``app.rename_file``, so they are in the ``change_log`` and the session.
+    """
+    member_list = _other_members(app)
+    org_img_path = app.widget_info.cur_img_path
+    app.on_click_commit(None)
+    previous_info = app.widget_info.previous_info
+    if previous_info is None or previous_info[0] != org_img_path:  # The name is empty, illegal, or used.
+        return  # (`org_img_path.exists()` is still True after the case-only change on the case-insensitive file system)
+    _, new_file = app.widget_info.previous_info
+    finder = get_finder(app)
+    finder.on_rename(org_img_path, new_file)
+    for item in member_list:
+        new_path = item.path.parent / DIR_INDEX.get(item.path.parent).next_free(new_file.stem, item.path.suffix)
+        try:
+            app.rename_file(item.path, new_path)
+        except OSError as e:
+            app.update_ui('label_error_msg', text=f'{e.__class__.__name__}: {item.path.name} -> {new_path.name}')
+            continue
+        finder.on_rename(item.path, new_path)
+        app.set_skip_path.add(item.path)
+
+
+@register.panel(window_name='Duplicates', icon_path=Path(image_rename.__file__).parent / Path('asset/icon/history.ico'))
+def duplicate_panel(parent: tk.Toplevel, app: ImageRenameApp):
+    return DuplicatePanel(parent, app).build()  # Class must inherit PanelBase. Otherwise, update will not working.
+
+
+class DuplicatePanel(PanelBase, TreeMixin):
+    __slots__ = ('tree', 'parent', 'app',)
+
+    class Header(NamedTuple):
+        name = 'file_name'
+        distance = 'distance'
+        image_path = 'image_path'
+
+        def to_tuple(self) -> Tuple[str, str, str]:
+            return self.name, self.distance, self.image_path
+
+        def __getitem__(self, item: int):
+            return self.to_tuple()[item]
+
+        def __iter__(self):
+            for val in self.to_tuple():
+                yield val
+
+    EVENTS = (Event.IMG_CHANGE,)
+    DEFER_WHEN_HIDDEN = True  # only the current image matters.
+    header = Header()
+
+    def __init__(self, parent: tk.Toplevel, app: ImageRenameApp):
+        super().__init__(parent)
+        self.app = app
+        get_finder(app)  # start hashing the queue
+        self.tree = ttk.Treeview(self.parent, show='headings', columns=self.header.to_tuple(), height=8)
+        self.parent.protocol("WM_DELETE_WINDOW", lambda: self.parent.withdraw())  # hide window
+
+    def build(self):
+        for col in self.header:
+            text = col.replace('_', ' ').title()  # uppercase
+            self.tree.heading(col, text=text, command=lambda col_name=col: self.sort_by(col_name, is_descending=False))
+            self.tree.column(col, width=text_width(text))
+
+        self.tree.bind('<Double-Button>', self.select_item)
+        self.tree.grid(sticky='news')
+        self.build_scrollbar(self.parent)
+
+    def update(self, event: Event, parent_update: Callable = None):
+        if event != Event.IMG_CHANGE:
+            return
+
+        self.clear_rows()
+        finder = get_finder(self.app)
+        member_list = _other_members(self.app)
+        self.parent.title(f'Duplicates ({len(member_list)}) hashed: {finder.n_hashed}{"" if finder.is_done else "+"}')
+        for item in member_list:
+            row_data = item.path.name, 'same' if item.is_exact else item.distance, item.path.absolute()
+            self.insert_row(row_data, text=item.path.name)
+
+    def select_item(self, event):
+        query_item: Union[Tuple, str] = self.tree.item(self.tree.focus(), option='values')
+        if query_item == '':
+            return
+        _, _, img_path = query_item
+        img_path = Path(img_path)
+        col: str = self.tree.identify_column(event.x)
+        os.startfile(img_path.parent) if col == '#1' else os.startfile(img_path)
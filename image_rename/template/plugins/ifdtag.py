@@ -7,19 +7,17 @@ from pathlib import Path
 if '__file__' in globals():
     PLUGIN_IFD_TAG = Path(__file__)  # https://www.awaresystems.be/imaging/tiff/tifftags/privateifd.html
 
-try:
-    import PIL.Image
-    import PIL.ExifTags  # https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/exif.html
-except ImportError:
-    raise ImportError('Please `pip install Pillow`')
+__manifest__ = dict(  # The key_list reopens the panel after it is closed. (see engine.read_manifest)
+    panels={'IFD TAG': dict(icon_path='../../asset/icon/exif.ico', key_list=['<Alt-E>', '<Alt-e>'])},
+)
 
 import tkinter as tk
 from tkinter import ttk
-from tkinter.font import Font
 from image_rename import ImageRenameApp, Event, template
 from image_rename.template.node import PanelBase
 import image_rename
-from image_rename.api.tkmixins import TreeMixin
+from image_rename.api.tkmixins import TreeMixin, text_width
+from image_rename.api.exif import get_exif, EXIF_CACHE, ImageMetadata  # get_exif: backward compatibility
 from typing import Callable, Tuple, NamedTuple, Union, List, Dict, Iterator
 import os
 import re
@@ -27,64 +25,6 @@ import re
 register = template.Library(__name__)
 
 
-def get_exif(file_path: Union[Path, PIL.Image.Image],
-             search_list: Union[int, str, List, Tuple] = None,
-             ignore_error=True, fill_empty=None,
-             ) -> Union[int, PIL.Image.Exif, List]:
-    """
-    :param file_path: image path
-    :param search_list: if you want to get some property, then you can pass the id or name, it will return by order.
-    :param ignore_error:
-    :param fill_empty Fill the value with the flag if the value is empty.
-    :return:
-        int: -1 FileNotFoundError, or exif is None
-        PIL.Image.Exif: when the `search_list` is None, return the whole Exif
-    """
-    try:
-        if isinstance(file_path, PIL.Image.Image):
-            im = file_path
-        else:
-            im: PIL.Image.Image = PIL.Image.open(str(file_path))
-    except FileNotFoundError:
-        if ignore_error:
-            return -1
-        else:
-            raise FileNotFoundError(file_path)
-
-    exif: PIL.Image.Exif = im.getexif()
-    # print(im._getexif())
-    if not exif:
-        if ignore_error:
-            return -1
-        else:
-            raise ValueError("exif is None")
-    if search_list is None:
-        return exif
-
-    tag_by_id_exif: Dict[int, str] = PIL.ExifTags.TAGS
-    tag_by_id_gps: [int, str] = PIL.ExifTags.GPSTAGS
-    tag_by_name_exif = {tag_by_id_exif[dec_value]: exif[dec_value] for dec_value in exif if dec_value in tag_by_id_exif}
-    gps: Dict = {key: val for key, val in exif.items() if key in PIL.ExifTags.GPSTAGS}
-    gps.update(exif.get(0x8825, dict()))  # GPSTAGS is inside of the GPSInfo
-    tag_by_name_gps = {tag_by_id_gps[dec_value]: gps[dec_value] for dec_value in gps if dec_value in tag_by_id_gps}
-    if not isinstance(search_list, (list, tuple)):
-        search_list = [search_list]
-
-    result_list = []
-    for key in search_list:
-        if isinstance(key, int):
-            result_list.append(exif.get(key, gps.get(key, fill_empty)))
-            continue
-        try:
-            dec_value = int(key, 16)
-            result_list.append(exif.get(dec_value, gps.get(dec_value, fill_empty)))
-            continue
-        except ValueError:
-            ...
-        result_list.append(tag_by_name_exif.get(key, tag_by_name_gps.get(key, fill_empty)))
-    return result_list
-
-
 @register.panel(window_name='IFD TAG', icon_path=Path(image_rename.__file__).parent / Path('asset/icon/exif.ico'))
 def ifd_panel(parent: tk.Toplevel, app: ImageRenameApp):
     return IFDPanel(parent, app).build()  # Class must inherit PanelBase. Otherwise, update will not working.
@@ -133,6 +73,8 @@ class IFDPanel(PanelBase, TreeMixin):
             for val in self.to_list():
                 yield val
 
+    EVENTS = (Event.IMG_CHANGE,)
+    DEFER_WHEN_HIDDEN = True  # only the current image matters.
     header = Header()
     prop = Property('Exif Version', 'Make by', 'File Name', 'Size (h, w)', 'DateTimeOriginal', 'ColorSpace',
 
@@ -144,6 +86,8 @@ class IFDPanel(PanelBase, TreeMixin):
         super().__init__(parent)
         self.parent = parent
         self.app = app
+        if EXIF_CACHE.schedule not in app.prefetch_hooks:  # read the metadata of the next images in advance.
+            app.prefetch_hooks.append(EXIF_CACHE.schedule)
         self.tree = ttk.Treeview(self.parent,
                                  show='headings',  # ignore the index column
                                  columns=self.header.to_tuple(),
@@ -158,7 +102,7 @@ class IFDPanel(PanelBase, TreeMixin):
             self.tree.heading(col, text=text, command=lambda col_name=col: self.sort_by(col_name, is_descending=False))
             # self.tree.column("name", width=150, anchor='e')
             if width is None:
-                width = Font().measure(text)
+                width = text_width(text)
             self.tree.column(col, width=width)
 
         self.tree.bind('<Double-Button>', self.select_item)  # https://www.python-course.eu/tkinter_events_binds.php
@@ -175,24 +119,27 @@ class IFDPanel(PanelBase, TreeMixin):
         if event != Event.IMG_CHANGE:
             return
 
-        self.tree.delete(*self.tree.get_children())  # new empty tree, avoid write again.
+        self.clear_rows()  # new empty tree, avoid write again.
 
         img_path = self.app.widget_info.cur_img_path
-        im: PIL.Image.Image = PIL.Image.open(str(img_path))
-        width, height, = im.size
-        result = get_exif(im,
-                          ('ExifVersion',
-                           'Make',
-                           'DateTimeOriginal',
-                           'GPSInfo',
-                           'GPSLatitudeRef', 'GPSLatitude', 'GPSLongitudeRef', 'GPSLongitude', 'GPSAltitudeRef', 'GPSAltitude',
-                           'GPSDOP (data degree of precision)',
-                           'ColorSpace',
-                           'Contrast', 'Saturation', 'Sharpness',),
-                          ignore_error=True, fill_empty='')
-        if result == -1:
+        EXIF_CACHE.request(img_path, lambda metadata: self.fill(img_path, metadata))  # It is read on the worker thread.
+
+    def fill(self, img_path: Path, metadata: Union[ImageMetadata, None]):
+        if img_path != self.app.widget_info.cur_img_path:  # The user has gone to the next image.
+            return
+        if not metadata:
             # EXIF does not support
             return
+        width, height, = metadata.size
+        result = metadata.lookup(('ExifVersion',
+                                  'Make',
+                                  'DateTimeOriginal',
+                                  'GPSInfo',
+                                  'GPSLatitudeRef', 'GPSLatitude', 'GPSLongitudeRef', 'GPSLongitude', 'GPSAltitudeRef', 'GPSAltitude',
+                                  'GPSDOP (data degree of precision)',
+                                  'ColorSpace',
+                                  'Contrast', 'Saturation', 'Sharpness',),
+                                 fill_empty='')
 
         (exif_version, make,
          data_time_original,
@@ -201,7 +148,7 @@ class IFDPanel(PanelBase, TreeMixin):
          gps_dop,
          color_space, contrast, saturation, sharpness) = result
 
-        prop = IFDPanel.Property(exif_version.decode('utf-8'), make, img_path.name,
+        prop = IFDPanel.Property(exif_version.decode('utf-8') if isinstance(exif_version, bytes) else exif_version, make, img_path.name,
                                  f'{height}, {width}', data_time_original, color_space,
 
                                  contrast, saturation, sharpness,
@@ -213,8 +160,7 @@ class IFDPanel(PanelBase, TreeMixin):
         for key_row_data, row_data in zip(self.prop, prop):
             _, property_name = key_row_data
             _, value = row_data
-            self.tree.insert("", "end", text=property_name, values=(property_name, value))
-            self.adjust_column(row_data)
+            self.insert_row((property_name, value), text=property_name)
 
         cur_width = sum([self.tree.column(header_name)['width'] for header_name in self.header.to_tuple()])
         width, height, x_offset, y_offset = self.regex.match(self.parent.geometry()).groups()  # groupdict()
@@ -7,19 +7,17 @@ from pathlib import Path
 if '__file__' in globals():
     PLUGIN_IFD_TAG_V2 = Path(__file__)  # https://www.awaresystems.be/imaging/tiff/tifftags/privateifd.html
 
-try:
-    import PIL.Image
-    import PIL.ExifTags  # https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/exif.html
-except ImportError:
-    raise ImportError('Please `pip install Pillow`')
+__manifest__ = dict(  # The key_list reopens the panel after it is closed. (see engine.read_manifest)
+    panels={'IFD TAG2': dict(icon_path='../../asset/icon/exif.ico', key_list=['<Alt-I>', '<Alt-i>'])},
+)
 
 import tkinter as tk
 from tkinter import ttk
-from tkinter.font import Font
 from image_rename import ImageRenameApp, Event, template
 from image_rename.template.node import PanelBase
 import image_rename
-from image_rename.api.tkmixins import TreeMixin
+from image_rename.api.tkmixins import TreeMixin, text_width
+from image_rename.api.exif import get_exif, EXIF_CACHE, ImageMetadata  # get_exif: backward compatibility
 from image_rename.api.utils import init_namedtuple
 from typing import Callable, Tuple, NamedTuple, Union, List, Dict
 import os
@@ -38,64 +36,6 @@ class TTKStyle(NamedTuple):
         style.configure(f'{self.LF_NORMAL}.Label', foreground='#99FF00', background='blue', font=('courier', 15, 'bold'))
 
 
-def get_exif(file_path: Union[Path, PIL.Image.Image],
-             search_list: Union[int, str, List, Tuple] = None,
-             ignore_error=True, fill_empty=None,
-             ) -> Union[int, PIL.Image.Exif, List]:
-    """
-    :param file_path: image path
-    :param search_list: if you want to get some property, then you can pass the id or name, it will return by order.
-    :param ignore_error:
-    :param fill_empty Fill the value with the flag if the value is empty.
-    :return:
-        int: -1 FileNotFoundError, or exif is None
-        PIL.Image.Exif: when the `search_list` is None, return the whole Exif
-    """
-    try:
-        if isinstance(file_path, PIL.Image.Image):
-            im = file_path
-        else:
-            im: PIL.Image.Image = PIL.Image.open(str(file_path))
-    except FileNotFoundError:
-        if ignore_error:
-            return -1
-        else:
-            raise FileNotFoundError(file_path)
-
-    exif: PIL.Image.Exif = im.getexif()
-    # print(im._getexif())
-    if not exif:
-        if ignore_error:
-            return -1
-        else:
-            raise ValueError("exif is None")
-    if search_list is None:
-        return exif
-
-    tag_by_id_exif: Dict[int, str] = PIL.ExifTags.TAGS
-    tag_by_id_gps: [int, str] = PIL.ExifTags.GPSTAGS
-    tag_by_name_exif = {tag_by_id_exif[dec_value]: exif[dec_value] for dec_value in exif if dec_value in tag_by_id_exif}
-    gps: Dict = {key: val for key, val in exif.items() if key in PIL.ExifTags.GPSTAGS}
-    gps.update(exif.get(0x8825, dict()))  # GPSTAGS is inside of the GPSInfo
-    tag_by_name_gps = {tag_by_id_gps[dec_value]: gps[dec_value] for dec_value in gps if dec_value in tag_by_id_gps}
-    if not isinstance(search_list, (list, tuple)):
-        search_list = [search_list]
-
-    result_list = []
-    for key in search_list:
-        if isinstance(key, int):
-            result_list.append(exif.get(key, gps.get(key, fill_empty)))
-            continue
-        try:
-            dec_value = int(key, 16)
-            result_list.append(exif.get(dec_value, gps.get(dec_value, fill_empty)))
-            continue
-        except ValueError:
-            ...
-        result_list.append(tag_by_name_exif.get(key, tag_by_name_gps.get(key, fill_empty)))
-    return result_list
-
-
 @register.panel(window_name='IFD TAG2', icon_path=Path(image_rename.__file__).parent / Path('asset/icon/exif.ico'))
 def ifd_panel(parent: tk.Toplevel, app: ImageRenameApp):
     return IFDPanel(parent, app).build()  # Class must inherit PanelBase. Otherwise, update will not working.
@@ -137,6 +77,8 @@ class IFDPanel(PanelBase, TreeMixin):
         longitude: str
         altitude: str
 
+    EVENTS = (Event.IMG_CHANGE,)
+    DEFER_WHEN_HIDDEN = True  # only the current image matters.
     header = Header()
     prop_exif = EXIFProperty('Exif Version', 'Make by', 'File Name', 'Size (h, w)', 'DateTimeOriginal', 'ColorSpace',
                              'Contrast', 'Saturation', 'Sharpness',
@@ -147,6 +89,8 @@ class IFDPanel(PanelBase, TreeMixin):
     def __init__(self, parent: tk.Toplevel, app: ImageRenameApp):
         super().__init__(parent)
         self.app = app
+        if EXIF_CACHE.schedule not in app.prefetch_hooks:  # read the metadata of the next images in advance.
+            app.prefetch_hooks.append(EXIF_CACHE.schedule)
 
         ttk_style = TTKStyle()
 
@@ -173,7 +117,7 @@ class IFDPanel(PanelBase, TreeMixin):
                 tree.heading(col, text=text, command=lambda col_name=col: self.sort_by(col_name, is_descending=False, tree=tree))
                 # self.tree.column("name", width=150, anchor='e')
                 if width is None:
-                    width = Font().measure(text)
+                    width = text_width(text)
                 tree.column(col, width=width)
 
             tree.bind('<ButtonRelease-1>',  # https://www.python-course.eu/tkinter_events_binds.php
@@ -190,24 +134,27 @@ class IFDPanel(PanelBase, TreeMixin):
             return
 
         for tree in (self.exif_tree, self.gps_tree):
-            tree.delete(*tree.get_children())  # new empty tree, avoid write again.
+            self.clear_rows(tree)  # new empty tree, avoid write again.
 
         img_path = self.app.widget_info.cur_img_path
-        im: PIL.Image.Image = PIL.Image.open(str(img_path))
-        width, height, = im.size
-        result = get_exif(im,
-                          ('ExifVersion',
-                           'Make',
-                           'DateTimeOriginal',
-                           'GPSInfo',
-                           'GPSLatitudeRef', 'GPSLatitude', 'GPSLongitudeRef', 'GPSLongitude', 'GPSAltitudeRef', 'GPSAltitude',
-                           'GPSDOP (data degree of precision)',
-                           'ColorSpace',
-                           'Contrast', 'Saturation', 'Sharpness',),
-                          ignore_error=True, fill_empty='')
-        if result == -1:
+        EXIF_CACHE.request(img_path, lambda metadata: self.fill(img_path, metadata))  # It is read on the worker thread.
+
+    def fill(self, img_path: Path, metadata: Union[ImageMetadata, None]):
+        if img_path != self.app.widget_info.cur_img_path:  # The user has gone to the next image.
+            return
+        if not metadata:
             # EXIF does not support
             return
+        width, height, = metadata.size
+        result = metadata.lookup(('ExifVersion',
+                                  'Make',
+                                  'DateTimeOriginal',
+                                  'GPSInfo',
+                                  'GPSLatitudeRef', 'GPSLatitude', 'GPSLongitudeRef', 'GPSLongitude', 'GPSAltitudeRef', 'GPSAltitude',
+                                  'GPSDOP (data degree of precision)',
+                                  'ColorSpace',
+                                  'Contrast', 'Saturation', 'Sharpness',),
+                                 fill_empty='')
 
         (exif_version, make,
          data_time_original,
@@ -221,7 +168,7 @@ class IFDPanel(PanelBase, TreeMixin):
                                         f'{gps_altitude_ref} {gps_altitude}')
 
         prop_exif = IFDPanel.EXIFProperty(
-            exif_version.decode('utf-8'), make, img_path.name,
+            exif_version.decode('utf-8') if isinstance(exif_version, bytes) else exif_version, make, img_path.name,
             f'{height}, {width}', data_time_original, color_space,
             contrast, saturation, sharpness,
         )
@@ -229,8 +176,7 @@ class IFDPanel(PanelBase, TreeMixin):
                                      (self.gps_tree, self.prop_gps, prop_gps)):
             for property_name, val in zip(prop_key, prop):
                 row_data = property_name, val
-                tree.insert("", "end", text=property_name, values=row_data)
-                self.adjust_column(row_data, tree)
+                self.insert_row(row_data, tree, text=property_name)
 
         cur_width = max([sum([tree.column(header_name)['width'] for header_name in self.header.to_tuple()])
                          for tree in (self.exif_tree, self.gps_tree)
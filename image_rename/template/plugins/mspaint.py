@@ -8,10 +8,12 @@ from subprocess import Popen, PIPE, DEVNULL
 if '__file__' in globals():
     PLUGIN_MS_PAINT = Path(__file__)  # __file__ not in loader.exec_module
 
+__manifest__ = dict(hotkeys={'start_ms_paint': ['<Alt-P>', '<Alt-p>']})  # It runs when the hotkey is pressed. (see engine.read_manifest)
+
 register = template.Library(__name__)
 
 
-@register.hotkey(key_list=['<Alt-P>', '<Alt-p>'])
+@register.hotkey(key_list=__manifest__['hotkeys']['start_ms_paint'])
 def start_ms_paint(app: ImageRenameApp):
     job = Popen(['mspaint', str(app.widget_info.cur_img_path)], stdout=PIPE, stderr=PIPE, stdin=DEVNULL)
     job.communicate()  # waiting for the job done.
@@ -0,0 +1,167 @@
+"""
+The benchmarks of the hot spots.
+
+USAGE::
+
+    python -m image_rename.test.benchmark compositor
+    python -m image_rename.test.benchmark exif
+    python -m image_rename.test.benchmark similarity
+    python -m image_rename.test.benchmark importtime
+    python -m image_rename.test.benchmark journal
+"""
+import argparse
+import subprocess
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List
+
+if 'env path':
+    from pathlib import Path
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    import numpy as np
+    from image_rename.api.imagehelper import append_image_to_news, compose_mosaic
+    from image_rename.api.exif import read_metadata, read_metadata_by_pil
+    from image_rename.api.similarity import greedy_path, similarity_order
+    from image_rename.api.journal import encode_record, read_journal
+    from image_rename.api.journalindex import JournalIndex
+    import PIL.Image
+
+    sys.path.remove(sys.path[0])
+
+
+def report(title: str, base: float, new: float):
+    print(f'{title:<24} {base * 1000:>10.2f}ms {new * 1000:>10.2f}ms {base / new:>8.1f}x')
+
+
+def bench_compositor(repeat=5):
+    """
+    append_image_to_news (copy the whole accumulated image for each append) vs. compose_mosaic (one buffer).
+    """
+    rng = np.random.default_rng(0)
+    print(f'{"n":<24} {"append":>12} {"compose":>12} {"speedup":>9}')
+    for n in range(2, 17):
+        img_list = [rng.integers(0, 255, (600, 800, 3), dtype=np.uint8) for _ in range(n)]
+        base = min(timeit.repeat(lambda: append_image_to_news(img_list[0], img_list[1:], direction='r'),
+                                 number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: compose_mosaic(img_list, highlight_idx=0, highlight_color=(0, 0, 255),
+                                                       border_thickness=10),
+                                number=1, repeat=repeat))
+        report(f'{n}', base, new)
+
+
+def bench_exif(number=20, repeat=5):
+    """
+    Pillow (open + getexif) vs. ifdparser (the header only).
+    """
+    test_img_path = Path(__file__).parent / Path('image/gpstag_test.jpg')
+    exif = PIL.Image.open(test_img_path).getexif()
+    rng = np.random.default_rng(0)
+    big_img = PIL.Image.fromarray(rng.integers(0, 255, (3000, 4000, 3), dtype=np.uint8))
+    print(f'{"file":<24} {"pillow":>12} {"header":>12} {"speedup":>9}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path_list = [test_img_path]
+        for name, options in (('4000x3000.tif', dict()), ('4000x3000.png', dict(compress_level=1))):
+            path_list.append(Path(temp_dir) / Path(name))
+            big_img.save(path_list[-1], exif=exif, **options)
+        for path in path_list:
+            base = min(timeit.repeat(lambda: read_metadata_by_pil(path), number=number, repeat=repeat)) / number
+            new = min(timeit.repeat(lambda: read_metadata(path), number=number, repeat=repeat)) / number
+            report(path.name, base, new)
+
+
+def bench_similarity():
+    """
+    The nearest neighbour of the whole queue (O(n^2)) vs. clustering first (k-means + the nearest neighbour of each cluster).
+    """
+    rng = np.random.default_rng(0)
+    center = rng.normal(size=(200, 192)).astype(np.float32)
+    print(f'{"n":<24} {"greedy":>12} {"cluster":>12} {"speedup":>9}')
+    for n in (2000, 10000, 100000):
+        x = (center[rng.integers(0, len(center), n)] + 0.1 * rng.normal(size=(n, 192))).astype(np.float32)
+        base = timeit.timeit(lambda: greedy_path(x), number=1) if n <= 10000 else float('nan')
+        new = timeit.timeit(lambda: similarity_order(x), number=1)
+        report(f'{n}', base, new)
+
+
+def import_time(statement: str) -> float:
+    """
+    :return: the seconds of the imports which are done by the `statement`. (``python -X importtime``, the modules of the startup are excluded)
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=str(Path(__file__).parent.parent.parent),
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    row_list: List[List[str]] = [line.split('|') for line in stderr.splitlines() if line.startswith('import time:')][1:]
+    idx_site = max(idx for idx, (_, _, name) in enumerate(row_list) if name.strip() == 'site')
+    return sum(int(cumulative) for _, cumulative, name in row_list[idx_site + 1:] if not name.startswith('  ')) / 1e6
+
+
+def bench_importtime(repeat=5):
+    """
+    The eager imports (``image_rename.core``, the plugins) vs. the lazy ``image_rename``.
+    """
+    base = min(import_time('import image_rename; image_rename.ImageRenameApp; image_rename.Engine') for _ in range(repeat))
+    print(f'{"import":<24} {"eager":>12} {"lazy":>12} {"speedup":>9}')
+    for statement in ('import image_rename', 'import image_rename.cli'):
+        report(statement, base, min(import_time(statement) for _ in range(repeat)))
+
+
+def bench_journal(n_list=(100_000, 1_000_000), n_query=20):
+    """
+    Scan the journal (grep) vs. JournalIndex (SQLite), per query. The records are chains: img_i -> cat_i -> dog_i
+    """
+    print(f'{"n query":<24} {"scan":>12} {"index":>12} {"speedup":>9}')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir).absolute() / Path('data')
+
+        def path_of(name: str, i: int) -> str:
+            return str(data_dir / Path(f'{name}_{i}.png'))
+
+        for n in n_list:
+            log_path = Path(temp_dir) / Path(f'{n}.txt')
+            with open(log_path, 'w', encoding='utf-8', newline='\n') as f:
+                for i in range(n // 2):
+                    f.write(encode_record((path_of('img', i), path_of('cat', i), f'{i:032x}'), 2 * i))
+                    f.write(encode_record((path_of('cat', i), path_of('dog', i), f'{i:032x}'), 2 * i + 1))
+            with JournalIndex(Path(temp_dir) / Path(f'{n}.db')) as index:
+                begin_time = time.perf_counter()
+                index.ingest(log_path)
+                print(f'{n} ingest: {time.perf_counter() - begin_time:.1f}s')
+                i_list = list(range(0, n // 2, n // 2 // n_query))
+                for i in i_list:  # They are hits, not misses.
+                    assert [(e.old, e.new) for e in index.by_old(path_of('cat', i))] == [(path_of('cat', i), path_of('dog', i))]
+                    assert index.origin(path_of('dog', i)) == Path(path_of('img', i))
+                assert len(index.between(n // 2, n // 2 + 100)) == 100
+
+                target = path_of('cat', n // 4)  # the scan stops at the first hit, it is in the middle.
+                base = timeit.timeit(lambda: next(record for record, _ in read_journal(log_path) if record.fields[0] == target), number=1)
+                new = timeit.timeit(lambda: [index.by_old(path_of('cat', i)) for i in i_list], number=1) / len(i_list)
+                report(f'{n} by_old', base, new)
+                new = timeit.timeit(lambda: [index.origin(path_of('dog', i)) for i in i_list], number=1) / len(i_list)
+                report(f'{n} origin', base, new)
+                new = timeit.timeit(lambda: index.between(n // 2, n // 2 + 100), number=1)
+                report(f'{n} between (100)', base, new)
+
+
+DICT_BENCH: Dict[str, Callable] = dict(
+    compositor=bench_compositor,
+    exif=bench_exif,
+    similarity=bench_similarity,
+    importtime=bench_importtime,
+    journal=bench_journal,
+)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog='benchmark')
+    arg_parser.add_argument('name', choices=list(DICT_BENCH) + ['all'])
+    args = arg_parser.parse_args()
+    for name, bench_func in DICT_BENCH.items():
+        if args.name in (name, 'all'):
+            print(f'[{name}]')
+            bench_func()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,12 @@
 from unittest import TestCase
 import unittest
+import asyncio
+import contextlib
+import io
+import types
+import tempfile
 import os
+import cv2
 
 if 'env path':
     from pathlib import Path
@@ -10,8 +16,33 @@ if 'env path':
     from image_rename import (
         __version__,
     )
-    from image_rename.cli import main as cli_main
+    from image_rename.cli import main as cli_main, batch_main, journal_main
+    from image_rename.api.batch import read_plan
     from image_rename.api.utils import after_end
+    from image_rename.api.imagecache import ImageCache
+    from image_rename.api.prefetch import Prefetcher
+    from image_rename.api.dirindex import DirNameIndex, DirIndexRegistry
+    from image_rename.api.scanner import ImageScanner
+    from image_rename.api.planner import RenamePlanner, RenameRow, rename_no_replace
+    from image_rename.api.journal import RenameJournal, read_journal
+    from image_rename.api.journalindex import JournalIndex, file_hash
+    from image_rename.api.session import RenameSession, fingerprint
+    from image_rename.api.exif import ExifCache, get_exif, read_metadata, read_metadata_by_pil
+    from image_rename.api.ifdparser import read_ifd
+    from image_rename.api.metaindex import MetadataIndex
+    from image_rename.api.nametemplate import NameTemplate
+    from image_rename.api.dedup import DuplicateFinder, BKTree, hamming
+    from image_rename.api.similarity import order_by_similarity, similarity_order
+    from image_rename.api.history import HistoryModel
+    from image_rename.api.tkmixins import TreeMixin, text_width
+    from image_rename.template.engine import Engine, LazyLibrary, read_manifest
+    from image_rename.template.exceptions import InvalidTemplateLibrary
+    from image_rename.template.plugins import PLUGIN_MS_PAINT, PLUGIN_IFD_TAG, PLUGIN_IFD_TAG_V2, PLUGIN_DUPLICATES
+    from image_rename.template.base import Parser
+    import numpy as np
+    import PIL.Image
+    from image_rename.api.imagehelper import get_image_size, get_preview_flag, append_image_to_news, compose_mosaic, StripCompositor
+    from image_rename.core import imread, Event, JobState, JobRegistry, PanelRegistry
 
     sys.path.remove(sys.path[0])
 
@@ -43,6 +74,673 @@ class CLITests(unittest.TestCase):
         self.assertTrue(len(__version__) > 0)
 
 
+class BatchRenameTests(unittest.TestCase):
+    def test_batch_main(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('1.png', '2.png', '3.png', 'X.png'):
+                (temp_dir / Path(name)).touch()
+            plan_path = temp_dir / Path('plan.tsv')
+            with open(plan_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(['\t'.join([str(temp_dir / Path(old)), str(temp_dir / Path(new))])
+                                   for old, new in (('1.png', 'a.png'),
+                                                    ('2.png', 'x.png'),  # FileExistsError (case insensitive)
+                                                    ('3.png', 'a?.png'),  # ILLEGAL_CHARS
+                                                    ('4.png', 'b.png'),  # FileNotFoundError
+                                                    )]))
+            self.assertEqual(batch_main([str(plan_path), '--dry-run']), 1)
+            self.assertTrue((temp_dir / Path('1.png')).exists())
+            self.assertEqual(batch_main([str(plan_path)]), 1)
+            self.assertEqual(sorted(_.name for _ in temp_dir.glob('*.png')), ['2.png', '3.png', 'X.png', 'a.png'])
+
+    def test_template(self):
+        import shutil
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+                shutil.copy(Path(__file__).parent / Path('image/gpstag_test.jpg'), temp_dir / Path(name))
+            (temp_dir / Path('asus_001.jpg')).touch()
+            (temp_dir / Path('1.png')).touch()
+
+            template = NameTemplate('{DateTimeOriginal:%Y%m%d}_{Make}_{seq:02d}{Unknown}')
+            self.assertEqual(template.format(temp_dir / Path('a.jpg'), 0, read_metadata(temp_dir / Path('a.jpg'))), '20200807_ASUS_01')
+            rows = NameTemplate('{Make}').propose(sorted(temp_dir.glob('[abc].jpg')))
+            self.assertEqual([row.new.name for row in rows], ['ASUS.jpg', 'ASUS_002.jpg', 'ASUS_003.jpg'])
+            rows = NameTemplate('{stem}').propose([temp_dir / Path('a.jpg'), temp_dir / Path('b.jpg')])
+            self.assertEqual([row.new.name for row in rows], ['a.jpg', 'b.jpg'])  # They are free since they leave.
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):  # ILLEGAL_CHARS
+                self.assertEqual(batch_main([str(temp_dir), '--template', '{stem}?', '--extensions', 'jpg', '--dry-run']), 1)
+            self.assertEqual(sorted(Path(line.split('\t')[0]).name for line in stdout.getvalue().splitlines()),
+                             ['a.jpg', 'asus_001.jpg', 'b.jpg', 'c.jpg'])  # only the plan, the errors are in the stderr.
+            self.assertIn('ILLEGAL_CHARS', stderr.getvalue())
+
+            self.assertEqual(batch_main([str(temp_dir), '--template', '{Make}', '--extensions', 'jpg']), 0)
+            self.assertEqual(sorted(_.name for _ in temp_dir.glob('*.jpg')), ['ASUS.jpg', 'ASUS_002.jpg', 'ASUS_003.jpg', 'asus_001.jpg'])
+
+    def test_collision_scaling(self):
+        """
+        The same name for the whole queue (e.g. ``{Make}``) is resolved in O(n), not O(n^2).
+        """
+        import timeit
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            (temp_dir / Path('ASUS_002.jpg')).touch()
+            template = NameTemplate('{Make}')
+
+            def resolve(n: int):
+                return template.resolve_collisions([RenameRow(temp_dir / Path(f'{i}.jpg'), temp_dir / Path('ASUS.jpg'), i)
+                                                    for i in range(n)])
+            rows = resolve(4000)
+            self.assertEqual([row.new.name for row in rows[:3]], ['ASUS.jpg', 'ASUS_001.jpg', 'ASUS_003.jpg'])
+            self.assertEqual(len({row.new.name.casefold() for row in rows}), 4000)
+            small, large = [min(timeit.repeat(lambda: resolve(n), number=1, repeat=3)) for n in (1000, 4000)]
+            self.assertLess(large / small, 8)  # 4x rows: about 4x time. (O(n^2): 16x)
+
+    def test_cycle_and_chain(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('a', 'b', 'c', 'x', 'y'):
+                (temp_dir / Path(f'{name}.png')).write_text(name)
+            plan = [('a', 'b'), ('b', 'c'), ('c', 'a'),  # cycle
+                    ('x', 'y'), ('y', 'z')]  # chain
+            row_list = [RenameRow(temp_dir / Path(f'{old}.png'), temp_dir / Path(f'{new}.png')) for old, new in plan]
+            sequence_list = RenamePlanner(row_list).plan()
+            self.assertEqual(sorted(len(sequence) for sequence in sequence_list), [2, 4])  # the cycle of 3 needs 4 renames.
+
+            plan_path = temp_dir / Path('plan.tsv')
+            plan_path.write_text('\n'.join(f'{row.old}\t{row.new}' for row in row_list), encoding='utf-8')
+            self.assertEqual(batch_main([str(plan_path)]), 0)
+            self.assertEqual({_.stem: _.read_text() for _ in temp_dir.glob('*.png')},
+                             dict(b='a', c='b', a='c', y='x', z='y'))
+
+    def test_rejected_row_keeps_target(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('a', 'b', 'd', 'e', 'f'):
+                (temp_dir / Path(f'{name}.png')).write_text(name)
+            plan = [('a', 'b'), ('b', 'c?'),  # `b` does not leave, so `a` can't take its name.
+                    ('d', 'e'), ('e', 'f')]  # `f` exists, so `e` does not leave.
+            plan_path = temp_dir / Path('plan.tsv')
+            plan_path.write_text('\n'.join(f'{temp_dir / Path(old + ".png")}\t{temp_dir / Path(new + ".png")}'
+                                           for old, new in plan), encoding='utf-8')
+            self.assertEqual(batch_main([str(plan_path), '--dry-run']), 1)
+            self.assertEqual(batch_main([str(plan_path)]), 1)
+            self.assertEqual({_.stem: _.read_text() for _ in temp_dir.glob('*.png')},
+                             dict(a='a', b='b', d='d', e='e', f='f'))
+            with self.assertRaises(FileExistsError):  # the target appears after the validation.
+                rename_no_replace(temp_dir / Path('e.png'), temp_dir / Path('d.png'))
+            self.assertEqual({_.stem: _.read_text() for _ in temp_dir.glob('*.png')},
+                             dict(a='a', b='b', d='d', e='e', f='f'))
+
+
+class JournalTests(unittest.TestCase):
+    def test_torn_record(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = Path(temp_dir) / Path('change_log.txt')
+            journal = RenameJournal(log_path, flush_interval=60, flush_count=2)
+            journal.append('a.png', 'b.png')
+            journal.append('c.png', 'd.png')
+            journal.append('e.png', 'f.png')
+            journal.close()
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write('g.png\th.png\t1.0\t')  # crash while writing
+
+            journal = RenameJournal(log_path)  # the earlier session is kept.
+            journal.append('i.png', 'j.png')
+            journal.close()
+            self.assertEqual([record.fields for record, _ in read_journal(log_path)],
+                             [('a.png', 'b.png'), ('c.png', 'd.png'), ('e.png', 'f.png'), ('i.png', 'j.png')])
+            self.assertEqual([row.new.name for row in read_plan(log_path)], ['b.png', 'd.png', 'f.png', 'j.png'])
+
+    def test_index(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            a, b, c, d = [str(temp_dir / Path(name)) for name in ('a.png', 'b.png', 'c.png', 'd.png')]
+            log_path = temp_dir / Path('change_log.txt')
+            journal = RenameJournal(log_path)
+            journal.append(a, b, 'hash_1', timestamp=1.0)
+            journal.append(b, c, 'hash_1', timestamp=2.0)
+            journal.append(d, a, 'hash_2', timestamp=3.0)  # another file reuses the name `a`
+            journal.flush()
+
+            db_path = temp_dir / Path('journal.db')
+            with JournalIndex(db_path) as index:
+                self.assertEqual(index.ingest(log_path), 3)
+                self.assertEqual(index.ingest(log_path), 0)
+                journal.append(a, d, 'hash_2', timestamp=4.0)
+                journal.close()
+                self.assertEqual(index.ingest(log_path), 1)
+
+                self.assertEqual([(e.old, e.new) for e in index.history(c)], [(a, b), (b, c)])
+                self.assertEqual(index.origin(c), Path(a))
+                self.assertEqual(index.origin(d), Path(d))  # d -> a -> d
+                self.assertEqual([e.new for e in index.future(a)], [b, c])
+                self.assertEqual([e.timestamp for e in index.by_hash('hash_2')], [3.0, 4.0])
+                self.assertEqual([e.timestamp for e in index.by_old(a)], [1.0, 4.0])
+                self.assertEqual([e.timestamp for e in index.between(2.0, 4.0)], [2.0, 3.0])
+            self.assertEqual(journal_main([str(db_path), '--origin', c]), 0)
+            self.assertEqual(journal_main([str(db_path), '--until', '1970-01-03']), 0)  # open-ended
+            with self.assertRaises(SystemExit):
+                journal_main([str(db_path), '--old', a, '--until', '1970-01-03'])
+
+    def test_relative_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            log_path = temp_dir / Path('change_log.txt')
+            journal = RenameJournal(log_path)
+            journal.append('a.png', 'sub/../b.png', timestamp=1.0)  # relative to the current directory
+            journal.append(str(Path('b.png').absolute()), 'c.png', timestamp=2.0)
+            journal.close()
+            with JournalIndex(temp_dir / Path('journal.db')) as index:
+                self.assertEqual(index.ingest(log_path), 2)
+                self.assertEqual([e.timestamp for e in index.by_old('a.png')], [1.0])
+                self.assertEqual([e.timestamp for e in index.by_new(Path('b.png').absolute())], [1.0])
+                self.assertEqual(index.origin('c.png'), Path('a.png').absolute())
+
+    def test_batch_journal(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            a, b, c = [temp_dir / Path(name) for name in ('a.png', 'b.png', 'c.png')]
+            a.write_text('a'), b.write_text('b')
+            plan_path, log_path = temp_dir / Path('plan.tsv'), temp_dir / Path('batch_log.txt')
+            plan_path.write_text(f'{a}\t{b}\n{b}\t{c}\n', encoding='utf-8')  # a -> b -> c
+            self.assertEqual(batch_main([str(plan_path), '--journal', str(log_path)]), 0)
+            with JournalIndex(temp_dir / Path('journal.db')) as index:
+                self.assertEqual(index.ingest(log_path), 2)
+                self.assertEqual([(Path(e.old).name, Path(e.new).name) for e in index.by_new(b)], [('a.png', 'b.png')])
+                self.assertEqual([e.hash for e in index.by_old(b)], [file_hash(c)])
+
+
+class RenameSessionTests(unittest.TestCase):
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            img_path_list = [temp_dir / Path(f'{i}.png') for i in range(5)]
+            [path.touch() for path in img_path_list]
+            session_dir = temp_dir / Path('.session')
+
+            session = RenameSession.open(session_dir, img_path_list)
+            session.set_cursor(0, img_path_list[0])
+            session.skip(0, img_path_list[0])
+            session.set_cursor(1, img_path_list[1])
+            session.begin_rename(img_path_list[1], temp_dir / Path('cat.png'))
+            img_path_list[1].rename(temp_dir / Path('cat.png'))
+            session.done(1, img_path_list[1], temp_dir / Path('cat.png'))
+            session.set_cursor(2, img_path_list[2])
+            session.begin_rename(img_path_list[2], temp_dir / Path('dog.png'))
+            img_path_list[2].rename(temp_dir / Path('dog.png'))  # crash before writing `done`
+            session.journal.close()
+
+            new_list = sorted(temp_dir.glob('*.png'))  # cat, dog, 3, 4
+            self.assertEqual(fingerprint(new_list), fingerprint(img_path_list))
+            session = RenameSession(session.path)
+            self.assertEqual(session.n_done, 3)
+            self.assertEqual([path.name for path in new_list if not session.is_done(path)], ['3.png', '4.png'])
+            self.assertEqual(session.resume_index(img_path_list), 2)
+            self.assertEqual(session.resume_index(new_list), 0)
+            session.skip(0, new_list[2])
+            session.journal.close()
+
+    def test_rename_file(self):
+        """
+        The renames of the plugins (e.g. ``rename_duplicates``) go to the session and the ``rename_hooks`` too.
+        """
+        from image_rename.core import RenameFactory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            a, b, c = [temp_dir / Path(name) for name in ('a.png', 'b.png', 'c.png')]
+            a.write_text('a'), b.write_text('b')
+            log_list = []
+            app = types.SimpleNamespace(session=RenameSession.open(temp_dir / Path('.session'), [a, b]),
+                                        rename_hooks=[lambda app, old, new: log_list.append((old.name, new.name))])
+            RenameFactory.rename_file(app, a, c)
+            with self.assertRaises(FileExistsError):
+                RenameFactory.rename_file(app, b, c)
+            app.session.journal.close()
+            self.assertEqual(log_list, [('a.png', 'c.png')])
+            self.assertTrue(RenameSession(app.session.path).is_done(c))
+            self.assertEqual((c.read_text(), b.read_text()), ('a', 'b'))
+
+
+class ExifCacheTests(unittest.TestCase):
+    def test_request(self):
+        img_path = Path(__file__).parent / Path('image/gpstag_test.jpg')
+        self.assertEqual(get_exif(img_path, ('ExifVersion', 'Make', 'GPSLatitudeRef', '0x0110', 'Unknown'), fill_empty=''),
+                         [b'0220', 'ASUS', 'N', 'ASUS_I01WD', ''])
+        self.assertEqual(get_exif(Path(__file__).parent / Path('image/222.bmp')), -1)
+        self.assertIsInstance(get_exif(img_path), PIL.Image.Exif)  # the same type as before (plugins index it)
+
+        n_read = []
+        cache = ExifCache(max_size=1, reader=lambda path: n_read.append(path) or read_metadata(path))
+        loop = asyncio.new_event_loop()
+        try:
+            result = loop.create_future()
+            cache.request(img_path, lambda metadata: result.set_result(metadata), loop)
+            metadata = loop.run_until_complete(asyncio.wait_for(result, 5))
+            self.assertEqual(metadata.size, (839, 1148))
+            cache.request(img_path, lambda m: self.assertIs(m, metadata), loop)  # cached, it is called right now.
+            cache.schedule([Path(__file__).parent / Path('image/1.png')])
+            cache.executor.shutdown(wait=True)
+            self.assertEqual(len(n_read), 2)
+            self.assertEqual(len(cache), 1)  # bounded
+            self.assertIsNone(cache.get(img_path))
+        finally:
+            loop.close()
+
+    def test_header_parser(self):
+        img_path = Path(__file__).parent / Path('image/gpstag_test.jpg')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path_list = [img_path, Path(__file__).parent / Path('image/1.png')]
+            with PIL.Image.open(img_path) as im:
+                for name in ('exif.tif', 'exif.png'):
+                    path_list.append(Path(temp_dir) / Path(name))
+                    im.save(path_list[-1], exif=im.getexif())
+            for path in path_list:
+                self.assertIsNotNone(read_ifd(path))
+                self.assertEqual(read_metadata(path), read_metadata_by_pil(path))
+        self.assertIsNone(read_ifd(Path(__file__).parent / Path('image/222.bmp')))  # Pillow
+
+
+class MetadataIndexTests(unittest.TestCase):
+    def test_refresh(self):
+        import shutil
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('gpstag_test.jpg', '1.png', '222.bmp'):
+                shutil.copy(Path(__file__).parent / Path('image') / Path(name), temp_dir / Path(name))
+            scanner = lambda: ImageScanner(temp_dir, extensions=('png', 'bmp', 'jpg'))
+            with MetadataIndex(temp_dir / Path('metadata.db'), max_workers=0) as index:
+                self.assertEqual(tuple(index.refresh(scanner())), (3, 3, 0))
+                self.assertEqual(tuple(index.refresh(scanner())), (3, 0, 0))  # unchanged
+                self.assertEqual(index.get(temp_dir / Path('gpstag_test.jpg'))['make'], 'ASUS')
+                self.assertEqual(index.get(temp_dir / Path('222.bmp'))['width'], 256)
+                self.assertEqual([path.name for path in index.select('make = ?', ('ASUS',))], ['gpstag_test.jpg'])
+
+                os.remove(temp_dir / Path('1.png'))
+                with open(temp_dir / Path('222.bmp'), 'ab') as f:
+                    f.write(b'\0')
+                self.assertEqual(tuple(index.refresh(scanner())), (2, 1, 1))
+                self.assertEqual([path.name for path in index.refresh_and_select(scanner(), order_by='file_size DESC')],
+                                 ['gpstag_test.jpg', '222.bmp'])
+
+
+class DuplicateFinderTests(unittest.TestCase):
+    def test_bk_tree(self):
+        rng = np.random.default_rng(0)
+        value_list = [int(v) for v in rng.integers(0, 1 << 63, 500, dtype=np.int64)]
+        value_list += [v ^ (1 << bit) for v in value_list[:50] for bit in (3, 40)]  # near
+        tree = BKTree()
+        [tree.add(v, i) for i, v in enumerate(value_list)]
+        for query in value_list[:10]:
+            expected = sorted((hamming(query, v), i) for i, v in enumerate(value_list) if hamming(query, v) <= 4)
+            self.assertEqual(sorted(tree.search(query, 4)), expected)
+        self.assertTrue(tree.remove(value_list[0], 0))
+        self.assertNotIn((0, 0), tree.search(value_list[0], 0))
+
+    def test_group(self):
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            img = cv2.GaussianBlur(rng.integers(0, 255, (600, 800, 3), dtype=np.uint8), (51, 51), 0)
+            cv2.imwrite(str(temp_dir / Path('a.jpg')), img)
+            (temp_dir / Path('a_copy.jpg')).write_bytes((temp_dir / Path('a.jpg')).read_bytes())
+            cv2.imwrite(str(temp_dir / Path('a_small.png')), cv2.resize(img, (400, 300)))
+            cv2.imwrite(str(temp_dir / Path('b.jpg')), cv2.GaussianBlur(rng.integers(0, 255, (600, 800, 3), dtype=np.uint8), (51, 51), 0))
+            (temp_dir / Path('broken.jpg')).write_bytes(b'not an image')
+            path_list = sorted(temp_dir.glob('*.*g'))
+
+            finder = DuplicateFinder(temp_dir / Path('hash.db'), max_workers=0, chunk_size=2)
+            finder.build(path_list)
+            self.assertEqual(len(finder), 5)
+            self.assertEqual([(item.path.name, item.is_exact) for item in finder.group(path_list[0])],
+                             [('a_copy.jpg', True), ('a_small.png', False)])
+            self.assertEqual(finder.group(temp_dir / Path('b.jpg')), [])
+            finder.discard(temp_dir / Path('a_copy.jpg'))
+            self.assertEqual([item.path.name for item in finder.group(path_list[0])], ['a_small.png'])
+
+            finder = DuplicateFinder(temp_dir / Path('hash.db'), max_workers=0)
+            finder.build(path_list)  # from the cache
+            self.assertEqual(len(finder.group(path_list[0])), 2)
+
+
+class SimilarityTests(unittest.TestCase):
+    def test_order(self):
+        rng = np.random.default_rng(0)
+        center = rng.normal(size=(20, 16))
+        label = np.arange(2000) % len(center)  # interleaved
+        x = (center[label] + 0.01 * rng.normal(size=(len(label), 16))).astype(np.float32)
+        order = similarity_order(x, n_cluster=25)
+        self.assertEqual(sorted(order), list(range(len(label))))
+        self.assertLessEqual(int((np.diff(label[order]) != 0).sum()), 2 * len(center))  # each group is (almost) together
+
+    def test_order_by_similarity(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            path_list = []
+            for i, color in enumerate([(0, 0, 255), (255, 0, 0), (0, 0, 250), (250, 0, 0), (0, 0, 245)]):
+                path_list.append(temp_dir / Path(f'{i}.png'))
+                img = np.full((64, 64, 3), color, dtype=np.uint8)
+                img[:32] //= 2
+                cv2.imwrite(str(path_list[-1]), img)
+            path_list.insert(2, temp_dir / Path('broken.png'))
+            path_list[2].write_bytes(b'')
+            result = [path.name for path in order_by_similarity(path_list, max_workers=0)]
+            self.assertEqual(result[-1], 'broken.png')
+            pos_list = sorted(result.index(f'{i}.png') for i in (0, 2, 4))  # red
+            self.assertEqual(pos_list, list(range(pos_list[0], pos_list[0] + 3)))
+
+
+class HistoryModelTests(unittest.TestCase):
+    def test_ring(self):
+        model = HistoryModel(max_size=3)
+        for name in ('b.png', 'a.png', 'B2.png', 'c.png'):
+            model.append(Path(name))
+        self.assertEqual(len(model), 3)
+        self.assertEqual([model[idx].name for idx in range(len(model))], ['c.png', 'B2.png', 'a.png'])  # b.png is dropped.
+        self.assertIsNone(model.get(0))
+        self.assertEqual(model.search('b'), [2])
+        model.replace_latest(Path('b3.png'))  # renamed
+        self.assertEqual([model.get(seq).name for seq in model.search('B')], ['b3.png', 'B2.png'])
+        self.assertEqual([model.get(seq).name for seq in model.search('', by_name=True)], ['a.png', 'B2.png', 'b3.png'])
+        self.assertEqual(model.search('x'), [])
+
+
+class TreeMixinTests(unittest.TestCase):
+    def setUp(self):
+        import tkinter as tk
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:  # no display
+            self.skipTest(str(e))
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_sort(self):
+        from tkinter import ttk
+
+        class Panel(TreeMixin):
+            __slots__ = ('tree',)
+            header = ('name', 'size')
+
+        panel = Panel()
+        panel.tree = ttk.Treeview(self.root, show='headings', columns=Panel.header)
+        for col in Panel.header:
+            panel.tree.column(col, width=1)
+        for row_data in [('b.png', 3), ('c.png', 1), ('a_long_name.png', 2)]:
+            panel.insert_row(row_data)
+        panel.sort_by('name', is_descending=False)
+        self.assertEqual([panel.tree.set(item_id, 'name') for item_id in panel.tree.get_children()],
+                         ['a_long_name.png', 'b.png', 'c.png'])
+        panel.sort_by('size', is_descending=True)
+        self.assertEqual([panel.tree.set(item_id, 'size') for item_id in panel.tree.get_children()], ['3', '2', '1'])
+        self.assertEqual(panel.tree.column('name', width=None), text_width('a_long_name.png'))
+        panel.clear_rows()
+        self.assertEqual(panel.tree.get_children(), ())
+
+
+class ImportTimeTests(unittest.TestCase):
+    def test_lazy_import(self):
+        """
+        ``img_rename --version`` does not need tkinter, cv2, numpy, Pillow. (``python -m image_rename.test.benchmark importtime``)
+        """
+        import subprocess
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import image_rename, image_rename.cli'],
+                                cwd=str(Path(__file__).parent.parent.parent),
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+        set_module = {line.split('|')[-1].strip() for line in stderr.splitlines() if line.startswith('import time:')}
+        self.assertFalse(set_module & {'tkinter', 'cv2', 'numpy', 'PIL', 'grid_extractor', 'image_rename.core',
+                                       'image_rename.template.engine', 'image_rename.template.plugins.ifdtag'})
+
+
+class EngineTests(unittest.TestCase):
+    def test_lazy_plugin(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            plugin_path = Path(temp_dir) / Path('my_plugin.py')
+            plugin_path.write_text('\n'.join([
+                "__manifest__ = dict(hotkeys={'hello': ['<F9>']}, panels={'My Panel': dict(key_list=['<F10>'], open_on_start=False)})",
+                "from image_rename import template",
+                "open('loaded.txt', 'w').close()",  # It runs in the directory of the plugin.
+                "register = template.Library(__name__)",
+                "@register.hotkey(__manifest__['hotkeys']['hello'])",
+                "def hello(app, jobs): app.append(jobs)",
+                "@register.panel('My Panel')",
+                "def my_panel(parent, app): app.append(parent)",
+            ]))
+            engine = Engine([plugin_path])
+            lib = engine.template_builtins[0]
+            self.assertIsInstance(lib, LazyLibrary)
+            self.assertFalse((Path(temp_dir) / Path('loaded.txt')).exists())
+            nodelist = Parser(engine.template_builtins).parse()
+            self.assertEqual([getattr(node, 'name', getattr(node, 'window_name', None)) for node in nodelist][:2],
+                             ['hello', 'open_panel:My Panel'])
+            self.assertTrue([node for node in nodelist if getattr(node, 'window_name', None) == 'My Panel'][0].is_lazy)
+
+            result = []
+            lib.hotkeys['hello'][0](result, 'jobs')
+            lib.panels['My Panel'][0]('parent', result)
+            self.assertEqual(result, ['jobs', 'parent'])
+            self.assertTrue((Path(temp_dir) / Path('loaded.txt')).exists())
+
+            plugin_path.write_text(plugin_path.read_text().replace("__manifest__['hotkeys']['hello']", "'<F8>'"))
+            with self.assertRaises(InvalidTemplateLibrary):  # The key_list of the manifest and the register drift apart.
+                LazyLibrary(plugin_path, read_manifest(plugin_path)).library
+
+    def test_builtin_manifest(self):
+        for plugin_path in (PLUGIN_MS_PAINT, PLUGIN_IFD_TAG, PLUGIN_IFD_TAG_V2, PLUGIN_DUPLICATES):
+            lib = LazyLibrary(plugin_path, read_manifest(plugin_path))
+            self.assertIsNotNone(lib.library)
+            self.assertEqual([getattr(func, 'is_lazy') for func, _ in lib.panels.values()],
+                             [plugin_path == PLUGIN_DUPLICATES] * len(lib.panels))  # The configured panels open on the start.
+
+
+class ImageCacheTests(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.work_dir = Path(__file__).parent / Path('image')
+
+    def test_hit_and_miss(self):
+        cache = ImageCache()
+        img_path = self.work_dir / Path('1.png')
+        np_img = imread(img_path, cache=cache)
+        self.assertIs(np_img, imread(img_path, cache=cache))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertFalse(np_img.flags.writeable)
+
+    def test_evict_by_bytes(self):
+        img_list = [self.work_dir / Path(name) for name in ('1.png', '2.png', 'user.png')]
+        nbytes_list = [imread(img_path).nbytes for img_path in img_list]
+        cache = ImageCache(max_bytes=sum(nbytes_list[1:]))
+        for img_path in img_list:
+            imread(img_path, cache=cache)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.cur_bytes, cache.max_bytes)
+        imread(img_list[0], cache=cache)  # evicted, decode again.
+        self.assertEqual(cache.misses, 4)
+
+
+class ImageHelperTests(unittest.TestCase):
+    def test_preview_flag(self):
+        img_path = Path(__file__).parent / Path('image/222.bmp')
+        width, height = get_image_size(img_path)
+        self.assertEqual(get_preview_flag(img_path, (width // 4, height // 4)), cv2.IMREAD_REDUCED_COLOR_4)
+        self.assertEqual(get_preview_flag(img_path, (width, height)), cv2.IMREAD_UNCHANGED)
+        self.assertEqual(imread(img_path, cv2.IMREAD_REDUCED_COLOR_2).shape[:2], (height // 2, width // 2))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            alpha_path = Path(temp_dir) / Path('alpha.png')
+            cv2.imwrite(str(alpha_path), np.full((400, 400, 4), 128, dtype=np.uint8))
+            self.assertEqual(get_preview_flag(alpha_path, (100, 100)), cv2.IMREAD_UNCHANGED)  # the reduced flag drops the alpha.
+            self.assertEqual(get_preview_flag(alpha_path, (100, 100), cv2.IMREAD_COLOR), cv2.IMREAD_REDUCED_COLOR_4)
+
+    def test_paste_16_bit(self):
+        img = np.tile(np.linspace(0, 65535, 64).astype(np.uint16), (8, 1))
+        tile = compose_mosaic([img])
+        self.assertEqual((int(tile[..., 0].min()), int(tile[..., 0].max())), (0, 255))
+        self.assertTrue((np.diff(tile[0, :, 0].astype(int)) >= 0).all())  # scaled, not wrapped.
+
+    def test_compose_mosaic(self):
+        img_list = [imread(Path(__file__).parent / Path('image') / Path(name)) for name in ('1.png', '2.png', '222.bmp')]
+        strip = compose_mosaic(img_list)
+        self.assertTrue((strip == append_image_to_news(img_list[0], img_list[1:], direction='r')).all())
+
+        grid = compose_mosaic(img_list, n_col=2, highlight_idx=0, highlight_color=(0, 0, 255), border_thickness=3)
+        h, w = img_list[0].shape[:2]
+        self.assertEqual(grid.shape, (h + 6 + img_list[2].shape[0], max(w + 6, img_list[2].shape[1]) + img_list[1].shape[1], 4))
+        self.assertEqual(grid[0, 0].tolist(), [0, 0, 255, 255])
+        self.assertEqual(grid[h + 5, w + 5].tolist(), [0, 0, 255, 255])
+
+    def test_strip_compositor(self):
+        dict_img = {name: imread(Path(__file__).parent / Path('image') / Path(name)) for name in ('1.png', '2.png')}
+        dict_img['3.png'] = dict_img['1.png'][..., :3].copy()  # the same shape of 1.png, so the canvas is reused.
+        strip = StripCompositor(highlight_color=(0, 0, 255), border_thickness=2)
+        strip.compose(['1.png', '2.png'], dict_img)
+        canvas = strip.compose(['1.png', '2.png'], {})
+        self.assertEqual(strip.missing(['2.png', '3.png']), ['3.png'])
+        canvas_next = strip.compose(['2.png', '3.png'], {'3.png': dict_img['3.png']})
+        self.assertIs(canvas, canvas_next)
+        expected = StripCompositor(highlight_color=(0, 0, 255), border_thickness=2).compose(['2.png', '3.png'], dict_img)
+        self.assertTrue((canvas_next == expected).all())
+
+    def test_strip_skips_removed_neighbour(self):
+        """
+        ``delete_duplicates`` deletes the next images, the strip advances without them. (``RenameFactory.next_images``)
+        """
+        import shutil
+        from image_rename.core import RenameFactory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            img_path_list = [Path(temp_dir) / Path(f'{i}.png') for i in range(5)]
+            [shutil.copy(Path(__file__).parent / Path('image/1.png'), path) for path in img_path_list]
+            app = types.SimpleNamespace(img_path_list=img_path_list, set_skip_path=set(), session=None)
+            app.is_skipped = types.MethodType(RenameFactory.is_skipped, app)
+            app.fetch_img_path = types.MethodType(RenameFactory.fetch_img_path, app)
+            loop = asyncio.new_event_loop()
+            try:
+                strip = StripCompositor(highlight_color=(0, 0, 255), border_thickness=2)
+                for idx, removed in ((0, None), (1, img_path_list[2]), (3, img_path_list[4])):
+                    if removed is not None:  # the duplicate of the current image is deleted.
+                        os.remove(removed)
+                        app.set_skip_path.add(removed)
+                    neighbour_list = loop.run_until_complete(RenameFactory.next_images(app, idx, 2))
+                    key_list = [ImageCache.make_key(path, None) for path in [img_path_list[idx]] + neighbour_list]
+                    strip.compose(key_list, {key: imread(key[0]) for key in strip.missing(key_list)})
+                    self.assertNotIn(removed, neighbour_list)
+                self.assertEqual(neighbour_list, [])
+                self.assertEqual(loop.run_until_complete(RenameFactory.next_images(app, 0, 2)), [img_path_list[1], img_path_list[3]])
+            finally:
+                loop.close()
+
+
+class PrefetcherTests(unittest.TestCase):
+    def test_bounded_queue(self):
+        async def main():
+            cache = ImageCache()
+            prefetcher = Prefetcher(lambda path: imread(path, cache=cache), depth=2)
+            img_list = [Path(__file__).parent / Path('image') / Path(name) for name in ('1.png', '2.png', 'user.png')]
+            prefetcher.schedule(img_list)
+            self.assertNotIn(img_list[0], prefetcher)  # dropped, only keep the last `depth` images.
+            np_img_list = await prefetcher.get_all(img_list)
+            prefetcher.shutdown()
+            return np_img_list
+
+        np_img_list = asyncio.run(main())
+        self.assertEqual(len(np_img_list), 3)
+        self.assertTrue(all(np_img is not None for np_img in np_img_list))
+
+
+class JobRegistryTests(unittest.TestCase):
+    def test_dispatch_by_priority(self):
+        record = []
+        jobs = JobRegistry()
+        jobs.register('low', lambda: record.append('low'), Event.IMG_CHANGE, priority=0)
+        jobs.register('once', lambda: record.append('once'), Event.IMG_CHANGE, JobState.ONCE, priority=5)
+        jobs['high'] = (9, lambda: record.append('high'), Event.IMG_CHANGE, JobState.FOREVER)  # the old style of dict_job
+        jobs.register('none', lambda: record.append('none'), Event.NONE)
+        jobs.dispatch(Event.IMG_CHANGE)
+        jobs.dispatch(Event.IMG_CHANGE)
+        self.assertEqual(record, ['high', 'once', 'low', 'high', 'low'])
+        self.assertNotIn('once', jobs)
+
+        del jobs['high']
+        jobs.register('low', lambda: record.append('new low'), Event.IMG_CHANGE)  # replace
+        record.clear()
+        jobs.dispatch(Event.IMG_CHANGE)
+        self.assertEqual(record, ['new low'])
+        self.assertEqual(len(jobs), 2)
+
+
+class PanelRegistryTests(unittest.TestCase):
+    class FakeWindow:
+        def __init__(self):
+            self.state = 'normal'
+            self.on_map = None
+
+        def wm_state(self):
+            return self.state
+
+        def bind(self, sequence, func, add=None):
+            self.on_map = func
+
+    class FakePanel:
+        def __init__(self, parent):
+            self.parent = parent
+            self.event_list = []
+
+        def update(self, event):
+            self.event_list.append(event)
+
+    def test_subscribe_and_defer(self):
+        registry = PanelRegistry()
+        history = self.FakePanel(self.FakeWindow())
+        ifd = self.FakePanel(self.FakeWindow())
+        registry.subscribe(history, (Event.IMG_CHANGE,))
+        registry.subscribe(ifd, (Event.IMG_CHANGE,), defer_when_hidden=True)
+
+        registry.dispatch(Event.NONE)
+        self.assertEqual(history.event_list, [])
+
+        ifd.parent.state = 'withdrawn'
+        registry.dispatch(Event.IMG_CHANGE)
+        registry.dispatch(Event.IMG_CHANGE)
+        self.assertEqual((len(history.event_list), len(ifd.event_list)), (2, 0))
+
+        ifd.parent.state = 'normal'
+        ifd.parent.on_map(types.SimpleNamespace(widget=ifd.parent))
+        self.assertEqual(ifd.event_list, [Event.IMG_CHANGE])
+
+
+class DirIndexTests(unittest.TestCase):
+    def test_collision_and_next_free(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            for name in ('A.png', 'a_001.png'):
+                (temp_dir / Path(name)).touch()
+            registry = DirIndexRegistry()
+            dir_index = registry.get(temp_dir)
+            self.assertIn('a.PNG', dir_index)
+            self.assertEqual(dir_index.next_free('a', '.png'), 'a_002.png')
+
+            (temp_dir / Path('A.png')).rename(temp_dir / Path('b.png'))
+            registry.on_rename(temp_dir / Path('A.png'), temp_dir / Path('b.png'))
+            self.assertIs(registry.get(temp_dir), dir_index)
+            self.assertEqual(sorted(dir_index.names), ['a_001.png', 'b.png'])
+
+
+class ImageScannerTests(unittest.TestCase):
+    def test_scan(self):
+        work_dir = Path(__file__).parent
+        expected = sorted([f for f in (work_dir / Path('image')).glob('*') if f.suffix[1:].lower() in ('png', 'bmp')])
+        scanner = ImageScanner(work_dir / Path('image'), extensions=('PNG', 'bmp'))
+        self.assertIsInstance(scanner[0], Path)
+        self.assertEqual(sorted(scanner), expected)
+        self.assertEqual(len(scanner), len(expected))
+        self.assertEqual(asyncio.run(scanner.await_count(10 ** 6)), len(expected))
+        self.assertEqual(len(ImageScanner(work_dir, extensions=('png', 'bmp'), max_depth=None)), len(expected))
+        self.assertEqual(len(ImageScanner(work_dir, extensions=('png', 'bmp'), max_depth=0)), 0)
+
+
 def test_setup():
     # suite_list = [unittest.TestLoader().loadTestsFromTestCase(class_module) for class_module in (CLITests, )]
     # suite_class_set = unittest.TestSuite(suite_list)
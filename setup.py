@@ -74,7 +74,7 @@ setup(
     long_description_content_type='text/x-rst',
     keywords=['opencv', ],
 
-    python_requires='>=3.6.2,',
+    python_requires='>=3.7',
 
     zip_safe=True,
     classifiers=[  # https://pypi.org/classifiers/
@@ -91,7 +91,6 @@ setup(
         'Operating System :: MacOS',
 
         'Programming Language :: Python :: 3 :: Only',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
@@ -111,6 +110,8 @@ setup(
     entry_points={
         'console_scripts': [
             f'img_rename={PACKAGES_DIR}.cli:main',
+            f'img_rename_batch={PACKAGES_DIR}.cli:batch_main',
+            f'img_rename_journal={PACKAGES_DIR}.cli:journal_main',
         ],
     },
     test_suite='setup.test_setup',  # `python setup.py test` will call this function. # return value must is `suite`